@@ -0,0 +1,232 @@
+"""
+ark_batcher.py
+Packs Ark AI exports across concurrent pipelines. Each run used to slice its
+own profiles into batches of 300, so a 320-engager post cost a full export
+plus a 20-URL one — two webhook round trips, two chances of a lost webhook —
+and two posts in the Ark stage at once never shared an export.
+
+Runs submit() their URLs here instead. The batcher holds them for up to
+ARK_BATCH_LINGER seconds (counted from the oldest queued URL) so other runs
+can top the batch up, sends a batch the moment ARK_BATCH_SIZE URLs are
+queued, and hands every URL's outcome back to the run that asked through a
+concurrent.futures Future (the threaded engine blocks on them, the asyncio
+engine awaits them through asyncio.wrap_future).
+
+The Ark stage cap (scheduler.STAGE_CAPS["ark"]) applies here per export
+rather than per run: at most `max_in_flight` exports are out at once, and
+while they are, URLs keep queueing — so a busy stage sends fuller batches.
+
+The batcher only packs and routes. Sending a batch and waiting for its
+webhook is the engine's `send(urls, on_launch, track_id=None)`, which returns
+a Future of the batch's leads and calls on_launch(trackId) once the export
+is accepted; `route(urls, leads)` turns those into {url: outcome}. attach()
+re-waits on exports launched before a restart: runs that shared one attach
+to a single waiter.
+
+stats() counts export requests, URLs sent and the mean batch fill ratio.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime
+
+ARK_BATCH_LINGER = float(os.environ.get("ARK_BATCH_LINGER", 2))   # seconds; 0 = every run sends its own batches
+
+_batchers = {}   # name -> ArkBatcher
+_batchers_lock = threading.Lock()
+
+
+def _log(msg: str):
+    print(f"[{datetime.utcnow().isoformat()}] {msg}", flush=True)
+
+
+class _Request:
+    """One run's submit(): notified with its own URLs when they're launched."""
+    __slots__ = ("on_launch",)
+
+    def __init__(self, on_launch):
+        self.on_launch = on_launch
+
+
+class _Batch:
+    """One export: (url, Future, request) entries, plus late attach() joiners."""
+    __slots__ = ("entries", "track_id")
+
+    def __init__(self, entries: list, track_id: str | None = None):
+        self.entries = entries
+        self.track_id = track_id
+
+
+class ArkBatcher:
+    """Cross-run Ark AI export packing. Thread-safe; batches go out from one dispatcher thread."""
+
+    def __init__(self, name: str, send, route, size: int, max_in_flight: int,
+                 linger: float = ARK_BATCH_LINGER):
+        self.name = name
+        self.size = size
+        self.max_in_flight = max_in_flight
+        self.linger = linger
+        self._send = send
+        self._route = route
+        self._cond = threading.Condition()
+        self._queue = deque()   # (url, Future, request, queued_at), oldest first
+        self._attached = {}     # trackId -> _Batch being re-waited
+        self._in_flight = 0     # exports sent (or re-attached) and not landed yet
+        self._dispatcher = None
+        self._counts = {"submits": 0, "urls_submitted": 0, "exports": 0, "urls_sent": 0,
+                        "full_exports": 0, "reattached": 0, "failed": 0}
+        with _batchers_lock:
+            _batchers[name] = self
+
+    def submit(self, urls: list[str], on_launch=None) -> dict:
+        """
+        Queue `urls` for the next packed export. Returns {url: Future}; each
+        resolves to route()'s outcome for that URL, or raises if its export
+        failed. `on_launch(trackId, urls)` is told which of our URLs went
+        out under which trackId.
+        """
+        request = _Request(on_launch)
+        futures = {}
+        now = time.monotonic()
+        with self._cond:
+            for url in urls:
+                if url in futures:
+                    continue
+                futures[url] = Future()
+                self._queue.append((url, futures[url], request, now))
+            if futures:
+                self._counts["submits"] += 1
+                self._counts["urls_submitted"] += len(futures)
+                if self._dispatcher is None:
+                    self._dispatcher = threading.Thread(
+                        target=self._dispatch, name=f"ark-batcher-{self.name}", daemon=True
+                    )
+                    self._dispatcher.start()
+                self._cond.notify()
+        return futures
+
+    def attach(self, outstanding: dict) -> dict:
+        """
+        Wait on exports launched before a restart ({trackId: our URLs in
+        it}). Returns {url: Future} like submit(). A trackId another run has
+        already re-attached to is waited on once, for both.
+        """
+        futures = {}
+        for track_id, urls in outstanding.items():
+            entries = []
+            for url in urls:
+                if url not in futures:
+                    futures[url] = Future()
+                    entries.append((url, futures[url], None))
+            with self._cond:
+                batch = self._attached.get(track_id)
+                if batch is not None:
+                    batch.entries.extend(entries)
+                    continue
+                batch = self._attached[track_id] = _Batch(entries, track_id)
+                self._counts["reattached"] += 1
+                # Already launched — counts against the cap but doesn't wait for it
+                self._in_flight += 1
+            self._start(batch)
+        return futures
+
+    def _dispatch(self):
+        """Dispatcher thread: pack the queue into exports as they fill up or their linger runs out."""
+        while True:
+            with self._cond:
+                while not self._queue or self._in_flight >= self.max_in_flight:
+                    self._cond.wait()
+                flush_at = self._queue[0][3] + self.linger
+                while len(self._queue) < self.size:
+                    remaining = flush_at - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                entries = []
+                while self._queue and len(entries) < self.size:
+                    entry = self._queue.popleft()
+                    # Skip URLs whose run gave up waiting before they went out
+                    if not entry[1].cancelled():
+                        entries.append(entry[:3])
+                if not entries:
+                    continue
+                self._in_flight += 1
+                self._counts["exports"] += 1
+                self._counts["urls_sent"] += len(entries)
+                self._counts["full_exports"] += len(entries) == self.size
+            runs = len({id(request) for _, _, request in entries})
+            _log(
+                f"Ark batcher: export of {len(entries)}/{self.size} URLs from {runs} run(s) "
+                f"({len(entries) / self.size:.0%} full)"
+            )
+            self._start(_Batch(entries))
+
+    def _start(self, batch: _Batch):
+        """Hand `batch` to the engine and route its outcome back when it lands."""
+        urls = [url for url, _, _ in batch.entries]
+        try:
+            done = self._send(urls, lambda track_id: self._launched(batch, track_id), batch.track_id)
+        except Exception as exc:
+            done = Future()
+            done.set_exception(exc)
+        done.add_done_callback(lambda future: self._landed(batch, future))
+
+    def _launched(self, batch: _Batch, track_id: str):
+        """Tell each run in `batch` which of its URLs went out under `track_id`."""
+        batch.track_id = track_id
+        by_request = {}
+        for url, _, request in batch.entries:
+            if request is not None and request.on_launch is not None:
+                by_request.setdefault(id(request), (request, []))[1].append(url)
+        for request, urls in by_request.values():
+            try:
+                request.on_launch(track_id, urls)
+            except Exception as exc:
+                _log(f"Ark batcher: launch callback failed (non-fatal): {exc}")
+
+    def _landed(self, batch: _Batch, done: Future):
+        """Settle every URL in `batch` with its outcome, or with the export's error."""
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+            if batch.track_id is not None and self._attached.get(batch.track_id) is batch:
+                del self._attached[batch.track_id]
+            entries = list(batch.entries)
+            error = RuntimeError("Ark AI export was cancelled") if done.cancelled() else done.exception()
+            if error is not None:
+                self._counts["failed"] += 1
+        if error is None:
+            try:
+                outcomes = self._route([url for url, _, _ in entries], done.result())
+            except Exception as exc:
+                error = exc
+        for url, future, _ in entries:
+            # A run that stopped waiting cancels its Futures — the rest of the export still lands
+            if future.set_running_or_notify_cancel():
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(outcomes.get(url))
+
+    def stats(self) -> dict:
+        """Queue depth, exports in flight, request counts and the mean batch fill ratio."""
+        with self._cond:
+            exports = self._counts["exports"]
+            return {
+                "linger": self.linger,
+                "queued": len(self._queue),
+                "in_flight": self._in_flight,
+                "max_in_flight": self.max_in_flight,
+                **self._counts,
+                "fill_ratio": round(self._counts["urls_sent"] / (exports * self.size), 3) if exports else None,
+            }
+
+
+def stats() -> dict:
+    """{batcher name: stats()} for every batcher in this process."""
+    with _batchers_lock:
+        batchers = list(_batchers.values())
+    return {batcher.name: batcher.stats() for batcher in batchers}
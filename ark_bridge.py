@@ -0,0 +1,403 @@
+"""
+ark_bridge.py
+Hands Ark AI webhook payloads from the Flask handler to the pipeline waiting
+on that trackId.
+
+Two interchangeable bridges, picked with ARK_BRIDGE:
+  memory  (default) — a dict in this process. Only correct with a single
+          gunicorn worker: a webhook landing on another worker is never seen.
+  sqlite  — payloads go through a table in CACHE_DB, so any worker can take
+          the webhook for any waiting pipeline. A watcher thread in each
+          process checks SQLite's data_version every ARK_BRIDGE_POLL seconds
+          (no query unless another connection committed) and wakes local
+          waiters as soon as their payload is stored.
+
+Both expose deliver() for the webhook handler and register() / take() /
+unregister() for the pipeline; a waiter is a threading.Event that is set
+whenever one of its trackIds has a payload to take.
+
+Payloads nobody claims (resends, webhooks for timed-out batches, stray
+trackIds) are evicted after ARK_BUFFER_TTL, and stats() counts buffered,
+claimed, expired and duplicate deliveries.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from cache import CACHE_DB
+
+ARK_BRIDGE = os.environ.get("ARK_BRIDGE", "memory").lower()
+ARK_BRIDGE_POLL = float(os.environ.get("ARK_BRIDGE_POLL", 0.1))   # seconds between change checks
+
+# Unclaimed payloads (resends, stray or timed-out trackIds) are dropped after this
+ARK_BUFFER_TTL = float(os.environ.get("ARK_BUFFER_TTL_MINUTES", 60)) * 60
+# Memory bridge: payload bytes held in memory before new ones spill to disk
+ARK_BUFFER_MAX_BYTES = int(float(os.environ.get("ARK_BUFFER_MAX_MB", 64)) * 1024 * 1024)
+ARK_SPILL_DIR = os.environ.get("ARK_SPILL_DIR") or None   # default: the system temp dir
+
+
+class _Buffered:
+    __slots__ = ("payload", "path", "size", "received_at")
+
+    def __init__(self, payload, path, size, received_at):
+        self.payload = payload    # None once spilled to `path`
+        self.path = path
+        self.size = size
+        self.received_at = received_at
+
+
+class MemoryBridge:
+    """
+    In-process bridge. Thread-safe. Unclaimed payloads are evicted after
+    ARK_BUFFER_TTL; once ARK_BUFFER_MAX_BYTES are held in memory, further
+    payloads are spilled to files under ARK_SPILL_DIR until claimed.
+    """
+
+    kind = "memory"
+
+    def __init__(self, ttl: float = ARK_BUFFER_TTL, max_bytes: int = ARK_BUFFER_MAX_BYTES,
+                 spill_dir: str | None = ARK_SPILL_DIR):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._spill_parent = spill_dir
+        self._spill_dir = None
+        self._lock = threading.Lock()
+        self._payloads = OrderedDict()   # trackId -> _Buffered, oldest first
+        self._waiters = {}               # trackId -> threading.Event
+        self._claimed = OrderedDict()    # trackId -> claimed at, to spot late resends
+        self._memory_bytes = 0
+        self._counts = Counter()
+
+    def _spill(self, track_id: str, payload: dict) -> str:
+        if self._spill_dir is None:
+            if self._spill_parent:
+                os.makedirs(self._spill_parent, exist_ok=True)
+            self._spill_dir = tempfile.mkdtemp(prefix="ark-spill-", dir=self._spill_parent)
+        # trackIds come from the webhook body — never use them as file names
+        path = os.path.join(self._spill_dir, hashlib.sha1(track_id.encode()).hexdigest() + ".json")
+        with open(path, "w") as f:
+            json.dump(payload, f)
+        return path
+
+    def _drop(self, track_id: str) -> _Buffered:
+        entry = self._payloads.pop(track_id)
+        if entry.path:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+        else:
+            self._memory_bytes -= entry.size
+        return entry
+
+    def _evict(self, now: float):
+        """Drop unclaimed payloads older than the TTL (no one waiting on them)."""
+        cutoff = now - self.ttl
+        for track_id, entry in list(self._payloads.items()):
+            if entry.received_at >= cutoff:
+                break
+            if track_id not in self._waiters:
+                self._drop(track_id)
+                self._counts["expired"] += 1
+        while self._claimed and next(iter(self._claimed.values())) < cutoff:
+            self._claimed.popitem(last=False)
+
+    def deliver(self, track_id: str, payload: dict, size: int | None = None) -> bool:
+        """
+        Store a webhook payload (`size` = its body length in bytes, if known).
+        Returns True if a pipeline here was waiting for it.
+        """
+        if size is None:
+            size = len(json.dumps(payload))
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            self._counts["delivered"] += 1
+            wake = self._waiters.get(track_id)
+            if track_id in self._payloads:
+                # Resend of a payload nobody has claimed yet — keep the newest
+                self._counts["duplicates"] += 1
+                self._drop(track_id)
+            elif track_id in self._claimed:
+                self._counts["duplicates"] += 1
+                if wake is None:
+                    return False   # Late resend of something already processed
+            if self._memory_bytes + size > self.max_bytes:
+                entry = _Buffered(None, self._spill(track_id, payload), size, now)
+                self._counts["spilled"] += 1
+            else:
+                entry = _Buffered(payload, None, size, now)
+                self._memory_bytes += size
+            self._payloads[track_id] = entry
+            self._counts["buffered"] += 1
+        if wake:
+            wake.set()
+        return wake is not None
+
+    def register(self, track_id: str, wake: threading.Event) -> bool:
+        """
+        Set `wake` whenever `track_id`'s payload is available. Returns True if
+        it had already arrived (the webhook beat the registration).
+        """
+        with self._lock:
+            self._waiters[track_id] = wake
+            arrived = track_id in self._payloads
+        if arrived:
+            wake.set()
+        return arrived
+
+    def take(self, track_ids) -> dict:
+        """Remove and return {trackId: payload} for every one of `track_ids` that has arrived."""
+        arrived = {}
+        now = time.time()
+        with self._lock:
+            for track_id in list(track_ids):
+                if track_id not in self._payloads:
+                    continue
+                entry = self._payloads[track_id]
+                if entry.path:
+                    with open(entry.path) as f:
+                        arrived[track_id] = json.load(f)
+                else:
+                    arrived[track_id] = entry.payload
+                self._drop(track_id)
+                self._waiters.pop(track_id, None)
+                self._claimed[track_id] = now
+                self._claimed.move_to_end(track_id)
+                self._counts["claimed"] += 1
+        return arrived
+
+    def unregister(self, track_ids):
+        """Stop waking anyone for `track_ids`."""
+        with self._lock:
+            for track_id in list(track_ids):
+                self._waiters.pop(track_id, None)
+
+    def stats(self) -> dict:
+        """Buffer occupancy plus buffered / claimed / expired / duplicate delivery counters."""
+        with self._lock:
+            self._evict(time.time())
+            return {
+                "kind": self.kind,
+                "waiting": len(self._waiters),
+                "buffered_now": len(self._payloads),
+                "memory_bytes": self._memory_bytes,
+                "spilled_now": sum(1 for entry in self._payloads.values() if entry.path),
+                **{key: self._counts[key] for key in
+                   ("delivered", "buffered", "claimed", "expired", "duplicates", "spilled")},
+            }
+
+
+class SqliteBridge:
+    """
+    Cross-process bridge backed by SQLite. Thread-safe; every call opens its
+    own short-lived connection, except the watcher thread which keeps one.
+    Payloads already live on disk, so only the TTL applies: claimed rows keep
+    a tombstone until then so late resends are counted as duplicates, and
+    unclaimed ones are deleted. Counters are for this process.
+    """
+
+    kind = "sqlite"
+
+    def __init__(self, path: str = CACHE_DB, poll: float = ARK_BRIDGE_POLL, ttl: float = ARK_BUFFER_TTL):
+        self.path = path
+        self.poll = poll
+        self.ttl = ttl
+        self._init_lock = threading.Lock()
+        self._ready = False
+        self._lock = threading.Lock()
+        self._waiters = {}      # trackId -> threading.Event (waiters in this process only)
+        self._watcher = None
+        self._counts = Counter()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._ready:
+            with self._init_lock:
+                if not self._ready:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS ark_webhooks ("
+                        "track_id TEXT PRIMARY KEY, payload TEXT, size INTEGER NOT NULL, "
+                        "received_at REAL NOT NULL, claimed_at REAL)"
+                    )
+                    conn.commit()
+                    self._ready = True
+        return conn
+
+    def _stored(self, conn: sqlite3.Connection, track_ids: list[str]) -> list[str]:
+        found = []
+        for i in range(0, len(track_ids), 500):
+            chunk = track_ids[i:i + 500]
+            found += [row[0] for row in conn.execute(
+                f"SELECT track_id FROM ark_webhooks "
+                f"WHERE payload IS NOT NULL AND track_id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )]
+        return found
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """Delete unclaimed payloads and tombstones older than the TTL."""
+        cutoff = now - self.ttl
+        expired = conn.execute(
+            "DELETE FROM ark_webhooks WHERE claimed_at IS NULL AND received_at < ?", (cutoff,)
+        ).rowcount
+        conn.execute("DELETE FROM ark_webhooks WHERE claimed_at < ?", (cutoff,))
+        with self._lock:
+            self._counts["expired"] += expired
+
+    def deliver(self, track_id: str, payload: dict, size: int | None = None) -> bool:
+        """
+        Store a webhook payload for whichever process is waiting on it
+        (`size` = its body length in bytes, if known). Returns True if a
+        pipeline in this process was waiting (others are woken by their own
+        watcher).
+        """
+        body = json.dumps(payload)
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                self._evict(conn, now)
+                # A resend — of a buffered payload, or of one already claimed.
+                # We can't see other processes' waiters, so it's stored either
+                # way and left to the TTL if no one claims it.
+                duplicate = conn.execute(
+                    "SELECT 1 FROM ark_webhooks WHERE track_id = ?", (track_id,)
+                ).fetchone() is not None
+                conn.execute(
+                    "INSERT OR REPLACE INTO ark_webhooks (track_id, payload, size, received_at, claimed_at) "
+                    "VALUES (?, ?, ?, ?, NULL)",
+                    (track_id, body, len(body) if size is None else size, now),
+                )
+        finally:
+            conn.close()
+        with self._lock:
+            self._counts["delivered"] += 1
+            self._counts["buffered"] += 1
+            self._counts["duplicates"] += duplicate
+            wake = self._waiters.get(track_id)
+        if wake:
+            wake.set()
+        return wake is not None
+
+    def register(self, track_id: str, wake: threading.Event) -> bool:
+        """
+        Set `wake` whenever `track_id`'s payload is available, from any
+        process. Returns True if it had already arrived.
+        """
+        with self._lock:
+            self._waiters[track_id] = wake
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch, name="ark-bridge-watcher", daemon=True)
+                self._watcher.start()
+        conn = self._connect()
+        try:
+            arrived = bool(self._stored(conn, [track_id]))
+        finally:
+            conn.close()
+        if arrived:
+            wake.set()
+        return arrived
+
+    def take(self, track_ids) -> dict:
+        """Remove and return {trackId: payload} for every one of `track_ids` that has arrived."""
+        track_ids = list(track_ids)
+        if not track_ids:
+            return {}
+        arrived = {}
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                # Claim under a write lock so two processes can't both take a payload
+                conn.execute("BEGIN IMMEDIATE")
+                for i in range(0, len(track_ids), 500):
+                    chunk = track_ids[i:i + 500]
+                    marks = ",".join("?" * len(chunk))
+                    for track_id, payload in conn.execute(
+                        f"SELECT track_id, payload FROM ark_webhooks "
+                        f"WHERE payload IS NOT NULL AND track_id IN ({marks})", chunk
+                    ).fetchall():
+                        arrived[track_id] = json.loads(payload)
+                    conn.execute(
+                        f"UPDATE ark_webhooks SET payload = NULL, claimed_at = ? "
+                        f"WHERE payload IS NOT NULL AND track_id IN ({marks})",
+                        [now, *chunk],
+                    )
+        finally:
+            conn.close()
+        with self._lock:
+            for track_id in arrived:
+                self._waiters.pop(track_id, None)
+            self._counts["claimed"] += len(arrived)
+        return arrived
+
+    def unregister(self, track_ids):
+        """Stop waking anyone in this process for `track_ids`."""
+        with self._lock:
+            for track_id in list(track_ids):
+                self._waiters.pop(track_id, None)
+
+    def _watch(self):
+        """Wake local waiters whose payload another process stored."""
+        conn = self._connect()
+        version = None
+        try:
+            while True:
+                with self._lock:
+                    if not self._waiters:
+                        self._watcher = None
+                        return
+                    waiters = dict(self._waiters)
+                # data_version only changes when another connection commits,
+                # so an idle check costs no query against the table
+                current = conn.execute("PRAGMA data_version").fetchone()[0]
+                if current != version:
+                    version = current
+                    for track_id in self._stored(conn, list(waiters)):
+                        waiters[track_id].set()
+                time.sleep(self.poll)
+        except Exception:
+            with self._lock:
+                self._watcher = None
+            raise
+        finally:
+            conn.close()
+
+    def stats(self) -> dict:
+        """Buffer occupancy (all processes) plus this process's delivery counters."""
+        conn = self._connect()
+        try:
+            with conn:
+                self._evict(conn, time.time())
+            buffered, stored_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ark_webhooks WHERE payload IS NOT NULL"
+            ).fetchone()
+        finally:
+            conn.close()
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "waiting": len(self._waiters),
+                "buffered_now": buffered,
+                "stored_bytes": stored_bytes,
+                **{key: self._counts[key] for key in
+                   ("delivered", "buffered", "claimed", "expired", "duplicates")},
+            }
+
+
+def create(kind: str = ARK_BRIDGE):
+    """The bridge named by `kind` ("memory" or "sqlite")."""
+    if kind == "memory":
+        return MemoryBridge()
+    if kind == "sqlite":
+        return SqliteBridge()
+    raise ValueError(f"Unknown ARK_BRIDGE {kind!r} (expected 'memory' or 'sqlite')")
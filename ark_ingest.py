@@ -0,0 +1,237 @@
+"""
+ark_ingest.py
+Fast-ack ingestion for Ark AI webhooks.
+
+The Flask handler only spools the raw request body (in memory up to
+ARK_SPOOL_MEMORY bytes, then in a temp file) and returns; a background
+parser thread decompresses it (gzip bodies are accepted), parses the JSON
+and reduces the payload to compact lead records — just the fields the
+pipeline reads — before handing it to the Ark bridge, which wakes the
+waiting pipeline. Large 300-person documents therefore never tie up a
+request thread, and the full nested `person` objects are dropped as soon as
+they're parsed.
+
+Ack latency, queue wait, parse time and raw / decoded / compact payload
+sizes are available from stats().
+"""
+
+import gzip
+import json
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+import zlib
+
+ARK_SPOOL_MEMORY = 1024 * 1024   # body bytes kept in memory before the spool rolls to disk
+ARK_PARSE_WORKERS = 1            # parsing is CPU-bound — more threads only contend for the GIL
+ARK_MAX_BODY = 256 * 1024 * 1024  # refuse to decompress past this (gzip bombs)
+
+LEAD_FIELDS = ("first_name", "last_name", "email", "company", "title", "linkedin_url")
+
+
+def compact_payload(data: dict) -> dict:
+    """
+    Reduce an Ark AI webhook document to what the pipeline uses: trackId,
+    state, statistics, the number of people, and one record per person with
+    a verified email (found=True, status=VALID).
+    """
+    people = data.get("data", []) or []
+    leads = []
+    for person in people:
+        # Find a valid, verified email
+        email_obj = person.get("email", {}) or {}
+        outputs = email_obj.get("output", []) or []
+
+        email_addr = ""
+        for entry in outputs:
+            if entry.get("found") and entry.get("status") == "VALID":
+                email_addr = entry.get("address", "")
+                break
+
+        if not email_addr:
+            continue
+
+        summary = person.get("summary", {}) or {}
+        company_obj = person.get("company", {}) or {}
+        company_summary = company_obj.get("summary", {}) or {}
+        link_obj = person.get("link", {}) or {}
+
+        # LinkedIn URL: prefer link.linkedin, fall back to identifier
+        identifier = person.get("identifier", "")
+        linkedin_url = link_obj.get("linkedin", "") or identifier
+        if identifier and "linkedin.com" not in identifier:
+            identifier = f"https://www.linkedin.com/in/{identifier}"
+
+        leads.append({
+            "first_name": summary.get("first_name", ""),
+            "last_name": summary.get("last_name", ""),
+            "email": email_addr,
+            "company": company_summary.get("name", ""),
+            "title": summary.get("title", "") or summary.get("headline", ""),
+            "linkedin_url": linkedin_url,
+            "identifier": identifier,
+        })
+
+    return {
+        "trackId": data.get("trackId", ""),
+        "state": data.get("state", "UNKNOWN"),
+        "statistics": data.get("statistics", {}) or {},
+        "people": len(people),
+        "leads": leads,
+    }
+
+
+def _decode(spool, gzipped: bool) -> bytes:
+    """Read a spooled body, gunzipping it if needed (by header or magic bytes)."""
+    spool.seek(0)
+    head = spool.read(2)
+    spool.seek(0)
+    if not (gzipped or head == b"\x1f\x8b"):
+        return spool.read()
+    with gzip.GzipFile(fileobj=spool, mode="rb") as body:
+        raw = body.read(ARK_MAX_BODY + 1)
+    if len(raw) > ARK_MAX_BODY:
+        raise ValueError(f"decompressed body exceeds {ARK_MAX_BODY} bytes")
+    return raw
+
+
+class _Timing:
+    """Running count / total / max of one measurement."""
+
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def as_dict(self, scale: float = 1, digits: int = 1) -> dict:
+        return {
+            "avg": round(self.total / self.count * scale, digits) if self.count else 0.0,
+            "max": round(self.max * scale, digits),
+            "total": round(self.total * scale, digits),
+        }
+
+
+class ArkIngest:
+    """
+    Spool-and-acknowledge front end for the Ark webhook, feeding `bridge`
+    (an ark_bridge bridge) from background parser threads.
+    """
+
+    def __init__(self, bridge, workers: int = ARK_PARSE_WORKERS):
+        self.bridge = bridge
+        self.workers = workers
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._errors = 0
+        self._gzipped = 0
+        self._ack = _Timing()        # seconds spent in the request handler
+        self._wait = _Timing()       # seconds queued before a parser picked it up
+        self._parse = _Timing()      # seconds to decode, parse and compact
+        self._raw = _Timing()        # bytes on the wire
+        self._decoded = _Timing()    # bytes of JSON after decompression
+        self._compact = _Timing()    # bytes handed to the bridge
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._worker, name=f"ark-parser-{len(self._threads) + 1}", daemon=True
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def accept(self, stream, content_encoding: str = "") -> int:
+        """
+        Spool a webhook body from `stream` and queue it for parsing. Returns
+        the number of bytes read. Call from the request handler.
+        """
+        received_at = time.monotonic()
+        spool = tempfile.SpooledTemporaryFile(max_size=ARK_SPOOL_MEMORY)
+        shutil.copyfileobj(stream, spool, 64 * 1024)
+        size = spool.tell()
+        gzipped = "gzip" in (content_encoding or "").lower()
+        with self._lock:
+            self._start_workers()
+            self._ack.add(time.monotonic() - received_at)
+            self._raw.add(size)
+            self._gzipped += gzipped
+        self._queue.put((spool, gzipped, size, received_at))
+        return size
+
+    def _worker(self):
+        while True:
+            spool, gzipped, size, received_at = self._queue.get()
+            started = time.monotonic()
+            try:
+                raw = _decode(spool, gzipped)
+                compact = compact_payload(json.loads(raw))
+                decoded = len(raw)
+                del raw
+                compact_size = len(json.dumps(compact))
+            except (OSError, EOFError, zlib.error, ValueError, AttributeError, TypeError) as exc:
+                with self._lock:
+                    self._errors += 1
+                print(f"[ARK WEBHOOK] Unreadable payload ({size} bytes) dropped: {exc!r}", flush=True)
+                continue
+            finally:
+                spool.close()
+            parsed = time.monotonic()
+            with self._lock:
+                self._wait.add(started - received_at)
+                self._parse.add(parsed - started)
+                self._decoded.add(decoded)
+                self._compact.add(compact_size)
+
+            track_id = compact["trackId"]
+            print(
+                f"[ARK WEBHOOK] Received — trackId: {track_id}, state: {compact['state']}, "
+                f"people: {compact['people']}, verified emails: {len(compact['leads'])}, "
+                f"stats: {compact['statistics']} "
+                f"({size} bytes{' gzip' if gzipped else ''}, parsed in {(parsed - started) * 1000:.0f}ms)",
+                flush=True,
+            )
+            if not track_id:
+                continue
+            try:
+                signaled = self.bridge.deliver(track_id, compact, size=compact_size)
+            except Exception:
+                with self._lock:
+                    self._errors += 1
+                print(f"[ARK WEBHOOK] Could not store trackId {track_id}:\n{traceback.format_exc()}", flush=True)
+                continue
+            if signaled:
+                print(f"[ARK WEBHOOK] Signaled pipeline for trackId: {track_id}", flush=True)
+            else:
+                # Buffer result — pipeline may not have registered yet, or waits in another worker
+                print(
+                    f"[ARK WEBHOOK] Buffered result for trackId: {track_id} "
+                    f"(no pipeline waiting in this process yet)",
+                    flush=True,
+                )
+
+    def stats(self) -> dict:
+        """Ack / queue / parse latency (ms), payload sizes (bytes) and error counts."""
+        with self._lock:
+            return {
+                "received": self._raw.count,
+                "parsed": self._parse.count,
+                "queued": self._queue.qsize(),
+                "errors": self._errors,
+                "gzipped": self._gzipped,
+                "ack_ms": self._ack.as_dict(1000, 2),
+                "queue_wait_ms": self._wait.as_dict(1000),
+                "parse_ms": self._parse.as_dict(1000),
+                "raw_bytes": self._raw.as_dict(digits=0),
+                "decoded_bytes": self._decoded.as_dict(digits=0),
+                "compact_bytes": self._compact.as_dict(digits=0),
+            }
@@ -0,0 +1,732 @@
+"""
+async_pipeline.py
+asyncio engine for the pipeline — selected with PIPELINE_ENGINE=asyncio.
+
+The threaded engine parks one OS thread per run in time.sleep / Event.wait
+for most of its life (PhantomBuster polls, the Ark AI webhook wait). Here
+every run is a coroutine on one event loop, so dozens of posts can be in
+flight next to the web workers:
+  - vendor calls go through http_client.AsyncVendorClient (httpx), paced by
+    the same rate governors as the threaded clients;
+  - the Ark AI wait sleeps on an asyncio.Event that the webhook bridge sets
+    from its own thread;
+  - stage caps (scheduler.STAGE_CAPS) are asyncio semaphores.
+
+Every decision is pipeline.py's — payloads, outcome classification, poll
+and resend schedules (_PollSchedule, _ArkWait), batch bookkeeping
+(_ArkExports, _ArkBatchedWait), the Bouncify / Instantly planners and the
+checkpoint state machine (_RunProgress). This module is only the transport
+that drives them: awaited requests, sleeps and gathers. Local blocking work
+(SQLite caches, ledger and checkpoints, the enrichment log, the streamed
+PhantomBuster result CSVs) runs in asyncio.to_thread. Phased mode only:
+AsyncPipelineRunner refuses to start with PIPELINE_STREAMING set.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import aclosing
+
+import ark_batcher
+import http_client
+import pipeline
+import rate_governor
+import scheduler
+from leads import Lead
+
+PIPELINE_ASYNC_MAX_RUNS = int(os.environ.get("PIPELINE_ASYNC_MAX_RUNS", 50))
+
+_log = pipeline._log
+_runs = pipeline._runs
+
+
+def _client(sync_client: http_client.VendorClient) -> http_client.AsyncVendorClient:
+    """The asyncio client for the same vendor as one of pipeline.py's clients."""
+    return http_client.async_vendor(sync_client.name)
+
+
+class _Stage:
+    """asyncio version of a scheduler stage slot: at most `cap` runs inside, FIFO."""
+
+    def __init__(self, name: str, cap: int):
+        self.name = name
+        self.cap = cap
+        self.in_use = 0
+        self.waiting = 0
+        self._sem = asyncio.Semaphore(cap)
+
+    async def __aenter__(self):
+        if self.in_use >= self.cap:
+            _log(f"Waiting for a free {self.name} slot ({self.in_use}/{self.cap} in use)")
+        self.waiting += 1
+        try:
+            await self._sem.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_use += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        self.in_use -= 1
+        self._sem.release()
+
+
+_stages = {name: _Stage(name, cap) for name, cap in scheduler.STAGE_CAPS.items()}
+
+
+class _AsyncWake:
+    """
+    The Event handed to the Ark bridge: set() may be called from any thread
+    and wakes the coroutine waiting on this loop.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+
+    def set(self):
+        try:
+            self._loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:
+            pass   # loop already closed — nobody is waiting
+
+    def clear(self):
+        self._event.clear()
+
+    async def wait(self, timeout: float):
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+# ---------------------------------------------------------------------------
+# Slack
+# ---------------------------------------------------------------------------
+
+async def _send_slack_message(text: str):
+    # No automatic retry — a repeated post shows up twice in the channel
+    resp = await _client(pipeline._slack_http).post(
+        "/chat.postMessage",
+        json={"channel": "#linkedin-scraper", "text": text},
+        retries=0,
+    )
+    pipeline._slack_sent(resp)
+
+
+async def _send_error(step: str, error: str, post_url: str):
+    msg = pipeline._error_message(step, error, post_url)
+    _log(msg)
+    await _send_slack_message(msg)
+
+
+# ---------------------------------------------------------------------------
+# PhantomBuster
+# ---------------------------------------------------------------------------
+
+async def _phantombuster_agent(phantom_id: str) -> dict:
+    cached = pipeline._phantombuster_cached_agent(phantom_id)
+    if cached is not None:
+        return cached
+
+    resp = await _client(pipeline._pb_http).get("/agents/fetch", params={"id": phantom_id})
+    resp.raise_for_status()
+    return pipeline._phantombuster_cache_agent(phantom_id, resp.json())
+
+
+async def _phantombuster_launch_one(phantom_id: str, label: str, post_url: str) -> str:
+    for attempt in (1, 2):
+        saved_arg = (await _phantombuster_agent(phantom_id))["argument"]
+
+        _log(f"Launching {label} phantom ({phantom_id}) for {post_url}")
+
+        # No automatic retry — a repeated launch would start a second run
+        resp = await _client(pipeline._pb_http).post(
+            "/agents/launch",
+            json=pipeline._phantombuster_launch_payload(phantom_id, saved_arg, post_url),
+            retries=0,
+        )
+        if not pipeline._phantombuster_launch_retry(phantom_id, label, resp, attempt):
+            break
+    return pipeline._phantombuster_container_id(label, resp)
+
+
+async def _phantombuster_launch(post_url: str) -> dict:
+    async def launch(label):
+        container_id = await _phantombuster_launch_one(pipeline.PHANTOMS[label], label.capitalize(), post_url)
+        return pipeline._phantombuster_container(label, container_id)
+
+    launched = await asyncio.gather(*(launch(label) for label in pipeline.PHANTOMS))
+    return dict(zip(pipeline.PHANTOMS, launched))
+
+
+async def _phantombuster_fetch_output(phantom_id: str) -> dict:
+    resp = await _client(pipeline._pb_http).get("/agents/fetch-output", params={"id": phantom_id})
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def _phantombuster_poll(containers: dict) -> dict:
+    """pipeline._phantombuster_poll, checking every pending phantom concurrently."""
+    pending = dict(containers)
+    results = {}
+    schedule = pipeline._phantombuster_poll_schedule()
+
+    while pending:
+        await asyncio.sleep(pipeline._phantombuster_next_poll(schedule, pending))
+        elapsed = schedule.elapsed()
+
+        checking = list(pending.items())
+        outputs = await asyncio.gather(*(_phantombuster_fetch_output(info["phantom_id"]) for _, info in checking))
+        for (label, info), data in zip(checking, outputs):
+            if pipeline._phantombuster_finished(label, info, data, elapsed):
+                del pending[label]
+                results[label] = data
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Ark AI
+# ---------------------------------------------------------------------------
+
+async def _ark_launch_batch(batch_urls: list[str], batch_num: int, total_batches: int | None,
+                            webhook_url: str, wake: _AsyncWake) -> str:
+    of_total = f"/{total_batches}" if total_batches else ""
+    _log(f"Launching batch {batch_num}{of_total} ({len(batch_urls)} URLs)...")
+
+    # No automatic retry — a repeated export would be charged twice
+    resp = await _client(pipeline._ark_http).post(
+        "/people/export", json=pipeline._ark_export_payload(batch_urls, webhook_url), timeout=60, retries=0
+    )
+    track_id = pipeline._ark_export_accepted(resp, batch_num)
+    await asyncio.to_thread(pipeline._ark_register, track_id, batch_num, wake)
+    return track_id
+
+
+async def _ark_poll_statistics(pending: dict, elapsed: int) -> dict:
+    """One progress sweep over every outstanding batch at once. Returns trackId -> state."""
+
+    async def poll(track_id, batch_num):
+        try:
+            resp = await _client(pipeline._ark_http).get(f"/people/statistics/{track_id}", timeout=15)
+            if pipeline._http_ok(resp):
+                return track_id, pipeline._ark_progress_state(batch_num, resp.json(), elapsed)
+        except Exception as exc:
+            _log(f"Statistics poll error (non-fatal): {exc}")
+        return track_id, None
+
+    answered = await asyncio.gather(*(poll(track_id, batch_num) for track_id, batch_num in pending.items()))
+    return {track_id: state for track_id, state in answered if state is not None}
+
+
+async def _ark_request_resend(track_id: str, batch_num: int, webhook_url: str):
+    _log(f"Batch {batch_num} webhook not received — requesting resend...")
+    try:
+        resp = await _client(pipeline._ark_http).patch(
+            "/people/notify", json={"trackId": track_id, "webhook": webhook_url}
+        )
+        _log(f"Resend response: HTTP {resp.status_code} — {resp.text}")
+    except Exception as exc:
+        _log(f"Resend request failed: {exc}")
+
+
+async def _ark_iter_results(pending: dict, wake: _AsyncWake, webhook_url: str, deadline: float):
+    """
+    pipeline._ark_iter_results on the event loop: yields (batch_num, leads)
+    as each webhook lands, driving the same pipeline._ArkWait.
+    """
+    waiting = pipeline._ArkWait(pending, deadline)
+
+    try:
+        while pending:
+            # Clear before checking so a webhook landing after this point re-sets it
+            wake.clear()
+            arrived = await asyncio.to_thread(pipeline._ark_bridge.take, list(pending))
+
+            for track_id, webhook_data in arrived.items():
+                batch_num = waiting.landed(track_id)
+                batch_leads = pipeline._parse_ark_results(webhook_data)
+                _log(f"Batch {batch_num} returned {len(batch_leads)} enriched leads")
+                yield batch_num, batch_leads
+
+            if not pending:
+                break
+
+            now = time.time()
+            waiting.check_deadline(now)
+            running = waiting.sweep_due(now)
+            if running is not None:
+                waiting.swept(running, await _ark_poll_statistics(running, int(now - waiting.start)), now)
+            for track_id, batch_num in waiting.resends_due(now).items():
+                await _ark_request_resend(track_id, batch_num, webhook_url)
+
+            await wake.wait(waiting.wake_in())
+    finally:
+        pipeline._ark_unregister(pending)
+
+
+async def _ark_enrich_batch(linkedin_urls: list[str], webhook_base_url: str,
+                            outstanding: dict | None = None, on_pending=None, on_batch=None) -> list[Lead]:
+    """
+    pipeline._ark_enrich_batch on the event loop. `on_pending` and
+    `on_batch` are the same (blocking) callbacks; they run in a thread.
+    """
+    webhook_url = f"{webhook_base_url}/webhook/ark"
+    exports = pipeline._ArkExports(linkedin_urls, dict(outstanding or {}), webhook_url)
+    deadline = time.time() + pipeline.ARK_ENRICH_TIMEOUT
+    wake = _AsyncWake()
+
+    for track_id, batch_num in exports.pending.items():
+        await asyncio.to_thread(pipeline._ark_register, track_id, batch_num, wake)
+    try:
+        for batch_num, urls in exports.to_launch():
+            track_id = await _ark_launch_batch(urls, batch_num, exports.total, webhook_url, wake)
+            pending_urls = exports.launched(track_id, batch_num, urls)
+            if on_pending:
+                await asyncio.to_thread(on_pending, pending_urls)
+    except BaseException:
+        pipeline._ark_unregister(exports.pending)
+        raise
+
+    exports.waiting()
+    async with aclosing(_ark_iter_results(exports.pending, wake, webhook_url, deadline)) as arrivals:
+        async for batch_num, batch_leads in arrivals:
+            urls = exports.landed(batch_num, batch_leads)
+            if on_batch:
+                await asyncio.to_thread(on_batch, urls, batch_leads)
+            if on_pending:
+                await asyncio.to_thread(on_pending, dict(exports.batch_urls))
+    return exports.done()
+
+
+async def _ark_enrich_shared(shared: dict, webhook_base_url: str) -> list[Lead]:
+    """pipeline._ark_enrich_shared on the event loop."""
+    _log(f"Waiting on {len(shared)} profile(s) another run is enriching...")
+    results, redo = await pipeline._ark_flights.collect_async(shared, pipeline.ARK_ENRICH_TIMEOUT)
+    leads = pipeline._ark_shared_leads(results)
+    if redo:
+        _log(f"Single-flight: {len(redo)} shared profile(s) not enriched by the other run — sending them ourselves")
+        if ark_batcher.ARK_BATCH_LINGER > 0:
+            leads.extend(await _ark_enrich_batched(redo, on_batch=pipeline._enrichment_cache_store))
+        else:
+            async with _stages["ark"]:
+                leads.extend(await _ark_enrich_batch(redo, webhook_base_url, on_batch=pipeline._enrichment_cache_store))
+    return leads
+
+
+async def _ark_export_packed(urls: list[str], on_launch, track_id: str | None = None) -> list[Lead]:
+    """pipeline._ark_export_packed on the event loop (on_launch runs in a thread)."""
+    if track_id:
+        return await _ark_enrich_batch([], pipeline._webhook_base_url(), {track_id: urls})
+    return await _ark_enrich_batch(urls, pipeline._webhook_base_url(), on_pending=pipeline._ark_first_launch(on_launch))
+
+
+_ark_batcher = None   # ArkBatcher sending on the runner's loop, created on first use
+
+
+def _batcher() -> ark_batcher.ArkBatcher:
+    """The asyncio engine's ArkBatcher; its exports run as coroutines on the current loop."""
+    global _ark_batcher
+    if _ark_batcher is None:
+        loop = asyncio.get_running_loop()
+
+        def send(urls, on_launch, track_id=None):
+            return asyncio.run_coroutine_threadsafe(_ark_export_packed(urls, on_launch, track_id), loop)
+
+        _ark_batcher = ark_batcher.ArkBatcher(
+            "asyncio", send, pipeline._ark_outcomes, pipeline.ARK_BATCH_SIZE, _stages["ark"].cap
+        )
+    return _ark_batcher
+
+
+async def _ark_enrich_batched(linkedin_urls: list[str], outstanding: dict | None = None,
+                              on_pending=None, on_batch=None) -> list[Lead]:
+    """
+    pipeline._ark_enrich_batched on the event loop. `on_pending` and
+    `on_batch` are the same (blocking) callbacks; they run in a thread.
+    """
+    outstanding = dict(outstanding or {})
+    batched = pipeline._ArkBatchedWait(linkedin_urls, outstanding, on_pending)
+    batcher = _batcher()
+    futures = batcher.attach(outstanding)
+    futures.update(batcher.submit(linkedin_urls, batched.launched))
+    waiting = {asyncio.wrap_future(future): url for url, future in futures.items()}
+
+    try:
+        while waiting:
+            landed, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            outcomes = {waiting.pop(future): future.result() for future in landed}
+            batch_leads = batched.landed(outcomes)
+            if on_batch:
+                await asyncio.to_thread(on_batch, list(outcomes), batch_leads)
+            await asyncio.to_thread(batched.settled, outcomes)
+    finally:
+        # Unsent URLs are dropped from the queue; exports already out still land for the other runs in them
+        for future in waiting:
+            future.cancel()
+    return batched.done()
+
+
+# ---------------------------------------------------------------------------
+# Bouncify
+# ---------------------------------------------------------------------------
+
+async def _bouncify_check_email(email: str) -> tuple[str, dict] | None:
+    try:
+        resp = await _client(pipeline._bouncify_http).get("/verify", params={"email": email})
+        return pipeline._bouncify_checked_email(email, resp)
+    except Exception as exc:
+        _log(f"Bouncify exception for {email}: {exc} — keeping lead")
+        return None
+
+
+async def _bouncify_bulk_verify(emails: list[str]) -> dict:
+    bouncify = _client(pipeline._bouncify_http)
+    # No automatic retry — a repeated upload would start (and bill) a second job
+    resp = await bouncify.post("/bulk", json=pipeline._bouncify_bulk_payload(emails), timeout=60, retries=0)
+    job_id = pipeline._bouncify_bulk_job_id(resp, len(emails))
+
+    schedule = pipeline._bouncify_bulk_schedule()
+    while True:
+        await asyncio.sleep(pipeline._bouncify_bulk_next_poll(schedule, job_id))
+        status_resp = await bouncify.get(f"/bulk/{job_id}")
+        status_resp.raise_for_status()
+        if pipeline._bouncify_bulk_done(job_id, status_resp.json(), schedule.start):
+            break
+
+    download = await bouncify.post(
+        "/download", params={"jobId": job_id}, json=pipeline._bouncify_download_payload(), timeout=60,
+    )
+    download.raise_for_status()
+    return pipeline._bouncify_parse_download(job_id, download.content)
+
+
+async def _bouncify_verify_batch(leads: list[Lead]) -> tuple[list[Lead], int]:
+    """
+    pipeline._bouncify_verify_batch on the event loop; single-email checks
+    go out concurrently, as fast as the Bouncify governor allows.
+    """
+    if not pipeline._bouncify_enabled():
+        return leads, 0
+
+    verdicts, to_check, led, shared = await asyncio.to_thread(pipeline._bouncify_plan, leads)
+    try:
+        if len(to_check) >= pipeline.BOUNCIFY_BULK_MIN:
+            try:
+                results = await _bouncify_bulk_verify([lead.email for lead in to_check])
+            except Exception as exc:
+                _log(f"Bouncify bulk verification failed ({exc}) — falling back to single-email checks")
+            else:
+                await asyncio.to_thread(pipeline._bouncify_bulk_settled, results, verdicts, led)
+                to_check = []
+
+        if to_check:
+            _log(f"Bouncify: checking {len(to_check)} emails one by one")
+            await _bouncify_check_emails([lead.email for lead in to_check], verdicts, led)
+    finally:
+        pipeline._bouncify_flights.abandon(led)
+
+    if shared:
+        collected = await pipeline._bouncify_flights.collect_async(shared, pipeline.BOUNCIFY_SHARED_TIMEOUT)
+        await _bouncify_check_emails(pipeline._bouncify_shared_settled(collected, verdicts), verdicts)
+
+    return pipeline._bouncify_split(leads, verdicts)
+
+
+async def _bouncify_check_emails(emails: list[str], verdicts: dict, led: dict | None = None):
+    """Single-email checks for `emails`, concurrently, settled into `verdicts` (and `led` flights)."""
+    checked = await asyncio.gather(*(_bouncify_check_email(email) for email in emails))
+    await asyncio.to_thread(pipeline._bouncify_settled, dict(zip(emails, checked)), verdicts, led)
+
+
+# ---------------------------------------------------------------------------
+# Instantly
+# ---------------------------------------------------------------------------
+
+async def _instantly_add_lead(lead: Lead, source_post_url: str) -> str:
+    try:
+        # No automatic retry — a timed-out add may have landed; the caller counts it as an error
+        resp = await _client(pipeline._instantly_http).post(
+            "/leads", json=pipeline._instantly_lead_payload(lead, source_post_url), retries=0
+        )
+    except Exception as exc:
+        _log(f"Instantly request failed for {lead.email}: {exc}")
+        return "error"
+    return pipeline._instantly_add_outcome(lead, resp.status_code, resp.text)
+
+
+async def _instantly_add_leads_bulk(leads: list[Lead], source_post_url: str) -> dict:
+    try:
+        # No automatic retry — on failure the chunk goes lead by lead instead
+        resp = await _client(pipeline._instantly_http).post(
+            "/leads/add",
+            json=pipeline._instantly_bulk_payload(leads, source_post_url),
+            timeout=60,
+            retries=0,
+        )
+    except Exception as exc:
+        _log(f"Instantly bulk request failed ({exc}) — retrying {len(leads)} leads one by one")
+        resp = None
+    results, retry = pipeline._instantly_bulk_read(leads, resp)
+
+    for lead in retry:
+        results[lead.email.lower()] = await _instantly_add_lead(lead, source_post_url)
+    return results
+
+
+_ledger_seed_lock = None   # asyncio.Lock, created on the loop
+
+
+async def _instantly_ledger_ready() -> bool:
+    """pipeline._instantly_ledger_ready, paging the campaign over the async client."""
+    global _ledger_seed_lock
+    if not pipeline.INSTANTLY_LEDGER:
+        return False
+    ledger = pipeline._campaign_ledger
+    if await asyncio.to_thread(ledger.last_sync):
+        return True
+    if _ledger_seed_lock is None:
+        _ledger_seed_lock = asyncio.Lock()
+    try:
+        async with _ledger_seed_lock:
+            # Another run may have seeded it while we waited
+            if await asyncio.to_thread(ledger.last_sync):
+                return True
+            emails = []
+            cursor = None
+            while True:
+                resp = await _client(pipeline._instantly_http).post(
+                    "/leads/list", json=pipeline._instantly_list_payload(cursor), timeout=60
+                )
+                resp.raise_for_status()
+                cursor = pipeline._instantly_list_page(resp.json(), emails)
+                if not cursor:
+                    break
+            await asyncio.to_thread(ledger.replace_all, emails)
+        _log(f"Instantly ledger seeded: {len(emails)} leads in campaign")
+        return True
+    except Exception as exc:
+        # Not fatal — every lead just goes to Instantly, which dedupes anyway
+        _log(f"Instantly ledger seeding failed ({exc}) — pushing without it")
+        return False
+
+
+async def _instantly_push(leads: list[Lead], source_post_url: str, on_chunk=None) -> tuple[int, int, int]:
+    """pipeline._instantly_push on the event loop (`on_chunk` runs in a thread)."""
+    counts = Counter()
+    use_ledger = await _instantly_ledger_ready()
+    ours, led, shared, shared_leads = await asyncio.to_thread(
+        pipeline._instantly_plan, leads, counts, use_ledger, on_chunk
+    )
+    try:
+        await _instantly_push_chunks(ours, source_post_url, counts, use_ledger, on_chunk, led)
+    finally:
+        pipeline._instantly_flights.abandon(led)
+
+    if shared_leads:
+        results, _ = await pipeline._instantly_flights.collect_async(shared, pipeline.INSTANTLY_SHARED_TIMEOUT)
+        retry = await asyncio.to_thread(
+            pipeline._instantly_settle_shared, shared_leads, results, counts, use_ledger, on_chunk
+        )
+        await _instantly_push_chunks(retry, source_post_url, counts, use_ledger, on_chunk)
+
+    return counts["added"], counts["duplicate"], counts["error"]
+
+
+async def _instantly_push_chunks(leads: list[Lead], source_post_url: str, counts: Counter,
+                                 use_ledger: bool, on_chunk=None, led: dict | None = None):
+    for chunk in pipeline._instantly_chunks(leads):
+        try:
+            if len(chunk) == 1:
+                results = {chunk[0].email.lower(): await _instantly_add_lead(chunk[0], source_post_url)}
+            else:
+                results = await _instantly_add_leads_bulk(chunk, source_post_url)
+        except Exception as exc:
+            _log(f"Instantly exception for chunk starting {chunk[0].email}: {exc}")
+            results = {}
+        await asyncio.to_thread(
+            pipeline._instantly_chunk_settled, chunk, results, counts, use_ledger, on_chunk, led
+        )
+
+
+# ---------------------------------------------------------------------------
+# Orchestrator
+# ---------------------------------------------------------------------------
+
+async def run_pipeline(post_url: str, run_id: str | None = None):
+    """pipeline.run_pipeline as a coroutine, with the same checkpoints."""
+    if run_id is None:
+        run_id = await asyncio.to_thread(_runs.create, post_url)
+    ok = False
+    try:
+        ok = await _run_pipeline(post_url, run_id)
+    finally:
+        await asyncio.to_thread(_runs.finish, run_id, "done" if ok else "failed")
+
+
+async def _run_pipeline(post_url: str, run_id: str) -> bool:
+    """
+    pipeline._run_pipeline over this engine's transport: the same
+    pipeline._RunProgress decides what a resumed run skips and what each
+    step saves. Returns False if the run failed (already reported).
+    """
+    progress = await asyncio.to_thread(pipeline._RunProgress, run_id, post_url)
+    error = await asyncio.to_thread(progress.begin)
+    if error:
+        await _send_error("RESUME", error, post_url)
+        return False
+    await _send_slack_message(progress.start_message())
+
+    # ---- Step 2: PhantomBuster (likers + commenters in parallel) ----
+    if progress.before("scraped"):
+        # Each phantom runs one container at a time — hold the slot until both finish
+        async with _stages["phantombuster"]:
+            if progress.before("launched"):
+                try:
+                    containers = await _phantombuster_launch(post_url)
+                except Exception as exc:
+                    await _send_error("PHANTOMBUSTER LAUNCH", str(exc), post_url)
+                    return False
+                await asyncio.to_thread(progress.launched, containers)
+            else:
+                containers = progress.relaunched()
+
+            poll_start = time.time()
+            try:
+                pb_data = await _phantombuster_poll(containers)
+            except Exception as exc:
+                await _send_error("PHANTOMBUSTER POLL", str(exc), post_url)
+                return False
+
+        pb_timing = pipeline._phantombuster_timing(containers, time.time() - poll_start)
+        screened = [] if pipeline.PB_TITLE_PRESCREEN else None
+        try:
+            profile_urls = await asyncio.to_thread(
+                pipeline._phantombuster_parse_results, pb_data, containers, screened
+            )
+        except Exception as exc:
+            await _send_error("PHANTOMBUSTER PARSE", str(exc), post_url)
+            return False
+        error = await asyncio.to_thread(progress.scraped, profile_urls, screened, pb_timing)
+        if error:
+            await _send_error("PHANTOMBUSTER PARSE", error, post_url)
+            return False
+    else:
+        progress.restore_scraped()
+
+    # ---- Step 3: Ark AI batch enrichment (cache first) ----
+    if progress.before("verified"):
+        cached_leads, to_launch, outstanding, ark_shared = await asyncio.to_thread(progress.enrichment_plan)
+        enriched_leads = list(cached_leads)
+        try:
+            if to_launch or outstanding:
+                if ark_batcher.ARK_BATCH_LINGER > 0:
+                    enriched_leads.extend(await _ark_enrich_batched(
+                        to_launch, outstanding, on_pending=progress.ark_pending, on_batch=progress.ark_landed,
+                    ))
+                else:
+                    async with _stages["ark"]:
+                        enriched_leads.extend(await _ark_enrich_batch(
+                            to_launch, pipeline._webhook_base_url(), outstanding,
+                            on_pending=progress.ark_pending, on_batch=progress.ark_landed,
+                        ))
+                progress.ark_abandon()
+            if ark_shared:
+                enriched_leads.extend(await _ark_enrich_shared(ark_shared, pipeline._webhook_base_url()))
+        except Exception as exc:
+            await _send_error("ARK AI ENRICHMENT", str(exc), post_url)
+            return False
+        finally:
+            progress.ark_abandon()
+        enriched_leads = await asyncio.to_thread(progress.enriched, enriched_leads)
+
+        # ---- Step 4: Title filter ----
+        try:
+            kept_leads, dropped_count = pipeline._title_filter(enriched_leads)
+        except Exception as exc:
+            await _send_error("TITLE FILTER", str(exc), post_url)
+            return False
+
+        # ---- Step 4B: Bouncify email validation ----
+        try:
+            verified_leads, bouncify_rejected = await _bouncify_verify_batch(kept_leads)
+        except Exception as exc:
+            await _send_error("BOUNCIFY VALIDATION", str(exc), post_url)
+            return False
+        await asyncio.to_thread(progress.verified, verified_leads, len(kept_leads), dropped_count, bouncify_rejected)
+    else:
+        verified_leads = progress.restore_verified()
+
+    # ---- Step 5: Instantly push ----
+    await _instantly_push(progress.to_push(verified_leads), post_url, on_chunk=progress.pushed_chunk)
+
+    # ---- Step 6: Slack summary ----
+    summary = pipeline._format_summary(post_url, progress.start, progress.summary())
+    _log(summary)
+    _log(f"HTTP clients: {http_client.stats()}")
+    _log(f"Rate governors: {rate_governor.stats()}")
+    await _send_slack_message(summary)
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+class AsyncPipelineRunner(scheduler.JobScheduler):
+    """
+    JobScheduler whose runs are coroutines on one event loop (on its own
+    daemon thread) instead of one worker thread each; up to `max_runs` run
+    at once. Queueing, fairness, dedupe, history and shutdown are
+    JobScheduler's. `run` is a coroutine function (post_url, run_id).
+    Raises ValueError if PIPELINE_STREAMING is set — this engine only runs
+    phased pipelines, and silently ignoring the flag would hide that.
+    """
+
+    def __init__(self, run=run_pipeline, max_runs: int = PIPELINE_ASYNC_MAX_RUNS,
+                 max_queue: int = scheduler.PIPELINE_QUEUE_DEPTH, persist=None):
+        if pipeline.PIPELINE_STREAMING:
+            raise ValueError("PIPELINE_STREAMING is not supported with PIPELINE_ENGINE=asyncio — unset one of them")
+        super().__init__(run, workers=max_runs, max_queue=max_queue, persist=persist)
+        self._loop = None
+        self._free = threading.Semaphore(max_runs)
+
+    def _start_workers(self):
+        if self._loop is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        for target, name in ((self._loop.run_forever, "pipeline-loop"), (self._dispatch, "pipeline-dispatch")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _dispatch(self):
+        """Hand queued jobs to the loop whenever fewer than `workers` are running."""
+        while True:
+            self._free.acquire()
+            job = self._next_job()
+            _log(f"Job {job.id} started after {job.started_at - job.submitted_at:.0f}s in queue")
+            asyncio.run_coroutine_threadsafe(self._run_job(job), self._loop)
+
+    async def _run_job(self, job: scheduler.Job):
+        try:
+            await self.run(job.post_url, job.run_id)
+            job.status = "done"
+        except Exception:
+            job.status = "failed"
+            _log(f"Job {job.id} crashed:\n{traceback.format_exc()}")
+        finally:
+            self._finish(job)
+            self._free.release()
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["engine"] = "asyncio"
+        stats["stages"] = {
+            name: {"cap": stage.cap, "in_use": stage.in_use, "waiting": stage.waiting}
+            for name, stage in _stages.items()
+        }
+        return stats
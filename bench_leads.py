@@ -0,0 +1,122 @@
+"""
+bench_leads.py
+Benchmark — memory held by the pipeline's leads as slotted Lead records vs
+the plain dicts (plus the enrichment-log row copies) they replaced.
+
+Usage:
+    python bench_leads.py             # 50,000 leads
+    python bench_leads.py 200000      # custom count
+
+Field strings are built before measuring and shared by both layouts, so the
+numbers are the per-lead container overhead a backfill pays on top of its
+data. Also times the three serializations (enrichment log CSV, checkpoint
+JSON, Instantly payload) both ways.
+"""
+
+import csv
+import io
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from leads import LOG_FIELDS, Lead
+
+_FIRST = ["Ada", "Grace", "Alan", "Linus", "Margaret", "Dennis", "Barbara", "Ken", "Radia", "John"]
+_LAST = ["Lovelace", "Hopper", "Turing", "Torvalds", "Hamilton", "Ritchie", "Liskov", "Thompson"]
+_TITLES = ["Founder & CEO", "VP of Sales", "Head of Growth", "Chief Revenue Officer", "Account Executive"]
+_COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises"]
+
+
+def synthetic_fields(count: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        first, last = rng.choice(_FIRST), rng.choice(_LAST)
+        rows.append({
+            "first_name": first,
+            "last_name": last,
+            "email": f"{first.lower()}.{last.lower()}{i}@example.com",
+            "company": rng.choice(_COMPANIES),
+            "title": rng.choice(_TITLES),
+            "linkedin_url": f"https://www.linkedin.com/in/{first.lower()}-{last.lower()}-{i}",
+        })
+    return rows
+
+
+def legacy_leads(fields: list[dict]) -> tuple[list[dict], list[dict]]:
+    """Leads as they were: one dict each, plus the log_rows copy run_pipeline built."""
+    leads = [dict(row, title_rule="keep:ceo") for row in fields]
+    log_rows = [{
+        "linkedin_url": lead["linkedin_url"],
+        "first_name": lead["first_name"],
+        "last_name": lead["last_name"],
+        "email": lead["email"],
+        "company": lead["company"],
+        "status": "enriched",
+    } for lead in leads]
+    return leads, log_rows
+
+
+def slotted_leads(fields: list[dict]) -> list[Lead]:
+    return [Lead(**row, title_rule="keep:ceo") for row in fields]
+
+
+def _measure(build, *args) -> tuple[int, object]:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(*args)
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return held, result
+
+
+def _time(fn) -> float:
+    begin = time.perf_counter()
+    fn()
+    return time.perf_counter() - begin
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    fields = synthetic_fields(count)
+    print(f"{count:,} leads")
+
+    legacy_bytes, (legacy, log_rows) = _measure(legacy_leads, fields)
+    leads_only = sum(sys.getsizeof(lead) for lead in legacy)
+    slotted_bytes, slotted = _measure(slotted_leads, fields)
+
+    mb = 1024 * 1024
+    print(f"dict leads + log_rows copy : {legacy_bytes / mb:7.1f} MB  "
+          f"({legacy_bytes / count:.0f} B/lead; dicts alone {leads_only / mb:.1f} MB)")
+    print(f"slotted Lead records       : {slotted_bytes / mb:7.1f} MB  "
+          f"({slotted_bytes / count:.0f} B/lead)  {legacy_bytes / slotted_bytes:.1f}x less")
+
+    post = "https://www.linkedin.com/posts/someone_topic-activity-1"
+
+    def legacy_csv():
+        writer = csv.DictWriter(io.StringIO(), fieldnames=list(LOG_FIELDS))
+        writer.writerows(log_rows)
+
+    def slotted_csv():
+        csv.writer(io.StringIO()).writerows(lead.log_row() for lead in slotted)
+
+    def legacy_payload():
+        for lead in legacy:
+            {"email": lead["email"], "first_name": lead.get("first_name", ""),
+             "last_name": lead.get("last_name", ""), "company_name": lead.get("company", ""),
+             "custom_variables": {"linkedin_url": lead.get("linkedin_url", ""), "source_post_url": post}}
+
+    print("serialization               dicts      Lead")
+    for label, old, new in [
+        ("enrichment log CSV", legacy_csv, slotted_csv),
+        ("checkpoint JSON", lambda: json.dumps(legacy), lambda: json.dumps([lead.as_dict() for lead in slotted])),
+        ("Instantly payloads", legacy_payload, lambda: [lead.instantly_payload(post) for lead in slotted]),
+    ]:
+        print(f"  {label:<24}{_time(old) * 1000:7.1f} ms {_time(new) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
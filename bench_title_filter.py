@@ -0,0 +1,120 @@
+"""
+bench_title_filter.py
+Benchmark — compiled title matcher vs the original per-keyword substring scans.
+
+Usage:
+    python bench_title_filter.py             # 100,000 synthetic titles
+    python bench_title_filter.py 500000      # custom count
+
+Titles are drawn from a few thousand distinct strings (as in real scrapes,
+where the same titles repeat a lot), so the memo is exercised as well as the
+regex. Also reports how many decisions differ: those are the substring false
+positives the old scans made ("ae" in "Michael", "intern" in "international").
+Exits non-zero if any of MUST_AGREE is decided differently from the old scans.
+"""
+
+import random
+import sys
+import time
+from collections import Counter
+
+import title_filter
+from leads import Lead
+from title_filter import DROP_KEYWORDS, KEEP_KEYWORDS, filter_leads
+
+
+def legacy_filter_leads(leads: list[dict]) -> tuple[list[dict], int]:
+    """filter_leads as it was before the compiled matcher."""
+    kept = []
+    dropped = 0
+    for lead in leads:
+        title = (lead.get("title") or "").strip().lower()
+        if not title:
+            kept.append(lead)
+            continue
+        if any(kw in title for kw in DROP_KEYWORDS):
+            dropped += 1
+            continue
+        if any(kw in title for kw in KEEP_KEYWORDS):
+            kept.append(lead)
+            continue
+        dropped += 1
+    return kept, dropped
+
+
+_SENIORITY = ["", "Senior ", "Sr. ", "Lead ", "Principal ", "Junior ", "Global ", "Regional "]
+_ROLES = [
+    "Founder", "Co-Founder & CEO", "CEO", "CRO", "Chief Revenue Officer", "Head of Sales",
+    "VP of Sales", "Director of Growth", "Account Executive", "AE", "Demand Gen Manager",
+    "GTM Lead", "Business Owner", "Software Engineer", "Product Manager", "Data Scientist",
+    "Marketing Coordinator", "Executive Assistant", "Sales Intern", "Student",
+    "Freelance Designer", "Recruiter", "Customer Success Manager", "Operations Manager",
+    "International Partnerships Manager", "Microsoft Solutions Architect", "Aerospace Engineer",
+    "Open to work", "Looking for new opportunities", "",
+]
+_SUFFIXES = ["", " at Acme", " @ Globex", " | SaaS", " - EMEA", ", Revenue Team", " (Remote)"]
+
+# Real titles the whole-word matcher must decide exactly as the old substring scans did
+MUST_AGREE = [
+    "Sales Leader", "Growth Leader | SaaS", "Sales Leadership", "Head of Sales", "Founder & CEO",
+    "Account Executives", "Sales Intern", "Open to work",
+]
+
+
+def synthetic_titles(count: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    distinct = [
+        f"{rng.choice(_SENIORITY)}{rng.choice(_ROLES)}{rng.choice(_SUFFIXES)}"
+        for _ in range(3000)
+    ]
+    return [rng.choice(distinct) for _ in range(count)]
+
+
+def _time(fn, leads) -> tuple[float, tuple]:
+    begin = time.perf_counter()
+    result = fn(leads)
+    return time.perf_counter() - begin, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    titles = synthetic_titles(count)
+    print(f"{count:,} titles, {len(set(titles)):,} distinct")
+
+    legacy_time, (legacy_kept, legacy_dropped) = _time(
+        legacy_filter_leads, [{"title": t} for t in titles])
+
+    title_filter.match_title.cache_clear()
+    title_filter._decide.cache_clear()
+    cold_time, (kept, dropped) = _time(filter_leads, [Lead(title=t) for t in titles])
+    warm_time, _ = _time(filter_leads, [Lead(title=t) for t in titles])
+
+    print(f"legacy substring scans : {legacy_time * 1000:8.1f} ms  "
+          f"({len(legacy_kept):,} kept, {legacy_dropped:,} dropped)")
+    print(f"compiled, cold memo    : {cold_time * 1000:8.1f} ms  "
+          f"({len(kept):,} kept, {dropped:,} dropped)  {legacy_time / cold_time:.1f}x")
+    print(f"compiled, warm memo    : {warm_time * 1000:8.1f} ms  {legacy_time / warm_time:.1f}x")
+    print(f"raw-title memo  : {title_filter.match_title.cache_info()}")
+    print(f"normalized memo : {title_filter._decide.cache_info()}")
+
+    changed = Counter()
+    for title in set(titles):
+        old_keep = bool(legacy_filter_leads([{"title": title}])[0])
+        decision = title_filter.match_title(title)
+        if old_keep != decision.keep:
+            changed[(title, old_keep, decision.rule)] += 1
+    print(f"distinct titles decided differently: {len(changed)}")
+    for (title, old_keep, rule), _ in changed.most_common(10):
+        print(f"  {title!r}: was {'keep' if old_keep else 'drop'}, now {rule}")
+
+    regressions = [
+        title for title in MUST_AGREE
+        if bool(legacy_filter_leads([{"title": title}])[0]) != title_filter.match_title(title).keep
+    ]
+    if regressions:
+        sys.exit(f"MUST_AGREE titles decided differently from the old scans: {regressions}")
+    print(f"all {len(MUST_AGREE)} MUST_AGREE titles decided as before")
+
+
+if __name__ == "__main__":
+    main()
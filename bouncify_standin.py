@@ -0,0 +1,181 @@
+"""
+bouncify_standin.py
+Local stand-in for the Bouncify API — exercises both validation paths in
+pipeline._bouncify_verify_batch without spending credits.
+
+Usage:
+    python bouncify_standin.py            # run single-email, bulk and bulk-fallback checks
+    python bouncify_standin.py --serve    # just run the stand-in server on port 8765
+
+The stand-in answers by address: "bad*" -> undeliverable, anything at
+catchall.com -> accept_all, "err*" -> HTTP 500 on the single-email endpoint,
+anything else -> deliverable (every call goes through http_client, so
+the 500s also exercise its retries). Bulk jobs take a couple of polls to complete;
+a list containing "failjob@" produces a failed job. The checks use a
+throwaway verdict cache, so they start cold every run.
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from leads import Lead
+
+PORT = 8765
+
+_jobs = {}   # job_id -> {"emails": [...], "polls": int, "fail": bool}
+_calls = {"verify": 0, "bulk": 0, "status": 0, "download": 0}
+
+
+def _verdict(email: str) -> str:
+    local, _, domain = email.lower().partition("@")
+    if domain == "catchall.com":
+        return "accept_all"
+    if local.startswith("bad"):
+        return "undeliverable"
+    return "deliverable"
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    def _send(self, status: int, body, content_type: str = "application/json"):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+
+        if parts.path == "/v1/verify":
+            _calls["verify"] += 1
+            email = query.get("email", [""])[0]
+            if email.lower().startswith("err"):
+                return self._send(500, {"error": "stand-in failure"})
+            result = _verdict(email)
+            return self._send(200, {
+                "email": email,
+                "result": result,
+                "accept_all": int(result == "accept_all"),
+                "disposable": 0,
+            })
+
+        if parts.path.startswith("/v1/bulk/"):
+            _calls["status"] += 1
+            job = _jobs.get(parts.path.rsplit("/", 1)[-1])
+            if not job:
+                return self._send(404, {"error": "unknown job"})
+            job["polls"] += 1
+            if job["fail"]:
+                status = "failed"
+            else:
+                status = "completed" if job["polls"] >= 2 else "verifying"
+            return self._send(200, {"status": status, "total": len(job["emails"])})
+
+        self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+
+        if parts.path == "/v1/bulk":
+            _calls["bulk"] += 1
+            emails = [entry["email"] for entry in self._body().get("emails", [])]
+            job_id = uuid.uuid4().hex
+            _jobs[job_id] = {
+                "emails": emails,
+                "polls": 0,
+                "fail": any(e.lower().startswith("failjob@") for e in emails),
+            }
+            return self._send(201, {"job_id": job_id, "success": True})
+
+        if parts.path == "/v1/download":
+            _calls["download"] += 1
+            job = _jobs.get(query.get("jobId", [""])[0])
+            if not job:
+                return self._send(404, {"error": "unknown job"})
+            out = io.StringIO()
+            writer = csv.writer(out)
+            writer.writerow(["Email", "Verification Result"])
+            # Drop one address to check that a missing result keeps the lead
+            for email in job["emails"][:-1]:
+                writer.writerow([email, _verdict(email)])
+            return self._send(200, out.getvalue().encode(), "text/csv")
+
+        self._send(404, {"error": "not found"})
+
+    def log_message(self, *args):
+        pass
+
+
+def _leads(emails: list[str]) -> list[Lead]:
+    return [Lead(email=email) for email in emails]
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", PORT), StandinHandler)
+    if "--serve" in sys.argv:
+        print(f"Bouncify stand-in listening on http://127.0.0.1:{PORT}/v1")
+        server.serve_forever()
+        return
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["BOUNCIFY_BASE"] = f"http://127.0.0.1:{PORT}/v1"
+    os.environ.setdefault("BOUNCIFY_API_KEY", "standin")
+    os.environ["CACHE_DB"] = os.path.join(tempfile.mkdtemp(), "standin_cache.db")
+
+    import http_client
+    import pipeline
+    http_client.HTTP_BACKOFF_BASE = 0.01
+    # The stand-in has no rate limit — don't pace it like the real API
+    pipeline._bouncify_http.governor.rate = pipeline._bouncify_http.governor.max_rate = 1000
+    pipeline._bouncify_http.governor.burst = 100
+    pipeline.BOUNCIFY_BULK_POLL_MIN = 0.1
+
+    small = ["a@x.com", "bad1@x.com", "risky1@catchall.com", "err1@x.com"]
+    valid, rejected = pipeline._bouncify_verify_batch(_leads(small))
+    print(f"Single-email path: {len(valid)} passed, {rejected} rejected, calls {_calls}")
+    assert (len(valid), rejected) == (2, 2) and _calls["bulk"] == 0
+
+    big = [f"user{i}@x.com" for i in range(pipeline.BOUNCIFY_BULK_MIN)] + ["bad2@x.com", "last@x.com"]
+    valid, rejected = pipeline._bouncify_verify_batch(_leads(big))
+    print(f"Bulk path: {len(valid)} passed, {rejected} rejected, calls {_calls}")
+    assert (len(valid), rejected) == (len(big) - 1, 1) and _calls["bulk"] == 1
+
+    failing = ["failjob@x.com"] + [f"fresh{i}@x.com" for i in range(pipeline.BOUNCIFY_BULK_MIN)]
+    verify_before = _calls["verify"]
+    valid, rejected = pipeline._bouncify_verify_batch(_leads(failing))
+    print(f"Bulk fallback path: {len(valid)} passed, {rejected} rejected, calls {_calls}")
+    assert (len(valid), rejected) == (len(failing), 0)
+    assert _calls["verify"] - verify_before == len(failing)
+
+    # Cached emails, the remembered catch-all domain and the disposable list
+    # settle everything except the earlier error, which is never cached
+    # (and is retried by the HTTP client on its 500)
+    cached = small + ["someone@catchall.com", "throwaway@mailinator.com"]
+    verify_before = _calls["verify"]
+    valid, rejected = pipeline._bouncify_verify_batch(_leads(cached))
+    print(f"Cached verdicts: {len(valid)} passed, {rejected} rejected, calls {_calls}")
+    assert (len(valid), rejected) == (2, 4)
+    assert _calls["verify"] - verify_before == 1 + pipeline._bouncify_http.retries
+
+    print(f"Connection reuse: {http_client.stats()['bouncify']}")
+    print("All Bouncify stand-in checks passed.")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
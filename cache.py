@@ -0,0 +1,105 @@
+"""
+cache.py
+Small persistent key -> JSON value store with per-entry expiry, backed by SQLite.
+Used to remember lookups we've already paid a vendor for (e.g. Ark AI enrichment).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_DB = os.environ.get("CACHE_DB", "pipeline_cache.db")
+
+
+class TTLCache:
+    """
+    One SQLite table of key -> (JSON value, expires_at). Safe to share between
+    threads: every call opens its own short-lived connection.
+    """
+
+    def __init__(self, table: str, path: str = CACHE_DB):
+        self.table = table
+        self.path = path
+        self._init_lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._ready:
+            with self._init_lock:
+                if not self._ready:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(
+                        f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                        f"key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                    )
+                    conn.commit()
+                    self._ready = True
+        return conn
+
+    def get(self, key: str):
+        """Return the cached value for `key`, or None if missing or expired."""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys) -> dict:
+        """Return {key: value} for every key that has a live entry."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        if not keys:
+            return found
+        now = time.time()
+        conn = self._connect()
+        try:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT key, value FROM {self.table} "
+                    f"WHERE expires_at > ? AND key IN ({','.join('?' * len(chunk))})",
+                    [now, *chunk],
+                )
+                for key, value in rows:
+                    found[key] = json.loads(value)
+        finally:
+            conn.close()
+        return found
+
+    def set(self, key: str, value, ttl: float):
+        """Store `value` under `key` for `ttl` seconds."""
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: dict, ttl: float):
+        """Store every key -> value in `items` for `ttl` seconds."""
+        if not items or ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                    [(key, json.dumps(value), expires_at) for key, value in items.items()],
+                )
+        finally:
+            conn.close()
+
+    def delete(self, key: str):
+        """Remove `key` if present."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        finally:
+            conn.close()
+
+    def purge_expired(self) -> int:
+        """Delete expired entries. Returns how many were removed."""
+        conn = self._connect()
+        try:
+            with conn:
+                cur = conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+            return cur.rowcount
+        finally:
+            conn.close()
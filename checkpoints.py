@@ -0,0 +1,208 @@
+"""
+checkpoints.py
+Durable per-run state, so a restart resumes pipeline runs instead of
+re-scraping and re-paying for them.
+
+Each run is one SQLite row: post URL, status (queued / running / done /
+failed), the last step boundary it passed and a JSON blob of everything
+needed to carry on from there (container IDs, scraped URLs, outstanding Ark
+trackIds, leads, Instantly progress). pipeline.run_pipeline saves at every
+step boundary; main.py resumes unfinished runs on startup.
+
+Ownership is a lease, not a pid: the owning process renews `lease_until` on
+its unfinished runs every RUN_LEASE_TTL / 3 seconds, and a run whose lease has
+lapsed (its owner died, or a previous life of this container) can be
+claimed by anyone. Pids are no use here — a restarted container gets the
+same ones back.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from cache import CACHE_DB
+
+RUN_HISTORY_DAYS = 14   # finished runs older than this are purged
+RUN_LEASE_TTL = int(os.environ.get("RUN_LEASE_SECONDS", 90))   # an owner that stops renewing loses its runs after this
+
+# This process's claim on runs: a per-boot token (the pid is only there to
+# make it readable — liveness is the lease)
+_OWNER = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+class RunStore:
+    """Pipeline run checkpoints in SQLite. Safe to share between threads."""
+
+    def __init__(self, path: str = CACHE_DB):
+        self.path = path
+        self._init_lock = threading.Lock()
+        self._ready = False
+        self._heartbeat = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._ready:
+            with self._init_lock:
+                if not self._ready:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS pipeline_runs ("
+                        "run_id TEXT PRIMARY KEY, post_url TEXT NOT NULL, status TEXT NOT NULL, "
+                        "step TEXT NOT NULL, state TEXT NOT NULL, owner TEXT, lease_until REAL, "
+                        "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+                    )
+                    columns = {row[1] for row in conn.execute("PRAGMA table_info(pipeline_runs)")}
+                    if "lease_until" not in columns:
+                        # Tables from before leases: their runs count as unowned
+                        conn.execute("ALTER TABLE pipeline_runs ADD COLUMN lease_until REAL")
+                    conn.commit()
+                    self._ready = True
+        return conn
+
+    def create(self, post_url: str) -> str:
+        """Record a new queued run. Returns its run_id."""
+        run_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO pipeline_runs "
+                    "(run_id, post_url, status, step, state, owner, lease_until, created_at, updated_at) "
+                    "VALUES (?, ?, 'queued', 'queued', '{}', ?, ?, ?, ?)",
+                    (run_id, post_url, _OWNER, now + RUN_LEASE_TTL, now, now),
+                )
+        finally:
+            conn.close()
+        return run_id
+
+    def get(self, run_id: str) -> dict | None:
+        """{run_id, post_url, status, step, state} or None."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT run_id, post_url, status, step, state FROM pipeline_runs WHERE run_id = ?",
+                (run_id,),
+            ).fetchone()
+        finally:
+            conn.close()
+        if not row:
+            return None
+        return {"run_id": row[0], "post_url": row[1], "status": row[2], "step": row[3],
+                "state": json.loads(row[4])}
+
+    def save(self, run_id: str, step: str, **state):
+        """Mark `run_id` running at `step`, merging `state` into its saved state."""
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT state FROM pipeline_runs WHERE run_id = ?", (run_id,)
+                ).fetchone()
+                merged = {**json.loads(row[0]), **state} if row else state
+                conn.execute(
+                    "UPDATE pipeline_runs SET status = 'running', step = ?, state = ?, updated_at = ? "
+                    "WHERE run_id = ?",
+                    (step, json.dumps(merged), time.time(), run_id),
+                )
+        finally:
+            conn.close()
+
+    def finish(self, run_id: str, status: str):
+        """Mark a run 'done' or 'failed'; its state is dropped to save space."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "UPDATE pipeline_runs SET status = ?, state = '{}', updated_at = ? WHERE run_id = ?",
+                    (status, time.time(), run_id),
+                )
+        finally:
+            conn.close()
+
+    def claim_unfinished(self) -> list[dict]:
+        """
+        Take ownership of every queued/running run whose owner's lease has
+        lapsed (so with several workers, each run resumes only once).
+        Returns them oldest first.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                claimed = [row[0] for row in conn.execute(
+                    "SELECT run_id FROM pipeline_runs "
+                    "WHERE status IN ('queued', 'running') AND owner IS NOT ? "
+                    "AND (lease_until IS NULL OR lease_until < ?) ORDER BY created_at",
+                    (_OWNER, now),
+                )]
+                conn.executemany(
+                    "UPDATE pipeline_runs SET owner = ?, lease_until = ? WHERE run_id = ?",
+                    [(_OWNER, now + RUN_LEASE_TTL, run_id) for run_id in claimed],
+                )
+        finally:
+            conn.close()
+        return [self.get(run_id) for run_id in claimed]
+
+    def renew_leases(self, until: float | None = None) -> int:
+        """Extend this process's lease on its unfinished runs (to `until`). Returns how many."""
+        until = time.time() + RUN_LEASE_TTL if until is None else until
+        conn = self._connect()
+        try:
+            with conn:
+                cur = conn.execute(
+                    "UPDATE pipeline_runs SET lease_until = ? "
+                    "WHERE owner = ? AND status IN ('queued', 'running')",
+                    (until, _OWNER),
+                )
+            return cur.rowcount
+        finally:
+            conn.close()
+
+    def release_leases(self) -> int:
+        """Give up this process's unfinished runs now (on shutdown), so a restart resumes them at once."""
+        return self.renew_leases(until=0)
+
+    def keep_alive(self, on_claimed=None):
+        """
+        Start the lease heartbeat thread (once). Every RUN_LEASE_TTL / 3
+        seconds it renews our leases and, if `on_claimed` is given, claims
+        runs whose owner stopped renewing and passes them to it.
+        """
+        with self._init_lock:
+            if self._heartbeat is not None:
+                return
+            self._heartbeat = threading.Thread(
+                target=self._beat, args=(on_claimed,), name="run-lease-heartbeat", daemon=True
+            )
+            self._heartbeat.start()
+
+    def _beat(self, on_claimed):
+        while True:
+            time.sleep(RUN_LEASE_TTL / 3)
+            try:
+                self.renew_leases()
+                if on_claimed is not None:
+                    runs = self.claim_unfinished()
+                    if runs:
+                        on_claimed(runs)
+            except Exception as exc:
+                print(f"[WARN] Run lease heartbeat failed (non-fatal): {exc}", flush=True)
+
+    def purge_finished(self, older_than_days: float = RUN_HISTORY_DAYS) -> int:
+        """Delete finished runs older than `older_than_days`. Returns how many."""
+        conn = self._connect()
+        try:
+            with conn:
+                cur = conn.execute(
+                    "DELETE FROM pipeline_runs WHERE status IN ('done', 'failed') AND updated_at < ?",
+                    (time.time() - older_than_days * 86400,),
+                )
+            return cur.rowcount
+        finally:
+            conn.close()
+
@@ -0,0 +1,283 @@
+"""
+http_client.py
+One pooled, thread-safe requests.Session per vendor, so calls reuse
+keep-alive connections instead of paying a TCP+TLS handshake each time.
+
+Each VendorClient carries its base URL, auth (headers and/or query params,
+read from the environment at call time), a default timeout, and retries with
+jittered exponential backoff on connection errors and 5xx responses.
+Requests are paced by the vendor's rate_governor.VendorGovernor, if it has
+one; 429s feed back into it. Per-vendor counters (requests, retries,
+connections opened vs reused) are available from stats().
+
+AsyncVendorClient is the same client for the asyncio engine, over httpx
+(installed only where PIPELINE_ENGINE=asyncio is used, and imported lazily).
+"""
+
+import asyncio
+import random
+import threading
+import time
+from contextlib import nullcontext
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_governor import THROTTLE_DEFAULT_PAUSE, parse_retry_after
+
+HTTP_POOL_SIZE = 16          # keep-alive connections per host (gunicorn threads + fan-out)
+HTTP_RETRIES = 2             # extra attempts after a connection error or 5xx
+HTTP_BACKOFF_BASE = 0.5      # seconds before the first retry (doubles each time, jittered)
+HTTP_BACKOFF_MAX = 8
+HTTP_THROTTLE_RETRIES = 5    # times a 429 is retried (after the vendor's Retry-After)
+
+_clients = {}                # vendor name -> VendorClient
+_async_clients = {}          # vendor name -> AsyncVendorClient
+_clients_lock = threading.Lock()
+
+
+class VendorClient:
+    """
+    HTTP access to one vendor. Safe to share between threads: the session's
+    connection pool is thread-safe and cookies are disabled, so no per-call
+    state lives on the session.
+    """
+
+    def __init__(self, name: str, base_url: str = "", headers=None, params=None,
+                 timeout: float = 30, retries: int = HTTP_RETRIES, governor=None):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self._headers = headers    # callable -> dict, evaluated per request
+        self._params = params      # callable -> dict, evaluated per request
+        self.timeout = timeout
+        self.retries = retries
+        self.governor = governor
+
+        self.session = requests.Session()
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._adapters = [adapter]
+
+        self._lock = threading.Lock()
+        self._counts = {"requests": 0, "retries": 0, "failures": 0, "server_errors": 0, "throttled": 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self._counts[key] += 1
+
+    def url(self, path: str) -> str:
+        """`path` relative to the base URL; absolute URLs pass through."""
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def request(self, method: str, path: str, retries: int | None = None, **kwargs) -> requests.Response:
+        """
+        Send a request with the vendor's auth and timeout applied, paced by
+        its governor. Connection errors and 5xx responses are retried up to
+        `retries` times (pass 0 for calls that mustn't be repeated, e.g. ones
+        that start paid jobs); the last 5xx response is returned as-is, the
+        last exception is raised. A 429 means the request wasn't processed, so
+        it's always retried (up to HTTP_THROTTLE_RETRIES) once the vendor's
+        Retry-After has passed.
+        """
+        retries = self.retries if retries is None else retries
+        if self._headers:
+            kwargs["headers"] = {**self._headers(), **(kwargs.get("headers") or {})}
+        if self._params:
+            kwargs["params"] = {**self._params(), **(kwargs.get("params") or {})}
+        kwargs.setdefault("timeout", self.timeout)
+        url = self.url(path)
+
+        attempt = throttles = 0
+        while True:
+            self._count("requests")
+            try:
+                with self.governor.slot() if self.governor else nullcontext():
+                    resp = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= retries:
+                    self._count("failures")
+                    raise
+            else:
+                if resp.status_code == 429:
+                    self._count("throttled")
+                    retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                    if throttles >= HTTP_THROTTLE_RETRIES:
+                        return resp
+                    throttles += 1
+                    resp.close()
+                    if self.governor:
+                        # The governor holds every thread back until Retry-After passes
+                        self.governor.on_throttle(retry_after)
+                    else:
+                        time.sleep(THROTTLE_DEFAULT_PAUSE if retry_after is None else retry_after)
+                    continue
+                if resp.status_code < 500:
+                    if self.governor:
+                        self.governor.on_success()
+                    return resp
+                self._count("server_errors")
+                if attempt >= retries:
+                    return resp
+                resp.close()
+
+            self._count("retries")
+            delay = min(HTTP_BACKOFF_BASE * 2 ** attempt, HTTP_BACKOFF_MAX)
+            time.sleep(delay * random.uniform(0.5, 1.5))
+            attempt += 1
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def patch(self, path: str, **kwargs) -> requests.Response:
+        return self.request("PATCH", path, **kwargs)
+
+    def stats(self) -> dict:
+        """Request/retry counters plus connections opened vs reused (from urllib3's pools)."""
+        opened = served = 0
+        for adapter in self._adapters:
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+                    served += pool.num_requests
+        with self._lock:
+            counts = dict(self._counts)
+        counts["connections_opened"] = opened
+        counts["connections_reused"] = max(served - opened, 0)
+        return counts
+
+
+class AsyncVendorClient:
+    """
+    asyncio counterpart of a VendorClient: the same base URL, auth, timeout,
+    retry policy and governor (so both engines share one vendor budget), over
+    a pooled httpx.AsyncClient. Use it from one event loop. Responses are
+    httpx.Responses — `is_success` instead of requests' `ok`.
+    """
+
+    def __init__(self, client: VendorClient):
+        import httpx
+
+        self.name = client.name
+        self._client = client
+        self.timeout = client.timeout
+        self.retries = client.retries
+        self.governor = client.governor
+        self.session = httpx.AsyncClient(
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE),
+        )
+        self._transport_errors = (httpx.TransportError,)
+
+        self._lock = threading.Lock()
+        self._counts = {"requests": 0, "retries": 0, "failures": 0, "server_errors": 0, "throttled": 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self._counts[key] += 1
+
+    async def _acquire(self):
+        """Wait (without blocking the loop) until the governor lets a request start."""
+        waiting_since = time.monotonic()
+        while (delay := self.governor.try_acquire(waiting_since)) > 0:
+            await asyncio.sleep(delay)
+
+    async def request(self, method: str, path: str, retries: int | None = None, **kwargs):
+        """Send a request — same retry / 429 behaviour as VendorClient.request."""
+        retries = self.retries if retries is None else retries
+        if self._client._headers:
+            kwargs["headers"] = {**self._client._headers(), **(kwargs.get("headers") or {})}
+        if self._client._params:
+            kwargs["params"] = {**self._client._params(), **(kwargs.get("params") or {})}
+        kwargs.setdefault("timeout", self.timeout)
+        url = self._client.url(path)
+
+        attempt = throttles = 0
+        while True:
+            self._count("requests")
+            if self.governor:
+                await self._acquire()
+            try:
+                resp = await self.session.request(method, url, **kwargs)
+            except self._transport_errors:
+                if attempt >= retries:
+                    self._count("failures")
+                    raise
+            else:
+                if resp.status_code == 429:
+                    self._count("throttled")
+                    retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                    if throttles >= HTTP_THROTTLE_RETRIES:
+                        return resp
+                    throttles += 1
+                    if self.governor:
+                        # Pauses the vendor for every caller, threads and coroutines alike
+                        self.governor.on_throttle(retry_after)
+                    else:
+                        await asyncio.sleep(THROTTLE_DEFAULT_PAUSE if retry_after is None else retry_after)
+                    continue
+                if resp.status_code < 500:
+                    if self.governor:
+                        self.governor.on_success()
+                    return resp
+                self._count("server_errors")
+                if attempt >= retries:
+                    return resp
+            finally:
+                if self.governor:
+                    self.governor.release()
+
+            self._count("retries")
+            delay = min(HTTP_BACKOFF_BASE * 2 ** attempt, HTTP_BACKOFF_MAX)
+            await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+            attempt += 1
+
+    async def get(self, path: str, **kwargs):
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs):
+        return await self.request("POST", path, **kwargs)
+
+    async def patch(self, path: str, **kwargs):
+        return await self.request("PATCH", path, **kwargs)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+
+def vendor(name: str, base_url: str = "", **kwargs) -> VendorClient:
+    """The process-wide client for `name`, created on first use."""
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            client = _clients[name] = VendorClient(name, base_url, **kwargs)
+        return client
+
+
+def async_vendor(name: str) -> AsyncVendorClient:
+    """The process-wide asyncio client for vendor `name` (whose VendorClient must exist)."""
+    with _clients_lock:
+        client = _async_clients.get(name)
+        if client is None:
+            client = _async_clients[name] = AsyncVendorClient(_clients[name])
+        return client
+
+
+def stats() -> dict:
+    """{vendor name: counters} for every client created so far (asyncio ones as "<name>:async")."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        async_clients = list(_async_clients.values())
+    counts = {client.name: client.stats() for client in clients}
+    counts.update({f"{client.name}:async": client.stats() for client in async_clients})
+    return counts
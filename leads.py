@@ -0,0 +1,66 @@
+"""
+leads.py
+The Lead record every pipeline stage passes along — from the Ark AI webhook
+through the title filter, Bouncify and Instantly to the enrichment log.
+
+A slotted dataclass instead of a dict per lead: a fixed schema, no per-
+instance __dict__ (roughly a third of a dict's memory — see bench_leads.py),
+and one place that knows how a lead is written to the enrichment log CSV, to
+JSON (checkpoints, enrichment cache) and to Instantly.
+"""
+
+from dataclasses import dataclass, fields
+
+# Columns of enrichment_log.csv, in order
+LOG_FIELDS = ("linkedin_url", "first_name", "last_name", "email", "company", "status")
+
+
+@dataclass(slots=True)
+class Lead:
+    first_name: str = ""
+    last_name: str = ""
+    email: str = ""
+    company: str = ""
+    title: str = ""
+    linkedin_url: str = ""
+    title_rule: str = ""   # set by title_filter: "keep:ceo", "drop:intern", "no_match", "blank"
+
+    @classmethod
+    def from_dict(cls, data: dict, **overrides) -> "Lead":
+        """Build from a JSON dict (unknown keys ignored, missing ones default)."""
+        values = {name: data[name] or "" for name in FIELD_NAMES if name in data}
+        return cls(**{**values, **overrides})
+
+    def as_dict(self) -> dict:
+        """JSON-ready dict of every field."""
+        return {name: getattr(self, name) for name in FIELD_NAMES}
+
+    @property
+    def email_key(self) -> str:
+        """The email as compared everywhere (Bouncify verdicts, ledger, dedupe)."""
+        return self.email.strip().lower()
+
+    def log_row(self, status: str = "enriched") -> tuple:
+        """This lead as an enrichment_log.csv row (see LOG_FIELDS)."""
+        return (self.linkedin_url, self.first_name, self.last_name, self.email, self.company, status)
+
+    def instantly_payload(self, source_post_url: str) -> dict:
+        """Lead fields as Instantly v2 expects them (without the campaign)."""
+        return {
+            "email": self.email,
+            "first_name": self.first_name,
+            "last_name": self.last_name,
+            "company_name": self.company,
+            "custom_variables": {
+                "linkedin_url": self.linkedin_url,
+                "source_post_url": source_post_url,
+            },
+        }
+
+
+FIELD_NAMES = tuple(field.name for field in fields(Lead))
+
+
+def empty_log_row(linkedin_url: str, status: str) -> tuple:
+    """An enrichment_log.csv row for a profile that produced no lead."""
+    return (linkedin_url, "", "", "", "", status)
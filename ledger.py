@@ -0,0 +1,148 @@
+"""
+ledger.py
+Local ledger of emails already in an Instantly campaign, so known duplicates
+are skipped without a round trip to POST /leads.
+
+Seeded once by paging through the campaign's leads, then updated on every
+successful add. Resync when it drifts (leads deleted in the Instantly UI, etc.):
+
+    python ledger.py resync     # re-page the campaign and replace the ledger
+    python ledger.py status     # show ledger size and last sync time
+"""
+
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+from cache import CACHE_DB
+
+
+class CampaignLedger:
+    """Emails known to be in one campaign (SQLite, safe to share between threads)."""
+
+    def __init__(self, campaign_id: str, path: str = CACHE_DB):
+        self.campaign_id = campaign_id
+        self.path = path
+        self._init_lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._ready:
+            with self._init_lock:
+                if not self._ready:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS instantly_ledger ("
+                        "campaign TEXT NOT NULL, email TEXT NOT NULL, added_at REAL NOT NULL, "
+                        "PRIMARY KEY (campaign, email))"
+                    )
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS instantly_ledger_sync ("
+                        "campaign TEXT PRIMARY KEY, synced_at REAL NOT NULL, lead_count INTEGER NOT NULL)"
+                    )
+                    conn.commit()
+                    self._ready = True
+        return conn
+
+    def contains(self, emails) -> set:
+        """Return the subset of `emails` (lowercased) already in the campaign."""
+        emails = list({email.strip().lower() for email in emails})
+        found = set()
+        conn = self._connect()
+        try:
+            for i in range(0, len(emails), 500):
+                chunk = emails[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT email FROM instantly_ledger WHERE campaign = ? "
+                    f"AND email IN ({','.join('?' * len(chunk))})",
+                    [self.campaign_id, *chunk],
+                )
+                found.update(email for (email,) in rows)
+        finally:
+            conn.close()
+        return found
+
+    def add(self, emails):
+        """Record emails as present in the campaign."""
+        now = time.time()
+        rows = [(self.campaign_id, email.strip().lower(), now) for email in emails]
+        if not rows:
+            return
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO instantly_ledger (campaign, email, added_at) VALUES (?, ?, ?)",
+                    rows,
+                )
+        finally:
+            conn.close()
+
+    def replace_all(self, emails):
+        """Replace the ledger with exactly `emails` and mark it synced."""
+        now = time.time()
+        rows = {(self.campaign_id, email.strip().lower(), now) for email in emails if email}
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM instantly_ledger WHERE campaign = ?", (self.campaign_id,))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO instantly_ledger (campaign, email, added_at) VALUES (?, ?, ?)",
+                    rows,
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO instantly_ledger_sync (campaign, synced_at, lead_count) "
+                    "VALUES (?, ?, ?)",
+                    (self.campaign_id, now, len(rows)),
+                )
+        finally:
+            conn.close()
+
+    def last_sync(self) -> tuple[float, int] | None:
+        """(synced_at, lead_count) of the last full sync, or None if never seeded."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT synced_at, lead_count FROM instantly_ledger_sync WHERE campaign = ?",
+                (self.campaign_id,),
+            ).fetchone()
+        finally:
+            conn.close()
+        return tuple(row) if row else None
+
+    def size(self) -> int:
+        conn = self._connect()
+        try:
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM instantly_ledger WHERE campaign = ?", (self.campaign_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return count
+
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    import pipeline
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command == "resync":
+        count = pipeline._instantly_ledger_sync()
+        print(f"Ledger resynced: {count} leads in campaign {pipeline.INSTANTLY_CAMPAIGN_ID}")
+    elif command == "status":
+        ledger = pipeline._campaign_ledger
+        synced = ledger.last_sync()
+        when = datetime.utcfromtimestamp(synced[0]).isoformat() if synced else "never"
+        print(f"Campaign {ledger.campaign_id}: {ledger.size()} emails in ledger, last full sync {when}")
+    else:
+        print("Usage: python ledger.py [resync|status]")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
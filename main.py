@@ -3,22 +3,69 @@ main.py
 Flask app that listens for Slack events and triggers the LinkedIn outreach pipeline.
 """
 
+import atexit
 import hashlib
 import hmac
 import os
 import re
-import threading
 import time
 
 from flask import Flask, jsonify, request
 from dotenv import load_dotenv
 
-from pipeline import run_pipeline, _ark_results, _ark_events, _ark_lock
+from ark_ingest import ArkIngest
+from pipeline import PIPELINE_ENGINE, run_pipeline, _ark_bridge, _runs, _send_slack_message
+from scheduler import JobScheduler, QueueFull
 
 load_dotenv()
 
 app = Flask(__name__)
 
+# Ark AI webhooks are acknowledged as soon as the body is spooled, then parsed in the background
+_ark_ingest = ArkIngest(_ark_bridge)
+
+# Pipeline runs go through a bounded, fair queue instead of one thread per message.
+# Every queued run is checkpointed, so a restart picks it back up.
+if PIPELINE_ENGINE == "asyncio":
+    from async_pipeline import AsyncPipelineRunner
+
+    # Same queue, but runs are coroutines on one event loop — dozens at once
+    jobs = AsyncPipelineRunner(persist=_runs.create)
+else:
+    jobs = JobScheduler(run_pipeline, persist=_runs.create)
+
+if int(os.environ.get("WEB_CONCURRENCY", 1)) > 1 and _ark_bridge.kind == "memory":
+    print(
+        "[WARN] WEB_CONCURRENCY > 1 with ARK_BRIDGE=memory — Ark AI webhooks landing on "
+        "another worker will be missed. Set ARK_BRIDGE=sqlite.",
+        flush=True,
+    )
+
+# Seconds to let in-flight runs finish on shutdown (keep under gunicorn's graceful timeout)
+SHUTDOWN_GRACE = int(os.environ.get("PIPELINE_SHUTDOWN_GRACE", 20))
+
+
+def _resume_unfinished_runs(runs: list[dict]):
+    """Re-queue runs a previous process (or a dead sibling worker) left queued or half-done."""
+    for run in runs:
+        print(f"[RESUME] Run {run['run_id']} for {run['post_url']} (checkpoint: {run['step']})", flush=True)
+        job, _ = jobs.submit(run["post_url"], requester="resume", run_id=run["run_id"], force=True)
+        if job.run_id != run["run_id"]:
+            # Same post was left behind twice — keep one
+            _runs.finish(run["run_id"], "failed")
+
+
+if os.environ.get("PIPELINE_RESUME", "1").lower() in ("1", "true", "yes"):
+    _resume_unfinished_runs(_runs.claim_unfinished())
+    _runs.purge_finished()
+    # Runs whose owner stops renewing its lease later on are picked up here too
+    _runs.keep_alive(on_claimed=_resume_unfinished_runs)
+else:
+    _runs.keep_alive()
+# atexit runs in reverse: let in-flight runs finish, then hand the rest back
+atexit.register(_runs.release_leases)
+atexit.register(jobs.shutdown, SHUTDOWN_GRACE)
+
 # Regex to match LinkedIn post URLs
 LINKEDIN_POST_RE = re.compile(
     r"https?://(?:www\.)?linkedin\.com/(?:posts/|feed/update/)\S+"
@@ -85,42 +132,31 @@ def slack_events():
         # Slack formats links as <URL|display_text> — strip the display part
         if "|" in post_url:
             post_url = post_url.split("|")[0]
-        # Run pipeline in background thread so we respond to Slack within 3 seconds
-        thread = threading.Thread(target=run_pipeline, args=(post_url,), daemon=True)
-        thread.start()
+        # Queue the run so we respond to Slack within 3 seconds
+        try:
+            job, position = jobs.submit(post_url, requester=event.get("user", ""))
+        except QueueFull:
+            _send_slack_message(
+                f"\U0001f6a7 Too many posts queued right now — please send this one again later:\n{post_url}"
+            )
+        else:
+            if position:
+                _send_slack_message(
+                    f"\u23f3 Queued at position {position} — I'll start on this post as soon as "
+                    f"a run slot frees up:\n{post_url}"
+                )
 
     return jsonify({"ok": True}), 200
 
 
 @app.route("/webhook/ark", methods=["POST"])
 def ark_webhook():
-    """Receive enrichment results from Ark AI webhook callback."""
-    data = request.json or {}
-
-    track_id = data.get("trackId", "")
-    people = data.get("data", [])
-    state = data.get("state", "UNKNOWN")
-    stats = data.get("statistics", {})
-
-    print(
-        f"[ARK WEBHOOK] Received — trackId: {track_id}, state: {state}, "
-        f"people: {len(people)}, stats: {stats}",
-        flush=True,
-    )
-    # Debug: log top-level keys for first test (helps if field names differ)
-    print(f"[ARK WEBHOOK] Payload keys: {list(data.keys())}", flush=True)
-
-    if track_id:
-        with _ark_lock:
-            _ark_results[track_id] = data
-            if track_id in _ark_events:
-                _ark_events[track_id].set()
-                print(f"[ARK WEBHOOK] Signaled pipeline for trackId: {track_id}", flush=True)
-            else:
-                # Buffer result — pipeline may not have registered the event yet
-                print(f"[ARK WEBHOOK] Buffered result for trackId: {track_id} (pipeline not waiting yet)", flush=True)
-
-    return jsonify({"ok": True}), 200
+    """
+    Receive enrichment results from Ark AI webhook callback. The body is only
+    spooled here; parsing and waking the pipeline happen off the request thread.
+    """
+    size = _ark_ingest.accept(request.stream, request.headers.get("Content-Encoding", ""))
+    return jsonify({"ok": True, "bytes": size}), 200
 
 
 @app.route("/test/enrich", methods=["POST"])
@@ -155,7 +191,33 @@ def test_enrich():
         "enriched": len(enriched),
         "bouncify_passed": len(verified),
         "bouncify_rejected": bouncify_rejected,
-        "leads": verified,
+        "leads": [lead.as_dict() for lead in verified],
+    }), 200
+
+
+@app.route("/jobs", methods=["GET"])
+def job_status():
+    """Pipeline queue depth, running jobs, wait times and vendor stage slots."""
+    return jsonify(jobs.stats()), 200
+
+
+@app.route("/stats", methods=["GET"])
+def stats():
+    """Vendor HTTP counters, rate governors, single-flight coalescing, Ark export batching, and Ark webhook ingestion, bridge and arrival counters."""
+    import ark_batcher
+    import http_client
+    import pipeline
+    import rate_governor
+    import singleflight
+
+    return jsonify({
+        "http": http_client.stats(),
+        "rate_governors": rate_governor.stats(),
+        "single_flight": singleflight.stats(),
+        "ark_batcher": ark_batcher.stats(),
+        "ark_ingest": _ark_ingest.stats(),
+        "ark_bridge": _ark_bridge.stats(),
+        "ark_webhooks": pipeline.ark_webhook_stats(),
     }), 200
 
 
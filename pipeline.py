@@ -5,14 +5,30 @@ Triggered when a LinkedIn post URL is detected in #linkedin-scraper.
 """
 
 import csv
+import json
 import os
+import queue
 import threading
 import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, wait
 from datetime import datetime
 
 import requests
 
-from title_filter import filter_leads
+import ark_batcher
+import ark_bridge
+import http_client
+import rate_governor
+import scheduler
+import singleflight
+from ark_ingest import _Timing, compact_payload
+from cache import TTLCache
+from checkpoints import RunStore
+from leads import LOG_FIELDS, Lead, empty_log_row
+from ledger import CampaignLedger
+from profiles import ProfileIndex, canonical_profile_url, profile_key
+from title_filter import filter_leads, prescreen_headline
 
 # ---------------------------------------------------------------------------
 # Constants
@@ -24,27 +40,93 @@ ENRICHMENT_LOG = "enrichment_log.csv"
 
 # PhantomBuster
 PB_BASE = "https://api.phantombuster.com/api/v2"
-PB_POLL_INTERVAL = 30         # seconds between status checks (shorter — simple phantoms are faster)
+PB_S3_BASE = "https://phantombuster.s3.amazonaws.com"
+PB_POLL_MIN_INTERVAL = 5     # first status check comes quickly — short runs finish fast
+PB_POLL_INTERVAL = 30         # cap on seconds between status checks for long runs
+PB_POLL_BACKOFF = 1.5         # interval multiplier after every sweep
 PB_MAX_POLL_TIME = 30 * 60    # 30 minutes
+PB_AGENT_CACHE_TTL = 60 * 60  # seconds to reuse a phantom's saved argument before refetching
+PB_RESULT_CSV = "result"      # csvName every launch writes to (not saved back to the agent)
 
 # Ark AI
 ARK_BASE = "https://api.ai-ark.com/api/developer-portal/v1"
-ARK_WEBHOOK_TIMEOUT = 15 * 60   # 15 minutes max wait for webhook
+ARK_BATCH_SIZE = 300             # max LinkedIn URLs per /people/export (API limit)
+ARK_WEBHOOK_TIMEOUT = 15 * 60   # request a webhook resend if a batch is still missing after this
+ARK_ENRICH_TIMEOUT = 20 * 60    # single deadline for the whole enrichment step (all batches)
 ARK_POLL_INTERVAL = 30           # seconds between progress log checks
+ARK_RESEND_GRACE = 20            # seconds to wait for a webhook after statistics say "done"
+ARK_RESEND_BACKOFF_MIN = 30      # first gap between repeated resend requests
+ARK_RESEND_BACKOFF_MAX = 4 * 60  # gap cap between repeated resend requests
+# /people/statistics states meaning the export is finished. Unconfirmed: every
+# other state is logged once (and counted in GET /stats) so the list can be fixed.
+ARK_TERMINAL_STATES = {
+    state.strip().upper()
+    for state in os.environ.get("ARK_TERMINAL_STATES", "DONE,COMPLETED").split(",") if state.strip()
+}
 
 # Instantly v2
 INSTANTLY_BASE = "https://api.instantly.ai/api/v2"
-INSTANTLY_DELAY = 1           # seconds between calls
+INSTANTLY_BULK = os.environ.get("INSTANTLY_BULK", "1").lower() in ("1", "true", "yes")
+INSTANTLY_BULK_SIZE = 100     # leads per POST /leads/add request
+INSTANTLY_LEDGER = os.environ.get("INSTANTLY_LEDGER", "1").lower() in ("1", "true", "yes")
+INSTANTLY_LIST_PAGE_SIZE = 100  # leads per POST /leads/list page when seeding the ledger
 
-# PhantomBuster scrape cap
-PB_MAX_PROFILES = 500
+# PhantomBuster scrape cap — unique profiles kept per post; CSV reads stop here
+PB_MAX_PROFILES = int(os.environ.get("PB_MAX_PROFILES", 500))
+
+# Skip Ark AI for engagers whose scraped headline is a clear title-filter drop
+PB_TITLE_PRESCREEN = os.environ.get("PB_TITLE_PRESCREEN", "").lower() in ("1", "true", "yes")
+PB_HEADLINE_COLUMNS = ("headline", "occupation", "title", "jobTitle")
+
+# ---------------------------------------------------------------------------
+# Ark AI webhook bridge (shared between pipeline threads and Flask, and
+# between gunicorn workers with ARK_BRIDGE=sqlite)
+# ---------------------------------------------------------------------------
+_ark_bridge = ark_bridge.create()
+
+# Statistics states seen and export-finished -> webhook-received latency (GET /stats)
+_ark_states_seen = Counter()
+_ark_webhook_latency = _Timing()
+_ark_webhook_counts = Counter()
+_ark_webhook_lock = threading.Lock()
+
+# Every observed form of a LinkedIn profile -> one identity key (process-wide)
+_profile_index = ProfileIndex()
 
 # ---------------------------------------------------------------------------
-# Ark AI webhook bridge (shared between pipeline thread and Flask)
+# PhantomBuster agent cache (phantom ID -> (fetched_at, agent record))
 # ---------------------------------------------------------------------------
-_ark_results = {}    # trackId -> webhook payload data
-_ark_events = {}     # trackId -> threading.Event
-_ark_lock = threading.Lock()
+_pb_agent_cache = {}
+_pb_agent_lock = threading.Lock()
+
+# Pooled vendor clients (auth is read from the environment on every call).
+# Each vendor's governor paces requests across every pipeline thread in the
+# process: starting rate, ceiling (req/s) and concurrency adapt on 429s.
+_slack_http = http_client.vendor(
+    "slack", "https://slack.com/api",
+    headers=lambda: {"Authorization": f"Bearer {os.environ['SLACK_BOT_TOKEN']}"},
+    timeout=10,
+    governor=rate_governor.governor("slack", rate=1, concurrency=1),
+)
+_pb_http = http_client.vendor(
+    "phantombuster", PB_BASE,
+    headers=lambda: {"X-Phantombuster-Key": os.environ["PHANTOMBUSTER_API_KEY"]},
+    governor=rate_governor.governor("phantombuster", rate=2, max_rate=5, burst=2, concurrency=4),
+)
+_s3_http = http_client.vendor("s3", timeout=60)
+_ark_http = http_client.vendor(
+    "ark", ARK_BASE,
+    headers=lambda: {"X-TOKEN": os.environ["ARK_AI_API_KEY"], "Content-Type": "application/json"},
+    governor=rate_governor.governor("ark", rate=1, max_rate=4, burst=2, concurrency=2, max_concurrency=6),
+)
+_instantly_http = http_client.vendor(
+    "instantly", INSTANTLY_BASE,
+    headers=lambda: {
+        "Authorization": f"Bearer {os.environ['INSTANTLY_API_KEY']}",
+        "Content-Type": "application/json",
+    },
+    governor=rate_governor.governor("instantly", rate=2, max_rate=10, burst=5, concurrency=2, max_concurrency=8),
+)
 
 
 def _log(msg: str):
@@ -52,175 +134,416 @@ def _log(msg: str):
     print(f"[{datetime.utcnow().isoformat()}] {msg}", flush=True)
 
 
+def _http_ok(resp) -> bool:
+    """requests' Response.ok, for either engine's responses (requests or httpx)."""
+    return resp.status_code < 400
+
+
+class _PollSchedule:
+    """
+    When to check on a long-running vendor job: first after `first` seconds,
+    the gap growing by `factor` per check up to `cap`, until `limit` seconds
+    have passed. Both engines sleep for next_wait() their own way.
+    """
+
+    def __init__(self, first: float, factor: float, cap: float, limit: float):
+        self.start = time.time()
+        self.interval = first
+        self.factor = factor
+        self.cap = cap
+        self.limit = limit
+
+    def next_wait(self) -> float | None:
+        """Seconds to wait before the next check, or None once `limit` is up."""
+        remaining = self.limit - (time.time() - self.start)
+        if remaining <= 0:
+            return None
+        wait = min(self.interval, remaining)
+        self.interval = min(self.interval * self.factor, self.cap)
+        return wait
+
+    def elapsed(self) -> int:
+        return int(time.time() - self.start)
+
+
 def _send_slack_message(text: str):
     """Post a message to #linkedin-scraper via Slack API."""
-    token = os.environ["SLACK_BOT_TOKEN"]
-    resp = requests.post(
-        "https://slack.com/api/chat.postMessage",
-        headers={"Authorization": f"Bearer {token}"},
+    # No automatic retry — a repeated post shows up twice in the channel
+    resp = _slack_http.post(
+        "/chat.postMessage",
         json={"channel": "#linkedin-scraper", "text": text},
-        timeout=10,
+        retries=0,
     )
-    if not resp.ok or not resp.json().get("ok"):
+    _slack_sent(resp)
+
+
+def _slack_sent(resp):
+    """Log a chat.postMessage response that didn't go through."""
+    if not _http_ok(resp) or not resp.json().get("ok"):
         _log(f"Slack message failed: {resp.text}")
 
 
 def _send_error(step: str, error: str, post_url: str):
     """Send a formatted error message to Slack and log it."""
-    msg = (
+    msg = _error_message(step, error, post_url)
+    _log(msg)
+    _send_slack_message(msg)
+
+
+def _error_message(step: str, error: str, post_url: str) -> str:
+    return (
         f"\u274c Pipeline failed at {step}\n"
         f"Error: {error}\n"
         f"Post: {post_url}"
     )
-    _log(msg)
-    _send_slack_message(msg)
 
 
 # ---------------------------------------------------------------------------
 # Step 2 — PhantomBuster: launch BOTH phantoms, poll, fetch & merge results
 # ---------------------------------------------------------------------------
 
-def _phantombuster_launch_one(phantom_id: str, label: str, post_url: str) -> str:
-    """Launch a single phantom with the given post URL. Returns container ID."""
-    import json as _json
-    api_key = os.environ["PHANTOMBUSTER_API_KEY"]
-    headers = {"X-Phantombuster-Key": api_key, "Content-Type": "application/json"}
-
-    # Fetch current saved argument (to keep sessionCookie + userAgent)
-    fetch_resp = requests.get(
-        f"{PB_BASE}/agents/fetch",
-        headers={"X-Phantombuster-Key": api_key},
-        params={"id": phantom_id},
-        timeout=30,
-    )
+def _phantombuster_agent(phantom_id: str) -> dict:
+    """
+    Return the phantom's agent record with `argument` parsed to a dict.
+    Served from an in-process cache for PB_AGENT_CACHE_TTL seconds so a launch
+    doesn't cost an extra /agents/fetch round-trip every time.
+    """
+    cached = _phantombuster_cached_agent(phantom_id)
+    if cached is not None:
+        return cached
+
+    fetch_resp = _pb_http.get("/agents/fetch", params={"id": phantom_id})
     fetch_resp.raise_for_status()
-    saved_arg = fetch_resp.json().get("argument", {})
+    return _phantombuster_cache_agent(phantom_id, fetch_resp.json())
+
+
+def _phantombuster_cached_agent(phantom_id: str) -> dict | None:
+    """The phantom's cached agent record, or None if missing or stale."""
+    with _pb_agent_lock:
+        cached = _pb_agent_cache.get(phantom_id)
+    if cached and time.time() - cached[0] < PB_AGENT_CACHE_TTL:
+        return cached[1]
+    return None
+
+
+def _phantombuster_cache_agent(phantom_id: str, agent: dict) -> dict:
+    """Parse a fetched agent record's `argument` to a dict and cache the record."""
+    saved_arg = agent.get("argument") or {}
     if isinstance(saved_arg, str):
-        saved_arg = _json.loads(saved_arg)
-
-    # Build the launch argument — keep session cookie, set the post URL
-    launch_arg = {
-        "postUrl": post_url,
-        "sessionCookie": saved_arg.get("sessionCookie", ""),
-        "userAgent": saved_arg.get("userAgent", ""),
-        "numberOfPostsPerLaunch": 1,
-        "csvName": "result",
-        "watcherMode": False,
-        "excludeOwnProfileFromResult": True,
-    }
+        saved_arg = json.loads(saved_arg)
+    agent["argument"] = saved_arg
+
+    with _pb_agent_lock:
+        _pb_agent_cache[phantom_id] = (time.time(), agent)
+    return agent
+
 
-    _log(f"Launching {label} phantom ({phantom_id}) for {post_url}")
+def _phantombuster_invalidate_agent(phantom_id: str):
+    """Drop a phantom's cached agent record so the next launch refetches it."""
+    with _pb_agent_lock:
+        _pb_agent_cache.pop(phantom_id, None)
 
-    resp = requests.post(
-        f"{PB_BASE}/agents/launch",
-        headers=headers,
-        json={
-            "id": phantom_id,
-            "argument": launch_arg,
-            "saveArgument": False,
+
+def _is_pb_auth_error(resp) -> bool:
+    """True if a failed PhantomBuster response looks like an auth / session cookie problem."""
+    if resp.status_code in (401, 403):
+        return True
+    body = resp.text.lower()
+    return "cookie" in body or "session" in body
+
+
+def _phantombuster_launch_payload(phantom_id: str, saved_arg: dict, post_url: str) -> dict:
+    """/agents/launch body: the saved session cookie + user agent, with our post URL."""
+    return {
+        "id": phantom_id,
+        "argument": {
+            "postUrl": post_url,
+            "sessionCookie": saved_arg.get("sessionCookie", ""),
+            "userAgent": saved_arg.get("userAgent", ""),
+            "numberOfPostsPerLaunch": 1,
+            "csvName": PB_RESULT_CSV,
+            "watcherMode": False,
+            "excludeOwnProfileFromResult": True,
         },
-        timeout=30,
-    )
+        "saveArgument": False,
+    }
+
+
+def _phantombuster_launch_one(phantom_id: str, label: str, post_url: str) -> str:
+    """Launch a single phantom with the given post URL. Returns container ID."""
+    for attempt in (1, 2):
+        # Saved argument (cached) — keeps sessionCookie + userAgent
+        saved_arg = _phantombuster_agent(phantom_id)["argument"]
+
+        _log(f"Launching {label} phantom ({phantom_id}) for {post_url}")
+
+        # No automatic retry — a repeated launch would start a second run
+        resp = _pb_http.post(
+            "/agents/launch",
+            json=_phantombuster_launch_payload(phantom_id, saved_arg, post_url),
+            retries=0,
+        )
+        if not _phantombuster_launch_retry(phantom_id, label, resp, attempt):
+            break
+    return _phantombuster_container_id(label, resp)
+
+
+def _phantombuster_launch_retry(phantom_id: str, label: str, resp, attempt: int) -> bool:
+    """
+    Read an /agents/launch response: True to refetch the saved argument and
+    try again (first auth/cookie failure), False if it launched. Raises otherwise.
+    """
+    if not _http_ok(resp) and _is_pb_auth_error(resp):
+        # Cookie may have been refreshed in the dashboard — refetch once and retry
+        _phantombuster_invalidate_agent(phantom_id)
+        if attempt == 1:
+            _log(f"{label} launch auth/cookie error (HTTP {resp.status_code}) — refetching argument and retrying")
+            return True
     resp.raise_for_status()
+    return False
+
+
+def _phantombuster_container_id(label: str, resp) -> str:
+    """The containerId from a successful /agents/launch response."""
     container_id = resp.json().get("containerId")
     _log(f"{label} phantom launched — container {container_id}")
     return container_id
 
 
+# label -> phantom ID; both are launched for every post
+PHANTOMS = {"likers": PHANTOM_LIKERS_ID, "commenters": PHANTOM_COMMENTERS_ID}
+
+
+def _phantombuster_container(label: str, container_id: str) -> dict:
+    """Checkpointed record of one launched phantom."""
+    return {"phantom_id": PHANTOMS[label], "container_id": container_id, "launched_at": time.time()}
+
+
 def _phantombuster_launch(post_url: str) -> dict:
-    """Launch both likers and commenters phantoms. Returns dict of container IDs."""
-    likers_container = _phantombuster_launch_one(
-        PHANTOM_LIKERS_ID, "Likers", post_url
-    )
-    commenters_container = _phantombuster_launch_one(
-        PHANTOM_COMMENTERS_ID, "Commenters", post_url
-    )
-    return {
-        "likers": {"phantom_id": PHANTOM_LIKERS_ID, "container_id": likers_container},
-        "commenters": {"phantom_id": PHANTOM_COMMENTERS_ID, "container_id": commenters_container},
-    }
+    """Launch likers and commenters phantoms at the same time. Returns dict of container IDs."""
+    from concurrent.futures import ThreadPoolExecutor
 
+    def launch(label):
+        container_id = _phantombuster_launch_one(PHANTOMS[label], label.capitalize(), post_url)
+        return _phantombuster_container(label, container_id)
 
-def _phantombuster_poll_one(phantom_id: str, container_id: str, label: str) -> dict:
-    """Poll a single phantom until it finishes. Returns the output data."""
-    api_key = os.environ["PHANTOMBUSTER_API_KEY"]
-    elapsed = 0
+    with ThreadPoolExecutor(max_workers=len(PHANTOMS)) as pool:
+        futures = {label: pool.submit(launch, label) for label in PHANTOMS}
+        return {label: future.result() for label, future in futures.items()}
 
-    while elapsed < PB_MAX_POLL_TIME:
-        time.sleep(PB_POLL_INTERVAL)
-        elapsed += PB_POLL_INTERVAL
 
-        resp = requests.get(
-            f"{PB_BASE}/agents/fetch-output",
-            headers={"X-Phantombuster-Key": api_key},
-            params={"id": phantom_id},
-            timeout=30,
-        )
-        resp.raise_for_status()
-        data = resp.json()
+def _phantombuster_fetch_output(phantom_id: str) -> dict:
+    """Fetch the latest run output for a phantom (may belong to an older container)."""
+    resp = _pb_http.get("/agents/fetch-output", params={"id": phantom_id})
+    resp.raise_for_status()
+    return resp.json()
 
-        response_container = data.get("containerId")
-        status = data.get("status")
-        _log(f"{label} status: {status}, container: {response_container} (elapsed {elapsed}s)")
 
-        if response_container != container_id:
-            _log(f"Waiting — {label} output is from old run, not ours")
-            continue
+def _phantombuster_poll_iter(containers: dict):
+    """
+    Poll every phantom in one loop and yield (label, output_data) as each finishes.
+
+    The first check happens after PB_POLL_MIN_INTERVAL and the gap grows by
+    PB_POLL_BACKOFF per sweep up to PB_POLL_INTERVAL, so short runs are picked
+    up quickly without hammering the API on long ones. Records `finished_at`
+    (when we saw it) and `ended_at` (when PhantomBuster says it ended) on each
+    container's info dict.
+    """
+    pending = dict(containers)
+    schedule = _phantombuster_poll_schedule()
+
+    while pending:
+        time.sleep(_phantombuster_next_poll(schedule, pending))
+        elapsed = schedule.elapsed()
+
+        for label, info in list(pending.items()):
+            data = _phantombuster_fetch_output(info["phantom_id"])
+            if _phantombuster_finished(label, info, data, elapsed):
+                del pending[label]
+                yield label, data
 
-        if status == "finished":
-            return data
-        if status in ("error", "stopped"):
-            raise RuntimeError(f"{label} phantom ended with status: {status}")
 
-    raise TimeoutError(f"{label} phantom did not finish within 30 minutes")
+def _phantombuster_poll_schedule() -> _PollSchedule:
+    return _PollSchedule(PB_POLL_MIN_INTERVAL, PB_POLL_BACKOFF, PB_POLL_INTERVAL, PB_MAX_POLL_TIME)
+
+
+def _phantombuster_next_poll(schedule: _PollSchedule, pending: dict) -> float:
+    """Seconds until the next status sweep; raises once PB_MAX_POLL_TIME is up."""
+    wait = schedule.next_wait()
+    if wait is None:
+        labels = ", ".join(label.capitalize() for label in pending)
+        raise TimeoutError(f"{labels} phantom(s) did not finish within {PB_MAX_POLL_TIME // 60} minutes")
+    return wait
+
+
+def _phantombuster_finished(label: str, info: dict, data: dict, elapsed: int) -> bool:
+    """
+    Read one fetch-output response for our container: True once it has
+    finished (recording `finished_at` / `ended_at` on `info`), False while it's
+    still running. Raises if the phantom errored or was stopped.
+    """
+    name = label.capitalize()
+    response_container = data.get("containerId")
+    status = data.get("status")
+    _log(f"{name} status: {status}, container: {response_container} (elapsed {elapsed}s)")
+
+    if response_container != info["container_id"]:
+        _log(f"Waiting — {name} output is from old run, not ours")
+        return False
+
+    if status == "finished":
+        info["finished_at"] = time.time()
+        # mostRecentEndedAt is epoch milliseconds; fall back to when we noticed
+        ended_ms = data.get("mostRecentEndedAt")
+        info["ended_at"] = ended_ms / 1000 if ended_ms else info["finished_at"]
+        return True
+    if status in ("error", "stopped"):
+        # A dead session cookie usually surfaces here — don't keep reusing it
+        _phantombuster_invalidate_agent(info["phantom_id"])
+        raise RuntimeError(f"{name} phantom ended with status: {status}")
+    return False
 
 
 def _phantombuster_poll(containers: dict) -> dict:
     """Poll both phantoms until both finish. Returns dict with both outputs."""
-    results = {}
-    for label, info in containers.items():
-        data = _phantombuster_poll_one(
-            info["phantom_id"], info["container_id"], label.capitalize()
-        )
-        results[label] = data
-    return results
+    return dict(_phantombuster_poll_iter(containers))
 
 
-def _phantombuster_parse_results(all_data: dict) -> list[str]:
-    """Extract and deduplicate LinkedIn profile URLs from both phantom outputs."""
-    import io
+def _phantombuster_timing(containers: dict, poll_seconds: float) -> dict:
+    """
+    Split the PhantomBuster step into time the phantoms actually ran and time we
+    spent waiting on them. `lag` is how long after the last run ended we noticed.
+    """
+    launched = min(info["launched_at"] for info in containers.values())
+    ended = max(info.get("ended_at", info.get("finished_at", launched)) for info in containers.values())
+    noticed = max(info.get("finished_at", ended) for info in containers.values())
+    return {
+        "runtime": max(ended - launched, 0.0),
+        "waited": poll_seconds,
+        "lag": max(noticed - ended, 0.0),
+    }
+
+
+def _phantombuster_result_csv_urls(data: dict, phantom_id: str = "") -> list[str]:
+    """
+    Candidate result CSV URLs for a finished run, best first.
+    The structured location (agent's orgS3Folder/s3Folder + the csvName we
+    launched with) comes first; the S3 link scraped from the console log is
+    the fallback.
+    """
     import re
 
-    all_urls = []
+    urls = []
+    if phantom_id:
+        try:
+            agent = _phantombuster_agent(phantom_id)
+        except Exception as exc:
+            _log(f"Could not read result folder for phantom {phantom_id}: {exc}")
+            agent = {}
+        org_folder = agent.get("orgS3Folder")
+        folder = agent.get("s3Folder")
+        if org_folder and folder:
+            # Launches don't save their argument, so the agent's csvName may differ
+            urls.append(f"{PB_S3_BASE}/{org_folder}/{folder}/{PB_RESULT_CSV}.csv")
+
+    csv_match = re.search(
+        r'(https://phantombuster\.s3\.amazonaws\.com/[^\s]+\.csv)', data.get("output") or ""
+    )
+    if csv_match and csv_match.group(1) not in urls:
+        urls.append(csv_match.group(1))
+    return urls
+
 
-    for label, data in all_data.items():
-        output_text = data.get("output", "")
-        csv_match = re.search(
-            r'(https://phantombuster\.s3\.amazonaws\.com/[^\s]+\.csv)', output_text
-        )
-        if csv_match:
-            csv_url = csv_match.group(1)
-            _log(f"Fetching {label} results from CSV: {csv_url}")
-            resp = requests.get(csv_url, timeout=60)
-            resp.raise_for_status()
-            reader = csv.DictReader(io.StringIO(resp.text))
-            count = 0
-            for row in reader:
+def _phantombuster_iter_csv(csv_url: str):
+    """
+    Stream a result CSV row by row. The body is decoded as it downloads, so
+    memory stays flat; breaking out of the loop closes the connection and
+    stops the download.
+    """
+    import io
+
+    with _s3_http.get(csv_url, stream=True) as resp:
+        resp.raise_for_status()
+        resp.raw.decode_content = True
+        # Keep urllib3 from closing the stream at EOF under the TextIOWrapper
+        resp.raw.auto_close = False
+        text = io.TextIOWrapper(resp.raw, encoding="utf-8-sig", newline="")
+        yield from csv.DictReader(text)
+
+
+def _phantombuster_read_profiles(label: str, data: dict, phantom_id: str,
+                                 seen: set, unique_urls: list,
+                                 screened: list | None = None) -> int:
+    """
+    Stream one phantom's result CSV, appending profile URLs not already in
+    `seen` to `unique_urls` (both updated in place). `seen` holds profile
+    identity keys, so URL variants of one person count once, and the
+    canonical URL is what gets kept. Stops reading once
+    `unique_urls` holds PB_MAX_PROFILES entries. Returns rows read.
+
+    If `screened` is a list, profiles whose scraped headline fails
+    prescreen_headline go there instead of `unique_urls` (they never reach
+    Ark AI and don't count towards the cap).
+    """
+    if len(unique_urls) >= PB_MAX_PROFILES:
+        _log(f"Profile cap of {PB_MAX_PROFILES} reached — not downloading {label} results")
+        return 0
+
+    for csv_url in _phantombuster_result_csv_urls(data, phantom_id):
+        _log(f"Fetching {label} results from CSV: {csv_url}")
+        count = 0
+        new = 0
+        try:
+            for row in _phantombuster_iter_csv(csv_url):
                 url = (row.get("profileLink") or row.get("profileUrl") or "")
-                if url and "linkedin.com" in url:
-                    all_urls.append(url)
-                    count += 1
-            _log(f"{label}: {count} profiles found in CSV")
+                key = _profile_index.key(url)
+                if not key:
+                    continue
+                count += 1
+                if key in seen:
+                    continue
+                seen.add(key)
+                if screened is not None:
+                    headline = next((row[c] for c in PB_HEADLINE_COLUMNS if row.get(c)), "")
+                    if not prescreen_headline(headline):
+                        screened.append(canonical_profile_url(url))
+                        continue
+                unique_urls.append(canonical_profile_url(url))
+                new += 1
+                if len(unique_urls) >= PB_MAX_PROFILES:
+                    _log(f"{label}: hit profile cap of {PB_MAX_PROFILES} — stopped reading CSV")
+                    break
+        except requests.HTTPError as exc:
+            _log(f"{label}: could not read {csv_url} ({exc}) — trying next location")
+            continue
+        _log(f"{label}: {count} profiles read from CSV, {new} new")
+        return count
 
-    # Deduplicate while preserving order
-    seen = set()
+    return 0
+
+
+def _phantombuster_parse_results(all_data: dict, containers: dict | None = None,
+                                 screened: list | None = None) -> list[str]:
+    """
+    Extract and deduplicate LinkedIn profile URLs from both phantom outputs.
+    CSVs are streamed and deduplicated during the read; reading stops as soon
+    as PB_MAX_PROFILES unique profiles have been collected. Pass a `screened`
+    list to enable the headline pre-screen (see _phantombuster_read_profiles).
+    """
+    containers = containers or {}
     unique_urls = []
-    for url in all_urls:
-        if url not in seen:
-            seen.add(url)
-            unique_urls.append(url)
+    seen = set()
+    total_rows = 0
+
+    for label, data in all_data.items():
+        phantom_id = containers.get(label, {}).get("phantom_id", "")
+        total_rows += _phantombuster_read_profiles(
+            label, data, phantom_id, seen, unique_urls, screened
+        )
 
-    _log(f"Total unique profiles after dedup: {len(unique_urls)} (from {len(all_urls)} total)")
+    _log(f"Total unique profiles after dedup: {len(unique_urls)} (from {total_rows} read)")
+    if screened:
+        _log(f"Headline pre-screen: {len(screened)} profiles skipped — Ark AI lookups saved")
     return unique_urls
 
 
@@ -228,473 +551,1914 @@ def _phantombuster_parse_results(all_data: dict) -> list[str]:
 # Step 3 — Ark AI batch enrichment (LinkedIn URLs -> emails via webhook)
 # ---------------------------------------------------------------------------
 
-def _ark_enrich_batch(linkedin_urls: list[str], webhook_base_url: str) -> list[dict]:
+def _webhook_base_url() -> str:
+    """Public base URL Ark AI posts webhooks back to."""
+    return os.environ.get("BASE_URL", "https://web-production-e430.up.railway.app")
+
+
+def _ark_launch_batch(batch_urls: list[str], batch_num: int, total_batches: int | None,
+                      webhook_url: str, wake: threading.Event) -> str:
     """
-    Send LinkedIn URLs to Ark AI in batches of 300 (API limit).
-    Blocks until all webhook results arrive (or timeout).
-    Returns list of dicts: {first_name, last_name, email, company, title, linkedin_url}
+    Start one /people/export request and register `wake` for its trackId so
+    the webhook handler can signal us. Returns the trackId.
     """
-    api_key = os.environ["ARK_AI_API_KEY"]
-    headers = {"X-TOKEN": api_key, "Content-Type": "application/json"}
-    webhook_url = f"{webhook_base_url}/webhook/ark"
+    of_total = f"/{total_batches}" if total_batches else ""
+    _log(f"Launching batch {batch_num}{of_total} ({len(batch_urls)} URLs)...")
+
+    # No automatic retry — a repeated export would be charged twice
+    resp = _ark_http.post(
+        "/people/export", json=_ark_export_payload(batch_urls, webhook_url), timeout=60, retries=0
+    )
+    track_id = _ark_export_accepted(resp, batch_num)
+    _ark_register(track_id, batch_num, wake)
+    return track_id
+
 
-    # Split into batches of 300 (Ark AI limit per request)
-    batch_size = 300
-    batches = [linkedin_urls[i:i + batch_size] for i in range(0, len(linkedin_urls), batch_size)]
-    _log(f"Sending {len(linkedin_urls)} LinkedIn URLs to Ark AI in {len(batches)} batch(es) of up to {batch_size}...")
-    _log(f"Webhook URL: {webhook_url}")
-
-    # Launch all batches and collect their trackIds + events
-    track_ids = []
-    events = []
-    for batch_num, batch_urls in enumerate(batches, 1):
-        _log(f"Launching batch {batch_num}/{len(batches)} ({len(batch_urls)} URLs)...")
-
-        payload = {
-            "contact": {
-                "linkedin": {
-                    "any": {
-                        "include": batch_urls,
-                    }
+def _ark_export_accepted(resp, batch_num: int) -> str:
+    """Read a /people/export response: the trackId, or raise if Ark didn't take the batch."""
+    if not _http_ok(resp):
+        _log(f"Ark AI export error — HTTP {resp.status_code}: {resp.text}")
+    resp.raise_for_status()
+    return _ark_export_track_id(resp.json(), batch_num)
+
+
+def _ark_export_payload(batch_urls: list[str], webhook_url: str) -> dict:
+    """/people/export body for one batch of LinkedIn URLs."""
+    return {
+        "contact": {
+            "linkedin": {
+                "any": {
+                    "include": batch_urls,
                 }
-            },
-            "page": 0,
-            "size": len(batch_urls),
-            "webhook": webhook_url,
-        }
+            }
+        },
+        "page": 0,
+        "size": len(batch_urls),
+        "webhook": webhook_url,
+    }
 
-        resp = requests.post(
-            f"{ARK_BASE}/people/export",
-            headers=headers,
-            json=payload,
-            timeout=60,
-        )
-        if not resp.ok:
-            _log(f"Ark AI export error — HTTP {resp.status_code}: {resp.text}")
-        resp.raise_for_status()
-        body = resp.json()
-
-        track_id = body.get("trackId")
-        if not track_id:
-            raise RuntimeError(f"Ark AI did not return a trackId for batch {batch_num}. Response: {body}")
-
-        _log(f"Batch {batch_num} started — trackId: {track_id}, stats: {body.get('statistics', {})}")
-
-        # Create an Event so the webhook handler can wake us up
-        event = threading.Event()
-        with _ark_lock:
-            _ark_events[track_id] = event
-            # Check if webhook already arrived before we registered (race condition fix)
-            if _ark_results.get(track_id) is not None:
-                event.set()  # Webhook beat us — data already buffered
-                _log(f"Batch {batch_num} webhook already arrived before registration!")
-            else:
-                _ark_results[track_id] = None
 
-        track_ids.append(track_id)
-        events.append(event)
+def _ark_export_track_id(body: dict, batch_num: int) -> str:
+    """The trackId from a /people/export response (raises if there isn't one)."""
+    track_id = body.get("trackId")
+    if not track_id:
+        raise RuntimeError(f"Ark AI did not return a trackId for batch {batch_num}. Response: {body}")
+    _log(f"Batch {batch_num} started — trackId: {track_id}, stats: {body.get('statistics', {})}")
+    return track_id
 
-        # Small delay between batch requests to be polite to the API
-        if batch_num < len(batches):
-            time.sleep(1)
 
-    # Wait for ALL webhooks to arrive
-    all_enriched = []
-    for batch_num, (track_id, event) in enumerate(zip(track_ids, events), 1):
-        _log(f"Waiting for batch {batch_num}/{len(batches)} (trackId: {track_id})...")
+def _ark_register(track_id: str, batch_num: int, wake: threading.Event):
+    """Point the webhook handler for `track_id` at `wake`."""
+    # One shared Event per enrichment run — any webhook for our trackIds wakes the wait loop
+    if _ark_bridge.register(track_id, wake):
+        _log(f"Batch {batch_num} webhook already arrived before registration!")
 
-        elapsed = 0
-        while elapsed < ARK_WEBHOOK_TIMEOUT:
-            if event.wait(timeout=ARK_POLL_INTERVAL):
-                break
-            elapsed += ARK_POLL_INTERVAL
 
-            # Poll statistics endpoint for progress
-            try:
-                stats_resp = requests.get(
-                    f"{ARK_BASE}/people/statistics/{track_id}",
-                    headers=headers,
-                    timeout=15,
-                )
-                if stats_resp.ok:
-                    stats = stats_resp.json()
-                    s = stats.get("statistics", {})
-                    state = stats.get("state", "UNKNOWN")
-                    _log(
-                        f"Batch {batch_num} progress — state: {state}, "
-                        f"total: {s.get('total', '?')}, "
-                        f"found: {s.get('found', '?')}, "
-                        f"success: {s.get('success', '?')}, "
-                        f"failed: {s.get('failed', '?')} "
-                        f"(elapsed {elapsed}s)"
-                    )
-            except Exception as exc:
-                _log(f"Statistics poll error (non-fatal): {exc}")
+def _ark_unregister(track_ids):
+    """Forget trackIds we're no longer waiting on."""
+    _ark_bridge.unregister(track_ids)
 
-        # Check if webhook arrived
-        with _ark_lock:
-            webhook_data = _ark_results.get(track_id)
 
-        # If webhook didn't arrive, try resending it
-        if webhook_data is None:
-            _log(f"Batch {batch_num} webhook not received — requesting resend...")
-            try:
-                resend_resp = requests.patch(
-                    f"{ARK_BASE}/people/notify",
-                    headers=headers,
-                    json={"trackId": track_id, "webhook": webhook_url},
-                    timeout=30,
-                )
-                _log(f"Resend response: HTTP {resend_resp.status_code} — {resend_resp.text}")
-            except Exception as exc:
-                _log(f"Resend request failed: {exc}")
+def _ark_poll_statistics(pending: dict, elapsed: int) -> dict:
+    """
+    One progress sweep over every outstanding batch (non-fatal on errors).
+    Returns trackId -> state for the batches that answered.
+    """
+    states = {}
+    for track_id, batch_num in pending.items():
+        try:
+            stats_resp = _ark_http.get(f"/people/statistics/{track_id}", timeout=15)
+            if _http_ok(stats_resp):
+                states[track_id] = _ark_progress_state(batch_num, stats_resp.json(), elapsed)
+        except Exception as exc:
+            _log(f"Statistics poll error (non-fatal): {exc}")
+    return states
 
-            # Wait up to 3 more minutes for the resent webhook
-            _log(f"Waiting up to 3 more minutes for resent webhook...")
-            resend_wait = 0
-            while resend_wait < 180:
-                if event.wait(timeout=ARK_POLL_INTERVAL):
-                    break
-                resend_wait += ARK_POLL_INTERVAL
 
-        # Retrieve results for this batch
-        with _ark_lock:
-            webhook_data = _ark_results.pop(track_id, None)
-            _ark_events.pop(track_id, None)
+def _ark_progress_state(batch_num: int, stats: dict, elapsed: int) -> str:
+    """Log one /people/statistics response and return the batch's state."""
+    s = stats.get("statistics", {})
+    state = stats.get("state", "UNKNOWN")
+    _log(
+        f"Batch {batch_num} progress — state: {state}, "
+        f"total: {s.get('total', '?')}, "
+        f"found: {s.get('found', '?')}, "
+        f"success: {s.get('success', '?')}, "
+        f"failed: {s.get('failed', '?')} "
+        f"(elapsed {elapsed}s)"
+    )
+    return state
+
+
+def _ark_state_finished(state) -> bool:
+    """True if a /people/statistics state is terminal. Logs each state not in ARK_TERMINAL_STATES once."""
+    state = str(state).upper()
+    with _ark_webhook_lock:
+        first = state not in _ark_states_seen
+        _ark_states_seen[state] += 1
+    if state in ARK_TERMINAL_STATES:
+        return True
+    if first:
+        _log(f"Ark AI statistics state {state!r} is not in ARK_TERMINAL_STATES — treating the batch as running")
+    return False
+
+
+def _ark_webhook_landed(batch_num: int, finished_at: float | None, resends: int):
+    """Log and count one webhook arrival; `finished_at` is when statistics first showed it done."""
+    with _ark_webhook_lock:
+        _ark_webhook_counts["received"] += 1
+        _ark_webhook_counts["resends"] += resends
+        if finished_at is None:
+            return
+        latency = time.time() - finished_at
+        _ark_webhook_counts["after_finished"] += 1
+        _ark_webhook_latency.add(latency)
+    _log(f"Batch {batch_num} webhook received {latency:.0f}s after export finished ({resends} resend(s))")
+
+
+def ark_webhook_stats() -> dict:
+    """Webhook arrivals, resends, finished -> received latency (s) and statistics states seen."""
+    with _ark_webhook_lock:
+        return {
+            **_ark_webhook_counts,
+            "finished_to_received_s": _ark_webhook_latency.as_dict(),
+            "states_seen": dict(_ark_states_seen),
+        }
+
 
-        if webhook_data is None:
+def _ark_request_resend(track_id: str, batch_num: int, webhook_url: str):
+    """Ask Ark AI to redeliver a batch's webhook (PATCH /people/notify)."""
+    _log(f"Batch {batch_num} webhook not received — requesting resend...")
+    try:
+        resend_resp = _ark_http.patch("/people/notify", json={"trackId": track_id, "webhook": webhook_url})
+        _log(f"Resend response: HTTP {resend_resp.status_code} — {resend_resp.text}")
+    except Exception as exc:
+        _log(f"Resend request failed: {exc}")
+
+
+class _ArkWait:
+    """
+    The decisions in waiting on Ark AI webhooks, without the waiting: when
+    the next statistics sweep is due and which batches it covers, which
+    resends are due, and the deadline. Both engines' _ark_iter_results drive
+    one of these from their own loop.
+
+    Resends are hedged: once statistics show a batch in a terminal state and
+    its webhook is ARK_RESEND_GRACE late, PATCH /people/notify is due straight
+    away and again with capped backoff. Batches that never report finished
+    still get a resend after ARK_WEBHOOK_TIMEOUT.
+    """
+
+    def __init__(self, pending: dict, deadline: float):
+        self.pending = pending   # trackId -> batch number, consumed as batches land
+        self.start = time.time()
+        self.deadline = deadline
+        self.next_sweep = self.start + ARK_POLL_INTERVAL
+        self.launched_at = {track_id: self.start for track_id in pending}
+        self.finished_at = {}   # trackId -> when statistics first showed a terminal state
+        self.next_resend = {}   # trackId -> when the next resend is due
+        self.backoff = {}       # trackId -> current resend backoff
+        self.resends = {}       # trackId -> resend requests made
+
+    def landed(self, track_id: str) -> int:
+        """A batch's webhook arrived: record it and return its batch number."""
+        batch_num = self.pending.pop(track_id)
+        _ark_webhook_landed(batch_num, self.finished_at.get(track_id), self.resends.get(track_id, 0))
+        return batch_num
+
+    def check_deadline(self, now: float):
+        """Raise TimeoutError if anything is still outstanding at the deadline."""
+        if self.pending and now >= self.deadline:
+            missing = ", ".join(f"batch {n} (trackId {t})" for t, n in self.pending.items())
             raise TimeoutError(
-                f"Ark AI webhook not received for batch {batch_num} (trackId {track_id}) "
-                f"even after resend request"
+                f"Ark AI webhook not received for {missing} within "
+                f"{int(self.deadline - self.start)}s, even after resend request"
             )
 
-        batch_leads = _parse_ark_results(webhook_data)
-        _log(f"Batch {batch_num} returned {len(batch_leads)} enriched leads")
-        all_enriched.extend(batch_leads)
+    def sweep_due(self, now: float) -> dict | None:
+        """Batches to poll statistics for now ({trackId: batch number}), or None if no sweep is due."""
+        if now < self.next_sweep:
+            return None
+        self.next_sweep = now + ARK_POLL_INTERVAL
+        return {t: n for t, n in self.pending.items() if t not in self.finished_at}
+
+    def swept(self, running: dict, states: dict, now: float):
+        """Schedule resends from one sweep's {trackId: state}."""
+        for track_id, state in states.items():
+            if _ark_state_finished(state):
+                self.finished_at[track_id] = now
+                self.next_resend[track_id] = now + ARK_RESEND_GRACE
+        for track_id in running:
+            if track_id not in self.next_resend and now - self.launched_at[track_id] >= ARK_WEBHOOK_TIMEOUT:
+                self.next_resend[track_id] = now
+
+    def resends_due(self, now: float) -> dict:
+        """{trackId: batch number} to ask for a resend now; each is rescheduled with backoff."""
+        due = {}
+        for track_id, at in self.next_resend.items():
+            if track_id in self.pending and now >= at:
+                due[track_id] = self.pending[track_id]
+                self.resends[track_id] = self.resends.get(track_id, 0) + 1
+                self.backoff[track_id] = min(
+                    self.backoff.get(track_id, ARK_RESEND_BACKOFF_MIN / 2) * 2, ARK_RESEND_BACKOFF_MAX
+                )
+                self.next_resend[track_id] = now + self.backoff[track_id]
+        return due
+
+    def wake_in(self) -> float:
+        """Seconds until something is due (sweep, resend or deadline)."""
+        wake_at = min([self.next_sweep, self.deadline] + [
+            at for track_id, at in self.next_resend.items() if track_id in self.pending
+        ])
+        return max(wake_at - time.time(), 0)
+
+
+def _ark_iter_results(pending: dict, wake: threading.Event, webhook_url: str, deadline: float):
+    """
+    Wait on every outstanding trackId at once and yield (batch_num, leads) in
+    completion order, the moment each webhook lands. Statistics sweeps,
+    hedged resends and the deadline are _ArkWait's.
+
+    `pending` maps trackId -> batch number and is consumed as batches finish.
+    """
+    waiting = _ArkWait(pending, deadline)
+
+    try:
+        while pending:
+            # Clear before checking so a webhook landing after this point re-sets it
+            wake.clear()
+            arrived = _ark_bridge.take(pending)
+
+            for track_id, webhook_data in arrived.items():
+                batch_num = waiting.landed(track_id)
+                batch_leads = _parse_ark_results(webhook_data)
+                _log(f"Batch {batch_num} returned {len(batch_leads)} enriched leads")
+                yield batch_num, batch_leads
+
+            if not pending:
+                break
+
+            now = time.time()
+            waiting.check_deadline(now)
+            running = waiting.sweep_due(now)
+            if running is not None:
+                waiting.swept(running, _ark_poll_statistics(running, int(now - waiting.start)), now)
+            for track_id, batch_num in waiting.resends_due(now).items():
+                _ark_request_resend(track_id, batch_num, webhook_url)
+
+            wake.wait(timeout=waiting.wake_in())
+    finally:
+        # Unregister anything we stopped waiting for (timeout or caller bailed out)
+        _ark_unregister(pending)
+
+
+class _ArkExports:
+    """
+    One _ark_enrich_batch call's bookkeeping: the 300-URL batches to launch,
+    batch numbers, and {trackId: batch URLs} for the checkpoint as batches
+    launch and land. `outstanding` batches (launched before a restart) are
+    numbered first.
+    """
 
-    _log(f"All {len(batches)} batch(es) complete — {len(all_enriched)} total enriched leads")
-    return all_enriched
+    def __init__(self, linkedin_urls: list[str], outstanding: dict, webhook_url: str):
+        self.batches = [linkedin_urls[i:i + ARK_BATCH_SIZE] for i in range(0, len(linkedin_urls), ARK_BATCH_SIZE)]
+        self.total = len(outstanding) + len(self.batches)
+        self.pending = {}      # trackId -> batch number
+        self.batch_urls = {}   # trackId -> URLs in that batch
+        self.track_ids = {}    # batch number -> trackId
+        self.leads = []
+        if self.batches:
+            _log(
+                f"Sending {len(linkedin_urls)} LinkedIn URLs to Ark AI in {len(self.batches)} batch(es) "
+                f"of up to {ARK_BATCH_SIZE}..."
+            )
+            _log(f"Webhook URL: {webhook_url}")
+        for track_id, urls in outstanding.items():
+            self.launched(track_id, len(self.pending) + 1, urls)
+        if outstanding:
+            _log(f"Re-attached to {len(outstanding)} Ark AI batch(es) launched before the restart")
+
+    def to_launch(self):
+        """(batch_num, urls) for every new batch."""
+        return enumerate(self.batches, len(self.pending) + 1)
+
+    def launched(self, track_id: str, batch_num: int, urls: list[str]) -> dict:
+        """Record a launched batch. Returns the outstanding {trackId: URLs}."""
+        self.pending[track_id] = batch_num
+        self.batch_urls[track_id] = urls
+        self.track_ids[batch_num] = track_id
+        return dict(self.batch_urls)
+
+    def waiting(self):
+        _log(f"Waiting for {len(self.pending)} batch(es) (deadline in {ARK_ENRICH_TIMEOUT}s)...")
+
+    def landed(self, batch_num: int, batch_leads: list[Lead]) -> list[str]:
+        """Record a landed batch. Returns the URLs it was sent with."""
+        self.leads.extend(batch_leads)
+        return self.batch_urls.pop(self.track_ids[batch_num])
+
+    def done(self) -> list[Lead]:
+        _log(f"All {self.total} batch(es) complete — {len(self.leads)} total enriched leads")
+        return self.leads
+
+
+def _ark_enrich_batch(linkedin_urls: list[str], webhook_base_url: str,
+                      outstanding: dict | None = None, on_pending=None, on_batch=None) -> list[Lead]:
+    """
+    Send LinkedIn URLs to Ark AI in batches of 300 (API limit).
+    Blocks until all webhook results arrive (or the ARK_ENRICH_TIMEOUT deadline).
+    Returns the enriched Leads.
 
+    For checkpoints: `outstanding` ({trackId: batch URLs}) re-attaches to
+    batches launched before a restart instead of paying for them again;
+    `on_pending` gets the outstanding {trackId: batch URLs} after every launch
+    and arrival, and `on_batch(batch_urls, leads)` is called as each batch lands.
+    """
+    webhook_url = f"{webhook_base_url}/webhook/ark"
+    exports = _ArkExports(linkedin_urls, dict(outstanding or {}), webhook_url)
+    deadline = time.time() + ARK_ENRICH_TIMEOUT
+    wake = threading.Event()
 
-def _parse_ark_results(webhook_data: dict) -> list[dict]:
+    for track_id, batch_num in exports.pending.items():
+        _ark_register(track_id, batch_num, wake)
+    try:
+        for batch_num, urls in exports.to_launch():
+            track_id = _ark_launch_batch(urls, batch_num, exports.total, webhook_url, wake)
+            pending_urls = exports.launched(track_id, batch_num, urls)
+            if on_pending:
+                on_pending(pending_urls)
+    except Exception:
+        _ark_unregister(exports.pending)
+        raise
+
+    exports.waiting()
+    for batch_num, batch_leads in _ark_iter_results(exports.pending, wake, webhook_url, deadline):
+        urls = exports.landed(batch_num, batch_leads)
+        if on_batch:
+            on_batch(urls, batch_leads)
+        if on_pending:
+            on_pending(dict(exports.batch_urls))
+    return exports.done()
+
+
+def _parse_ark_results(webhook_data: dict) -> list[Lead]:
     """
-    Parse the Ark AI webhook payload into our standard lead format.
+    Turn an Ark AI webhook payload into our standard lead format.
     Only includes people with a verified email (found=True, status=VALID).
+    Payloads from the webhook arrive already compacted by ark_ingest; a full
+    document is compacted here.
     """
-    people = webhook_data.get("data", [])
+    if "leads" not in webhook_data:
+        webhook_data = compact_payload(webhook_data)
     stats = webhook_data.get("statistics", {})
+    people = webhook_data.get("people", 0)
     _log(
-        f"Parsing Ark AI results — {len(people)} people, "
+        f"Parsing Ark AI results — {people} people, "
         f"stats: total={stats.get('total', '?')}, found={stats.get('found', '?')}"
     )
 
     enriched = []
-    for person in people:
-        # Find a valid, verified email
-        email_obj = person.get("email", {}) or {}
-        outputs = email_obj.get("output", []) or []
-
-        email_addr = ""
-        for entry in outputs:
-            if entry.get("found") and entry.get("status") == "VALID":
-                email_addr = entry.get("address", "")
-                break
-
-        if not email_addr:
-            continue
-
-        # Extract person details
-        summary = person.get("summary", {}) or {}
-        company_obj = person.get("company", {}) or {}
-        company_summary = company_obj.get("summary", {}) or {}
-        link_obj = person.get("link", {}) or {}
-
-        first_name = summary.get("first_name", "")
-        last_name = summary.get("last_name", "")
-        title = summary.get("title", "") or summary.get("headline", "")
-        company_name = company_summary.get("name", "")
-
-        # LinkedIn URL: prefer link.linkedin, fall back to identifier
-        linkedin_url = link_obj.get("linkedin", "") or person.get("identifier", "")
-
-        enriched.append({
-            "first_name": first_name,
-            "last_name": last_name,
-            "email": email_addr,
-            "company": company_name,
-            "title": title,
-            "linkedin_url": linkedin_url,
-        })
+    for record in webhook_data["leads"]:
+        _profile_index.link(record["linkedin_url"], record["identifier"])
+        enriched.append(Lead.from_dict(record))
 
-    _log(f"Ark AI enrichment: {len(enriched)} leads with verified emails out of {len(people)} people")
+    _log(f"Ark AI enrichment: {len(enriched)} leads with verified emails out of {people} people")
     return enriched
 
 
-def _write_enrichment_log(rows: list[dict]):
-    """Append enrichment results to enrichment_log.csv."""
+def _write_enrichment_log(enriched_leads: list[Lead], no_email_urls: list[str],
+                          screened: list[str] = ()):
+    """
+    Append enrichment results to enrichment_log.csv: one row per enriched
+    lead, per URL with no email and per URL skipped by the headline pre-screen.
+    Rows are written straight from the leads, without building copies.
+    """
     file_exists = os.path.isfile(ENRICHMENT_LOG)
     with open(ENRICHMENT_LOG, "a", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=[
-            "linkedin_url", "first_name", "last_name", "email", "company", "status",
-        ])
+        writer = csv.writer(f)
         if not file_exists:
-            writer.writeheader()
-        writer.writerows(rows)
+            writer.writerow(LOG_FIELDS)
+        writer.writerows(lead.log_row() for lead in enriched_leads)
+        writer.writerows(empty_log_row(url, "no_verified_email") for url in no_email_urls)
+        writer.writerows(empty_log_row(url, "prescreened_title") for url in screened)
 
 
 # ---------------------------------------------------------------------------
-# Step 4B — Bouncify email validation (optional)
+# Step 3A — Enrichment cache (skip Ark AI for profiles we've already looked up)
 # ---------------------------------------------------------------------------
 
-BOUNCIFY_DELAY = 0.5  # seconds between calls (120 req/min limit)
+ENRICH_CACHE_TTL = float(os.environ.get("ENRICH_CACHE_TTL_DAYS", 30)) * 86400      # found an email
+ENRICH_NEGATIVE_TTL = float(os.environ.get("ENRICH_NEGATIVE_TTL_DAYS", 7)) * 86400  # no verified email
 
+_enrichment_cache = TTLCache("enrichment")
 
-def _bouncify_verify_email(email: str) -> bool:
-    """Verify a single email via Bouncify. Returns True if deliverable."""
-    api_key = os.environ.get("BOUNCIFY_API_KEY", "")
-    if not api_key:
-        return True  # No key configured — skip validation
 
+def _profile_cache_key(url: str) -> str:
+    """Cache key for a LinkedIn profile URL (its canonical identity key)."""
+    return profile_key(url) or url.strip().rstrip("/").lower()
+
+
+def _enrichment_cache_lookup(urls: list[str]) -> tuple[list[Lead], list[str]]:
+    """
+    Split profile URLs into cached leads and URLs that still need Ark AI.
+    Cached "no verified email" entries are dropped from both lists.
+    Returns (cached_leads, urls_to_enrich). Cache failures are non-fatal.
+    """
     try:
-        resp = requests.get(
-            "https://api.bouncify.io/v1/verify",
-            params={"apikey": api_key, "email": email},
-            timeout=30,
-        )
-        if not resp.ok:
-            _log(f"Bouncify error for {email}: HTTP {resp.status_code} — keeping lead")
-            return True  # On error, keep the lead
+        entries = _enrichment_cache.get_many(_profile_cache_key(url) for url in urls)
+    except Exception as exc:
+        _log(f"Enrichment cache read failed (non-fatal): {exc}")
+        return [], list(urls)
+
+    cached_leads = []
+    to_enrich = []
+    for url in urls:
+        entry = entries.get(_profile_cache_key(url))
+        if entry is None:
+            to_enrich.append(url)
+        elif entry["status"] == "enriched":
+            cached_leads.append(Lead.from_dict(entry["lead"], linkedin_url=url))
+
+    hits = len(urls) - len(to_enrich)
+    _log(
+        f"Enrichment cache: {hits} hit(s) ({len(cached_leads)} with email), "
+        f"{len(to_enrich)} miss(es) going to Ark AI"
+    )
+    return cached_leads, to_enrich
 
-        result = resp.json().get("result", "")
-        # Accept "deliverable" emails; reject "undeliverable" and "risky"
-        return result == "deliverable"
 
+def _enrichment_cache_store(requested_urls: list[str], enriched_leads: list[Lead]):
+    """
+    Remember Ark AI outcomes: leads for ENRICH_CACHE_TTL, no-email URLs for
+    ENRICH_NEGATIVE_TTL. A lead is stored under the form Ark returned and the
+    form we asked with, so either one hits next time.
+    """
+    by_identity = {_profile_index.key(lead.linkedin_url): lead for lead in enriched_leads}
+    found = {
+        _profile_cache_key(lead.linkedin_url): {"status": "enriched", "lead": lead.as_dict()}
+        for lead in enriched_leads
+    }
+    missing = {}
+    for url in requested_urls:
+        lead = by_identity.get(_profile_index.key(url))
+        if lead is not None:
+            found[_profile_cache_key(url)] = {"status": "enriched", "lead": lead.as_dict()}
+        else:
+            missing[_profile_cache_key(url)] = {"status": "no_verified_email"}
+    try:
+        _enrichment_cache.set_many(found, ENRICH_CACHE_TTL)
+        _enrichment_cache.set_many(missing, ENRICH_NEGATIVE_TTL)
     except Exception as exc:
-        _log(f"Bouncify exception for {email}: {exc} — keeping lead")
-        return True  # On error, keep the lead
+        _log(f"Enrichment cache write failed (non-fatal): {exc}")
+
+
+# ---------------------------------------------------------------------------
+# Step 3B — Single-flight: one Ark AI lookup per profile across concurrent runs
+# ---------------------------------------------------------------------------
 
+_ark_flights = singleflight.registry("ark")   # profile cache key -> lead dict, or None (no email)
 
-def _bouncify_verify_batch(leads: list[dict]) -> tuple[list[dict], int]:
+
+def _ark_claim(urls: list[str]) -> tuple[list[str], dict, dict]:
     """
-    Validate all leads through Bouncify.
-    Returns (valid_leads, rejected_count).
-    If BOUNCIFY_API_KEY is not set, passes all leads through.
+    Split cache misses into URLs this run sends to Ark AI and URLs another
+    run is already enriching. Returns (our_urls, led flights, {url: Future}
+    of the shared ones).
     """
-    api_key = os.environ.get("BOUNCIFY_API_KEY", "")
-    if not api_key:
-        _log("BOUNCIFY_API_KEY not set — skipping email validation")
-        return leads, 0
+    led, followed = _ark_flights.claim(_profile_cache_key(url) for url in urls)
+    ours = [url for url in urls if _profile_cache_key(url) in led]
+    shared = {url: followed[_profile_cache_key(url)] for url in urls if _profile_cache_key(url) in followed}
+    if shared:
+        _log(f"Single-flight: {len(shared)} profile(s) already being enriched by another run — sharing its results")
+    return ours, led, shared
 
-    _log(f"Validating {len(leads)} emails through Bouncify...")
-    valid = []
-    rejected = 0
 
-    for i, lead in enumerate(leads):
-        email = lead["email"]
-        _log(f"Bouncify {i+1}/{len(leads)}: {email}")
+def _ark_outcomes(requested_urls: list[str], enriched_leads: list[Lead]) -> dict:
+    """{url: lead dict, or None if Ark AI found no verified email} for each requested URL."""
+    by_identity = {_profile_index.key(lead.linkedin_url): lead.as_dict() for lead in enriched_leads}
+    return {url: by_identity.get(_profile_index.key(url)) for url in requested_urls}
 
-        if _bouncify_verify_email(email):
-            valid.append(lead)
-        else:
-            _log(f"Bouncify rejected: {email}")
-            rejected += 1
 
-        if i < len(leads) - 1:
-            time.sleep(BOUNCIFY_DELAY)
+def _ark_resolve(led: dict, requested_urls: list[str], enriched_leads: list[Lead]):
+    """Publish a landed batch's outcome for the profiles we lead to runs sharing them."""
+    if not led:
+        return
+    outcomes = _ark_outcomes(requested_urls, enriched_leads)
+    _ark_flights.resolve(led, {_profile_cache_key(url): data for url, data in outcomes.items()})
+
+
+def _ark_shared_leads(results: dict) -> list[Lead]:
+    """Leads for shared profiles ({url: lead dict or None}), under the URL this run asked with."""
+    return [Lead.from_dict(data, linkedin_url=url) for url, data in results.items() if data is not None]
 
-    _log(f"Bouncify validation: {len(valid)} passed, {rejected} rejected")
-    return valid, rejected
+
+def _ark_enrich_shared(shared: dict, webhook_base_url: str) -> list[Lead]:
+    """
+    Wait for profiles another run is enriching ({url: Future}); any it gave
+    up on, or that outlast ARK_ENRICH_TIMEOUT, are sent to Ark AI here.
+    Call without holding the Ark stage slot.
+    """
+    _log(f"Waiting on {len(shared)} profile(s) another run is enriching...")
+    results, redo = _ark_flights.collect(shared, ARK_ENRICH_TIMEOUT)
+    leads = _ark_shared_leads(results)
+    if redo:
+        _log(f"Single-flight: {len(redo)} shared profile(s) not enriched by the other run — sending them ourselves")
+        if ark_batcher.ARK_BATCH_LINGER > 0:
+            leads.extend(_ark_enrich_batched(redo, on_batch=_enrichment_cache_store))
+        else:
+            with scheduler.stage_slot("ark"):
+                leads.extend(_ark_enrich_batch(redo, webhook_base_url, on_batch=_enrichment_cache_store))
+    return leads
 
 
 # ---------------------------------------------------------------------------
-# Step 5 — Instantly v2 push
+# Step 3C — Cross-run batching: concurrent runs share packed Ark AI exports
 # ---------------------------------------------------------------------------
 
-def _instantly_add_lead(lead: dict, source_post_url: str) -> str:
+def _ark_export_packed(urls: list[str], on_launch, track_id: str | None = None) -> list[Lead]:
     """
-    Add a single lead to the Instantly campaign via the v2 API.
-    Returns 'added', 'duplicate', or 'error'.
+    Send one packed batch to Ark AI and wait for its webhook; with
+    `track_id`, re-attach to an export launched before a restart instead.
+    Calls on_launch(trackId) once Ark has accepted the export.
     """
-    api_key = os.environ["INSTANTLY_API_KEY"]
+    if track_id:
+        return _ark_enrich_batch([], _webhook_base_url(), {track_id: urls})
+    return _ark_enrich_batch(urls, _webhook_base_url(), on_pending=_ark_first_launch(on_launch))
 
-    payload = {
-        "campaign": INSTANTLY_CAMPAIGN_ID,
-        "email": lead["email"],
-        "first_name": lead.get("first_name", ""),
-        "last_name": lead.get("last_name", ""),
-        "company_name": lead.get("company", ""),
-        "custom_variables": {
-            "linkedin_url": lead.get("linkedin_url", ""),
-            "source_post_url": source_post_url,
-        },
-    }
 
-    try:
-        resp = requests.post(
-            f"{INSTANTLY_BASE}/leads",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            json=payload,
-            timeout=30,
-        )
-        if resp.ok:
-            return "added"
+def _ark_first_launch(on_launch):
+    """An on_pending for a one-batch export that calls on_launch(trackId) once it's out."""
+    def launched(pending_urls: dict):
+        if pending_urls:
+            on_launch(next(iter(pending_urls)))
+    return launched
 
-        # Instantly returns 409 or an error body for duplicates
-        body = resp.text.lower()
-        if resp.status_code == 409 or "duplicate" in body or "already exists" in body:
-            return "duplicate"
 
-        _log(f"Instantly error ({resp.status_code}) for {lead['email']}: {resp.text}")
-        return "error"
+def _ark_send_packed(urls: list[str], on_launch, track_id: str | None = None) -> Future:
+    """ArkBatcher send for the threaded engine: each export is waited on in its own thread."""
+    future = Future()
 
-    except requests.RequestException as exc:
-        _log(f"Instantly request failed for {lead['email']}: {exc}")
-        return "error"
+    def run():
+        try:
+            future.set_result(_ark_export_packed(urls, on_launch, track_id))
+        except Exception as exc:
+            future.set_exception(exc)
 
+    threading.Thread(target=run, name="ark-export", daemon=True).start()
+    return future
 
-# ---------------------------------------------------------------------------
-# Main pipeline orchestrator
-# ---------------------------------------------------------------------------
 
-def run_pipeline(post_url: str):
-    """Execute the full pipeline for a given LinkedIn post URL."""
-    start = time.time()
-    _log(f"Pipeline started for {post_url}")
-    _send_slack_message(
-        f"\U0001f4e1 Got it! Starting the pipeline for:\n{post_url}\n\n"
-        f"PhantomBuster is scraping engagers now — this usually takes 5-15 minutes. "
-        f"I'll send you a full summary when it's done."
-    )
+_ark_batcher = ark_batcher.ArkBatcher(
+    "threads", _ark_send_packed, _ark_outcomes, ARK_BATCH_SIZE, scheduler.STAGE_CAPS["ark"]
+)
+
+
+def _ark_batched_leads(outcomes: dict) -> list[Lead]:
+    """Leads from batcher outcomes ({url: lead dict or None}), one per lead however many URLs matched it."""
+    distinct = {id(data): data for data in outcomes.values() if data is not None}
+    return [Lead.from_dict(data) for data in distinct.values()]
+
+
+def _ark_pending_without(pending: dict, done_urls) -> dict:
+    """Checkpoint {trackId: our URLs} minus the URLs that have landed."""
+    done_urls = set(done_urls)
+    remaining = {track_id: [url for url in urls if url not in done_urls] for track_id, urls in pending.items()}
+    return {track_id: urls for track_id, urls in remaining.items() if urls}
+
+
+class _ArkBatchedWait:
+    """
+    One _ark_enrich_batched call's bookkeeping: our {trackId: URLs} for the
+    checkpoint as the batcher launches exports and their outcomes land, and
+    the leads so far. launched() is called from the batcher's threads.
+    """
+
+    def __init__(self, linkedin_urls: list[str], outstanding: dict, on_pending=None):
+        self.pending = dict(outstanding)   # trackId -> our URLs in it
+        self.on_pending = on_pending
+        self.leads = []
+        self._lock = threading.Lock()
+        if outstanding:
+            _log(f"Re-attaching to {len(outstanding)} Ark AI batch(es) launched before the restart")
+        if linkedin_urls:
+            _log(f"Queueing {len(linkedin_urls)} LinkedIn URLs for Ark AI (batches shared with other runs)")
+
+    def launched(self, track_id: str, urls: list[str]):
+        """ArkBatcher on_launch: some of our URLs went out under `track_id`."""
+        with self._lock:
+            self.pending[track_id] = urls
+            if self.on_pending:
+                self.on_pending(dict(self.pending))
+
+    def landed(self, outcomes: dict) -> list[Lead]:
+        """Record {url: outcome} that landed. Returns their leads."""
+        batch_leads = _ark_batched_leads(outcomes)
+        self.leads.extend(batch_leads)
+        return batch_leads
+
+    def settled(self, outcomes: dict):
+        """Drop landed URLs from the checkpoint (after on_batch has cached them)."""
+        with self._lock:
+            self.pending = _ark_pending_without(self.pending, outcomes)
+            if self.on_pending:
+                self.on_pending(dict(self.pending))
+
+    def done(self) -> list[Lead]:
+        _log(f"Ark AI batches complete — {len(self.leads)} total enriched leads")
+        return self.leads
+
+
+def _ark_enrich_batched(linkedin_urls: list[str], outstanding: dict | None = None,
+                        on_pending=None, on_batch=None) -> list[Lead]:
+    """
+    _ark_enrich_batch through the cross-run batcher (ARK_BATCH_LINGER > 0):
+    our URLs go out in exports packed with other runs' and come back the
+    moment theirs lands. Same callbacks, with `on_pending` given only our
+    URLs per trackId; `outstanding` exports are re-attached through the
+    batcher so runs that shared one wait on it once. Call without an Ark
+    stage slot — the batcher holds those per export.
+    """
+    outstanding = dict(outstanding or {})
+    batched = _ArkBatchedWait(linkedin_urls, outstanding, on_pending)
+    waiting = {future: url for url, future in _ark_batcher.attach(outstanding).items()}
+    waiting.update((future, url) for url, future in _ark_batcher.submit(linkedin_urls, batched.launched).items())
 
-    # ---- Step 2: PhantomBuster (likers + commenters in parallel) ----
     try:
-        containers = _phantombuster_launch(post_url)
-    except Exception as exc:
-        _send_error("PHANTOMBUSTER LAUNCH", str(exc), post_url)
-        return
+        while waiting:
+            landed, _ = wait(waiting, return_when=FIRST_COMPLETED)
+            outcomes = {waiting.pop(future): future.result() for future in landed}
+            batch_leads = batched.landed(outcomes)
+            if on_batch:
+                on_batch(list(outcomes), batch_leads)
+            batched.settled(outcomes)
+    finally:
+        # Unsent URLs are dropped from the queue; exports already out still land for the other runs in them
+        for future in waiting:
+            future.cancel()
+    return batched.done()
+
+
+# ---------------------------------------------------------------------------
+# Step 4B — Bouncify email validation (optional)
+# ---------------------------------------------------------------------------
 
+BOUNCIFY_BASE = os.environ.get("BOUNCIFY_BASE", "https://api.bouncify.io/v1")
+BOUNCIFY_BULK_MIN = int(os.environ.get("BOUNCIFY_BULK_MIN", 25))  # smaller lists use single-email calls
+BOUNCIFY_BULK_TIMEOUT = 15 * 60      # give up on a bulk job (and fall back) after this
+BOUNCIFY_SHARED_TIMEOUT = BOUNCIFY_BULK_TIMEOUT + 60   # longest we wait on another run's verdicts
+BOUNCIFY_BULK_POLL_MIN = 3           # first bulk status check
+BOUNCIFY_BULK_POLL_MAX = 30          # cap on seconds between bulk status checks
+BOUNCIFY_DOWNLOAD_RESULTS = ["deliverable", "undeliverable", "accept_all", "unknown"]   # bulk results to download
+
+# Verdict cache — settle known outcomes without spending a rate-limited call
+BOUNCIFY_CACHE_TTL = float(os.environ.get("BOUNCIFY_CACHE_TTL_DAYS", 30)) * 86400
+BOUNCIFY_DOMAIN_TTL = float(os.environ.get("BOUNCIFY_DOMAIN_TTL_DAYS", 14)) * 86400
+# Bouncify messages (lowercased, no trailing period) that condemn a whole domain.
+# Any other undeliverable — even one mentioning the domain — is cached per email only
+BOUNCIFY_DOMAIN_FAILURES = {
+    "invalid domain", "domain does not exist", "domain not found",
+    "no mx record", "no mx records", "no mx records found", "mx record not found",
+}
+DISPOSABLE_DOMAINS_FILE = os.environ.get(
+    "DISPOSABLE_DOMAINS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "disposable_domains.txt")
+)
+
+_bouncify_http = http_client.vendor(
+    "bouncify", BOUNCIFY_BASE,
+    params=lambda: {"apikey": os.environ.get("BOUNCIFY_API_KEY", "")},
+    # 120 requests/minute account limit
+    governor=rate_governor.governor("bouncify", rate=2, burst=2, concurrency=2, max_concurrency=4),
+)
+_bouncify_cache = TTLCache("bouncify")   # "email:<addr>" / "domain:<domain>" -> {"result": ...}
+_bouncify_flights = singleflight.registry("bouncify")   # email -> result
+_disposable_domains = None
+
+
+def _email_domain(email: str) -> str:
+    return email.rsplit("@", 1)[-1].strip().lower()
+
+
+def _load_disposable_domains() -> set:
+    """Disposable-domain list shipped with the repo (loaded once)."""
+    global _disposable_domains
+    if _disposable_domains is None:
+        domains = set()
+        try:
+            with open(DISPOSABLE_DOMAINS_FILE) as f:
+                for line in f:
+                    line = line.split("#", 1)[0].strip().lower()
+                    if line:
+                        domains.add(line)
+        except OSError as exc:
+            _log(f"Could not read {DISPOSABLE_DOMAINS_FILE}: {exc}")
+        _disposable_domains = domains
+    return _disposable_domains
+
+
+def _bouncify_accepts(result: str) -> bool:
+    """Accept "deliverable" emails; reject "undeliverable" and "risky" (accept_all, unknown...)."""
+    return result == "deliverable"
+
+
+def _bouncify_known_verdicts(emails: list[str]) -> dict:
+    """
+    Verdicts we can settle without calling Bouncify, as {lowercased email: result}:
+    disposable domains, remembered catch-all / undeliverable domains, then
+    cached per-email results. Cache failures are non-fatal.
+    """
+    emails = [email.strip().lower() for email in emails]
+    disposable = _load_disposable_domains()
     try:
-        pb_data = _phantombuster_poll(containers)
+        cached = _bouncify_cache.get_many(
+            [f"email:{e}" for e in emails] + [f"domain:{_email_domain(e)}" for e in emails]
+        )
     except Exception as exc:
-        _send_error("PHANTOMBUSTER POLL", str(exc), post_url)
-        return
+        _log(f"Bouncify cache read failed (non-fatal): {exc}")
+        cached = {}
+
+    known = {}
+    for email in emails:
+        domain = _email_domain(email)
+        if domain in disposable:
+            known[email] = "disposable"
+        elif f"domain:{domain}" in cached:
+            known[email] = cached[f"domain:{domain}"]["result"]
+        elif f"email:{email}" in cached:
+            known[email] = cached[f"email:{email}"]["result"]
+    return known
+
+
+def _bouncify_remember(verdicts: dict):
+    """
+    Cache fresh verdicts ({email: (result, details)}). Catch-all results mark
+    the whole domain; an undeliverable whose message is one of
+    BOUNCIFY_DOMAIN_FAILURES (no MX / invalid domain) marks it undeliverable.
+    Errors are never cached.
+    """
+    emails = {}
+    domains = {}
+    for email, (result, details) in verdicts.items():
+        if not result:
+            continue
+        email = email.strip().lower()
+        emails[f"email:{email}"] = {"result": result}
+        message = str(details.get("message", "")).strip().lower().rstrip(".")
+        if result == "accept_all" or details.get("accept_all") in (1, True, "1"):
+            domains[f"domain:{_email_domain(email)}"] = {"result": "accept_all"}
+        elif result == "undeliverable" and message in BOUNCIFY_DOMAIN_FAILURES:
+            domains[f"domain:{_email_domain(email)}"] = {"result": "undeliverable"}
+    try:
+        _bouncify_cache.set_many(emails, BOUNCIFY_CACHE_TTL)
+        _bouncify_cache.set_many(domains, BOUNCIFY_DOMAIN_TTL)
+    except Exception as exc:
+        _log(f"Bouncify cache write failed (non-fatal): {exc}")
+
 
+def _bouncify_check_email(email: str) -> tuple[str, dict] | None:
+    """Call Bouncify's single-email endpoint. Returns (result, response body), or None on error."""
     try:
-        profile_urls = _phantombuster_parse_results(pb_data)
+        return _bouncify_checked_email(email, _bouncify_http.get("/verify", params={"email": email}))
     except Exception as exc:
-        _send_error("PHANTOMBUSTER PARSE", str(exc), post_url)
-        return
+        _log(f"Bouncify exception for {email}: {exc} — keeping lead")
+        return None
 
-    total_scraped = len(profile_urls)
-    _log(f"PhantomBuster returned {total_scraped} profiles")
 
-    if total_scraped == 0:
-        _send_error("PHANTOMBUSTER PARSE", "No profiles found in output", post_url)
-        return
+def _bouncify_checked_email(email: str, resp) -> tuple[str, dict] | None:
+    """Read a /verify response: (result, response body), or None on an error."""
+    if not _http_ok(resp):
+        _log(f"Bouncify error for {email}: HTTP {resp.status_code} — keeping lead")
+        return None
+    body = resp.json()
+    return body.get("result", ""), body
+
+
+def _bouncify_verify_email(email: str) -> bool:
+    """Verify a single email via Bouncify (cache first). Returns True if deliverable."""
+    api_key = os.environ.get("BOUNCIFY_API_KEY", "")
+    if not api_key:
+        return True  # No key configured — skip validation
+
+    known = _bouncify_known_verdicts([email]).get(email.strip().lower())
+    if known is not None:
+        return _bouncify_accepts(known)
+
+    checked = _bouncify_check_email(email)
+    if checked is None:
+        return True  # On error, keep the lead
+    _bouncify_remember({email: checked})
+    return _bouncify_accepts(checked[0])
+
+
+def _bouncify_bulk_verify(emails: list[str]) -> dict:
+    """
+    Verify a list of emails as one Bouncify bulk job: upload, wait for it to
+    complete, download the per-email results.
+    Returns {lowercased email: result}. Raises if the job fails or times out.
+    """
+    # No automatic retry — a repeated upload would start (and bill) a second job
+    resp = _bouncify_http.post("/bulk", json=_bouncify_bulk_payload(emails), timeout=60, retries=0)
+    job_id = _bouncify_bulk_job_id(resp, len(emails))
+
+    schedule = _bouncify_bulk_schedule()
+    while True:
+        time.sleep(_bouncify_bulk_next_poll(schedule, job_id))
+        status_resp = _bouncify_http.get(f"/bulk/{job_id}")
+        status_resp.raise_for_status()
+        if _bouncify_bulk_done(job_id, status_resp.json(), schedule.start):
+            break
+
+    download = _bouncify_http.post(
+        "/download", params={"jobId": job_id}, json=_bouncify_download_payload(), timeout=60,
+    )
+    download.raise_for_status()
+    return _bouncify_parse_download(job_id, download.content)
+
+
+def _bouncify_bulk_payload(emails: list[str]) -> dict:
+    """POST /bulk body: start verifying `emails` as soon as they're uploaded."""
+    return {"auto_verify": True, "emails": [{"email": email} for email in emails]}
+
+
+def _bouncify_download_payload() -> dict:
+    """POST /download body: every result type we act on."""
+    return {"filterResult": BOUNCIFY_DOWNLOAD_RESULTS}
+
+
+def _bouncify_bulk_schedule() -> _PollSchedule:
+    return _PollSchedule(BOUNCIFY_BULK_POLL_MIN, 2, BOUNCIFY_BULK_POLL_MAX, BOUNCIFY_BULK_TIMEOUT)
+
+
+def _bouncify_bulk_next_poll(schedule: _PollSchedule, job_id: str) -> float:
+    """Seconds until the next bulk status check; raises once BOUNCIFY_BULK_TIMEOUT is up."""
+    wait = schedule.next_wait()
+    if wait is None:
+        raise TimeoutError(f"Bouncify bulk job {job_id} not done after {BOUNCIFY_BULK_TIMEOUT}s")
+    return wait
+
+
+def _bouncify_bulk_job_id(resp, count: int) -> str:
+    """The job_id from a bulk upload response (raises if the upload failed or there isn't one)."""
+    if not _http_ok(resp):
+        raise RuntimeError(f"Bouncify bulk upload failed — HTTP {resp.status_code}: {resp.text}")
+    body = resp.json()
+    job_id = body.get("job_id")
+    if not job_id:
+        raise RuntimeError(f"Bouncify bulk upload returned no job_id: {body}")
+    _log(f"Bouncify bulk job {job_id} started for {count} emails")
+    return job_id
+
+
+def _bouncify_bulk_done(job_id: str, body: dict, start: float) -> bool:
+    """Read a bulk job status response: True once completed; raises if the job failed."""
+    status = body.get("status", "")
+    _log(f"Bouncify bulk job {job_id} status: {status} (elapsed {int(time.time() - start)}s)")
+    if status in ("failed", "cancelled", "unverified"):
+        raise RuntimeError(f"Bouncify bulk job {job_id} ended with status: {status}")
+    return status == "completed"
+
+
+def _bouncify_parse_download(job_id: str, content: bytes) -> dict:
+    """Bulk job results CSV -> {lowercased email: result}."""
+    import io
+
+    results = {}
+    for row in csv.DictReader(io.StringIO(content.decode("utf-8-sig"))):
+        fields = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+        email = fields.get("email") or fields.get("email address") or ""
+        result = fields.get("verification result") or fields.get("result") or ""
+        if email:
+            results[email.lower()] = result.lower().replace(" ", "_")
+    _log(f"Bouncify bulk job {job_id} returned {len(results)} results")
+    return results
+
+
+def _bouncify_verify_batch(leads: list[Lead]) -> tuple[list[Lead], int]:
+    """
+    Validate all leads through Bouncify.
+    Verdicts already known (disposable / remembered domains, cached emails)
+    are settled locally. If BOUNCIFY_BULK_MIN or more remain they go through
+    one bulk job; smaller lists, or a failed bulk job, use the single-email
+    endpoint.
+    Returns (valid_leads, rejected_count).
+    If BOUNCIFY_API_KEY is not set, passes all leads through.
+    """
+    if not _bouncify_enabled():
+        return leads, 0
 
-    # ---- Step 3: Ark AI batch enrichment ----
-    webhook_base_url = os.environ.get("BASE_URL", "https://web-production-e430.up.railway.app")
+    verdicts, to_check, led, shared = _bouncify_plan(leads)
     try:
-        enriched_leads = _ark_enrich_batch(profile_urls, webhook_base_url)
-    except Exception as exc:
-        _send_error("ARK AI ENRICHMENT", str(exc), post_url)
-        return
+        if len(to_check) >= BOUNCIFY_BULK_MIN:
+            try:
+                results = _bouncify_bulk_verify([lead.email for lead in to_check])
+            except Exception as exc:
+                _log(f"Bouncify bulk verification failed ({exc}) — falling back to single-email checks")
+            else:
+                _bouncify_bulk_settled(results, verdicts, led)
+                to_check = []
+
+        for i, lead in enumerate(to_check):
+            _log(f"Bouncify {i+1}/{len(to_check)}: {lead.email}")
+            _bouncify_settled({lead.email: _bouncify_check_email(lead.email)}, verdicts, led)
+    finally:
+        _bouncify_flights.abandon(led)
+
+    if shared:
+        redo = _bouncify_shared_settled(_bouncify_flights.collect(shared, BOUNCIFY_SHARED_TIMEOUT), verdicts)
+        _bouncify_settled({email: _bouncify_check_email(email) for email in redo}, verdicts)
+
+    return _bouncify_split(leads, verdicts)
+
+
+def _bouncify_enabled() -> bool:
+    if not os.environ.get("BOUNCIFY_API_KEY", ""):
+        _log("BOUNCIFY_API_KEY not set — skipping email validation")
+        return False
+    return True
+
+
+def _bouncify_plan(leads: list[Lead]) -> tuple[dict, list[Lead], dict, dict]:
+    """
+    Settle what we can locally and claim the rest. Returns ({lowercased
+    email: result} known so far, leads this run checks, led flights,
+    {email: Future} another run is checking).
+    """
+    _log(f"Validating {len(leads)} emails through Bouncify...")
+    verdicts = _bouncify_known_verdicts([lead.email for lead in leads])
+    to_check = [lead for lead in leads if lead.email.strip().lower() not in verdicts]
+    _log(f"Bouncify cache: {len(leads) - len(to_check)} settled locally, {len(to_check)} need the API")
+    to_check, led, shared = _bouncify_claim(to_check)
+    if shared:
+        _log(f"Bouncify: {len(shared)} email(s) already being verified by another run — sharing its verdicts")
+    return verdicts, to_check, led, shared
+
 
-    total_enriched = len(enriched_leads)
-    skipped_no_email = total_scraped - total_enriched
-    _log(f"Enriched {total_enriched} leads, skipped {skipped_no_email}")
-
-    # Build enrichment log from batch results
-    log_rows = []
-    enriched_urls = {lead["linkedin_url"] for lead in enriched_leads}
-    for lead in enriched_leads:
-        log_rows.append({
-            "linkedin_url": lead["linkedin_url"],
-            "first_name": lead["first_name"],
-            "last_name": lead["last_name"],
-            "email": lead["email"],
-            "company": lead["company"],
-            "status": "enriched",
+def _bouncify_bulk_settled(results: dict, verdicts: dict, led: dict):
+    """Record a bulk job's {email: result}; emails it didn't return go back to sharers to retry."""
+    _bouncify_remember({email: (result, {}) for email, result in results.items()})
+    verdicts.update(results)
+    _bouncify_flights.resolve(led, {email: results.get(email, singleflight.ABANDONED) for email in list(led)})
+
+
+def _bouncify_settled(checked: dict, verdicts: dict, led: dict | None = None):
+    """
+    Record single-email checks ({email: (result, body) or None on error}) and
+    publish them to runs sharing `led` flights. Errors are never cached, and
+    never shared — a sharing run tries again itself.
+    """
+    fresh = {email: result for email, result in checked.items() if result is not None}
+    if fresh:
+        _bouncify_remember(fresh)
+    verdicts.update({email.strip().lower(): result[0] for email, result in fresh.items()})
+    if led:
+        _bouncify_flights.resolve(led, {
+            email.strip().lower(): result[0] if result else singleflight.ABANDONED
+            for email, result in checked.items()
         })
-    for url in profile_urls:
-        if url not in enriched_urls:
-            log_rows.append({
-                "linkedin_url": url,
-                "first_name": "", "last_name": "", "email": "", "company": "",
-                "status": "no_verified_email",
-            })
-
-    # Write enrichment log
+
+
+def _bouncify_shared_settled(collected: tuple[dict, list], verdicts: dict) -> list[str]:
+    """Take another run's verdicts from collect(). Returns the emails to check ourselves."""
+    results, redo = collected
+    verdicts.update(results)
+    return redo
+
+
+def _bouncify_claim(leads: list[Lead]) -> tuple[list[Lead], dict, dict]:
+    """
+    Split leads needing the API into ones this run verifies and ones another
+    run is already verifying. Returns (our_leads, led flights, {email: Future}
+    of the shared ones).
+    """
+    led, shared = _bouncify_flights.claim(lead.email_key for lead in leads)
+    return [lead for lead in leads if lead.email_key in led], led, shared
+
+
+def _bouncify_split(leads: list[Lead], verdicts: dict) -> tuple[list[Lead], int]:
+    """Apply {lowercased email: result} to `leads`. Returns (valid_leads, rejected_count)."""
+    valid = []
+    rejected = 0
+    for lead in leads:
+        result = verdicts.get(lead.email.strip().lower())
+        if result is None or _bouncify_accepts(result):
+            valid.append(lead)  # No verdict means an error — keep the lead
+        else:
+            _log(f"Bouncify rejected: {lead.email} ({result})")
+            rejected += 1
+
+    _log(f"Bouncify validation: {len(valid)} passed, {rejected} rejected")
+    return valid, rejected
+
+
+# ---------------------------------------------------------------------------
+# Step 5 — Instantly v2 push
+# ---------------------------------------------------------------------------
+
+def _instantly_add_lead(lead: Lead, source_post_url: str) -> str:
+    """
+    Add a single lead to the Instantly campaign via the v2 API.
+    Returns 'added', 'duplicate', or 'error'.
+    """
     try:
-        _write_enrichment_log(log_rows)
-    except Exception as exc:
-        _log(f"Failed to write enrichment log: {exc}")
+        # No automatic retry — a timed-out add may have landed; the caller counts it as an error
+        resp = _instantly_http.post("/leads", json=_instantly_lead_payload(lead, source_post_url), retries=0)
+    except requests.RequestException as exc:
+        _log(f"Instantly request failed for {lead.email}: {exc}")
+        return "error"
+    return _instantly_add_outcome(lead, resp.status_code, resp.text)
+
+
+def _instantly_lead_payload(lead: Lead, source_post_url: str) -> dict:
+    """POST /leads body for one lead."""
+    # NOTE: "campaign", never "campaign_id" — v2 silently ignores campaign_id
+    return {"campaign": INSTANTLY_CAMPAIGN_ID, **lead.instantly_payload(source_post_url)}
+
+
+def _instantly_add_outcome(lead: Lead, status_code: int, text: str) -> str:
+    """'added', 'duplicate' or 'error' for a POST /leads response."""
+    if 200 <= status_code < 400:
+        return "added"
+
+    # Instantly returns 409 or an error body for duplicates
+    body = text.lower()
+    if status_code == 409 or "duplicate" in body or "already exists" in body:
+        return "duplicate"
 
-    # ---- Step 4: Title filter ----
+    _log(f"Instantly error ({status_code}) for {lead.email}: {text}")
+    return "error"
+
+
+def _instantly_add_leads_bulk(leads: list[Lead], source_post_url: str) -> dict:
+    """
+    Add one chunk of leads through Instantly v2's bulk endpoint (POST /leads/add).
+    Returns {lowercased email: 'added' | 'duplicate' | 'error'}. A failed
+    request, or leads the response can't account for, are retried one by one
+    through _instantly_add_lead.
+    """
     try:
-        kept_leads, dropped_count = filter_leads(enriched_leads)
-    except Exception as exc:
-        _send_error("TITLE FILTER", str(exc), post_url)
-        return
+        # No automatic retry — on failure the chunk goes lead by lead instead
+        resp = _instantly_http.post(
+            "/leads/add",
+            json=_instantly_bulk_payload(leads, source_post_url),
+            timeout=60,
+            retries=0,
+        )
+    except requests.RequestException as exc:
+        _log(f"Instantly bulk request failed ({exc}) — retrying {len(leads)} leads one by one")
+        resp = None
+    results, retry = _instantly_bulk_read(leads, resp)
 
-    _log(f"Title filter: {len(kept_leads)} kept, {dropped_count} dropped")
+    for lead in retry:
+        results[lead.email.lower()] = _instantly_add_lead(lead, source_post_url)
+    return results
+
+
+def _instantly_bulk_read(leads: list[Lead], resp) -> tuple[dict, list[Lead]]:
+    """
+    Read a POST /leads/add response (None if the request failed). Returns
+    ({lowercased email: result} it accounts for, leads to retry one by one).
+    """
+    if resp is None:
+        return {}, leads
+    if not _http_ok(resp):
+        _log(f"Instantly bulk error ({resp.status_code}): {resp.text} — retrying {len(leads)} leads one by one")
+        return {}, leads
+    return _instantly_bulk_outcome(leads, resp.json())
 
-    # ---- Step 4B: Bouncify email validation ----
+
+def _instantly_bulk_payload(leads: list[Lead], source_post_url: str) -> dict:
+    """POST /leads/add body for one chunk."""
+    return {
+        "campaign": INSTANTLY_CAMPAIGN_ID,
+        "leads": [lead.instantly_payload(source_post_url) for lead in leads],
+    }
+
+
+def _instantly_bulk_outcome(leads: list[Lead], body: dict) -> tuple[dict, list[Lead]]:
+    """
+    Read a successful POST /leads/add response. Returns ({lowercased email:
+    result} for the leads it accounts for, leads to retry one by one).
+    """
+    results = {}
+    uploaded = body.get("leads_uploaded", 0) or 0
+    duplicated = (body.get("duplicated_leads", 0) or 0) + (body.get("skipped_count", 0) or 0)
+    created = body.get("created_leads")
+
+    if created is not None:
+        created_emails = {str(c.get("email", "")).lower() for c in created}
+        rest = [lead for lead in leads if lead.email.lower() not in created_emails]
+        for email in created_emails:
+            results[email] = "added"
+        if duplicated >= len(rest):
+            results.update({lead.email.lower(): "duplicate" for lead in rest})
+            return results, []
+        # Some were rejected for another reason — let the single endpoint say which
+        return results, rest
+    if uploaded == len(leads):
+        return {lead.email.lower(): "added" for lead in leads}, []
+    if duplicated == len(leads):
+        return {lead.email.lower(): "duplicate" for lead in leads}, []
+    _log(f"Instantly bulk response didn't list created leads: {body} — retrying one by one")
+    return results, leads
+
+
+# Emails known to be in the campaign — skipped without calling Instantly
+_campaign_ledger = CampaignLedger(INSTANTLY_CAMPAIGN_ID)
+_campaign_ledger_lock = threading.Lock()
+_instantly_flights = singleflight.registry("instantly")   # email -> 'added' | 'duplicate' | 'error'
+INSTANTLY_SHARED_TIMEOUT = 10 * 60   # longest we wait on another run pushing the same lead
+
+
+def _instantly_list_campaign_emails() -> list[str]:
+    """Page through POST /leads/list and return every email in the campaign."""
+    emails = []
+    cursor = None
+    while True:
+        resp = _instantly_http.post("/leads/list", json=_instantly_list_payload(cursor), timeout=60)
+        resp.raise_for_status()
+        cursor = _instantly_list_page(resp.json(), emails)
+        if not cursor:
+            return emails
+
+
+def _instantly_list_payload(cursor: str | None) -> dict:
+    """POST /leads/list body for the page after `cursor`."""
+    payload = {"campaign": INSTANTLY_CAMPAIGN_ID, "limit": INSTANTLY_LIST_PAGE_SIZE}
+    if cursor:
+        payload["starting_after"] = cursor
+    return payload
+
+
+def _instantly_list_page(body: dict, emails: list) -> str | None:
+    """Append one /leads/list page's emails. Returns the next cursor, or None after the last page."""
+    items = body.get("items", [])
+    emails.extend(item["email"] for item in items if item.get("email"))
+    cursor = body.get("next_starting_after")
+    return cursor if items and cursor else None
+
+
+def _instantly_ledger_sync() -> int:
+    """Replace the local ledger with the campaign's current leads. Returns the lead count."""
+    with _campaign_ledger_lock:
+        emails = _instantly_list_campaign_emails()
+        _campaign_ledger.replace_all(emails)
+    _log(f"Instantly ledger synced: {len(emails)} leads in campaign")
+    return len(emails)
+
+
+def _instantly_ledger_ready() -> bool:
+    """Seed the ledger on first use. False if it's disabled or seeding failed."""
+    if not INSTANTLY_LEDGER:
+        return False
+    if _campaign_ledger.last_sync():
+        return True
     try:
-        verified_leads, bouncify_rejected = _bouncify_verify_batch(kept_leads)
+        with _campaign_ledger_lock:
+            # Another thread may have seeded it while we waited
+            if _campaign_ledger.last_sync():
+                return True
+            emails = _instantly_list_campaign_emails()
+            _campaign_ledger.replace_all(emails)
+        _log(f"Instantly ledger seeded: {len(emails)} leads in campaign")
+        return True
     except Exception as exc:
-        _send_error("BOUNCIFY VALIDATION", str(exc), post_url)
-        return
+        # Not fatal — every lead just goes to Instantly, which dedupes anyway
+        _log(f"Instantly ledger seeding failed ({exc}) — pushing without it")
+        return False
 
-    _log(f"Bouncify: {len(verified_leads)} verified, {bouncify_rejected} rejected")
 
-    # ---- Step 5: Instantly push ----
-    added_count = 0
-    duplicates_skipped = 0
-    errors_count = 0
+def _instantly_push(leads: list[Lead], source_post_url: str, on_chunk=None) -> tuple[int, int, int]:
+    """
+    Push leads to Instantly in chunks of INSTANTLY_BULK_SIZE (or one by one
+    if INSTANTLY_BULK is off). Leads already in the campaign ledger count as
+    duplicates without a request. `on_chunk`, if given, is called with
+    {lowercased email: 'added' | 'duplicate' | 'error'} as each chunk settles.
+    Returns (added, duplicates, errors).
+    """
+    counts = Counter()
+    use_ledger = _instantly_ledger_ready()
+    ours, led, shared, shared_leads = _instantly_plan(leads, counts, use_ledger, on_chunk)
+    try:
+        _instantly_push_chunks(ours, source_post_url, counts, use_ledger, on_chunk, led)
+    finally:
+        _instantly_flights.abandon(led)
+
+    if shared_leads:
+        results, _ = _instantly_flights.collect(shared, INSTANTLY_SHARED_TIMEOUT)
+        retry = _instantly_settle_shared(shared_leads, results, counts, use_ledger, on_chunk)
+        _instantly_push_chunks(retry, source_post_url, counts, use_ledger, on_chunk)
+
+    return counts["added"], counts["duplicate"], counts["error"]
+
 
-    for i, lead in enumerate(verified_leads):
-        _log(f"Pushing to Instantly {i+1}/{len(verified_leads)}: {lead['email']}")
+def _instantly_plan(leads: list[Lead], counts: Counter, use_ledger: bool,
+                    on_chunk=None) -> tuple[list[Lead], dict, dict, list[Lead]]:
+    """
+    Skip leads the ledger already holds and claim the rest. Returns (leads
+    this run pushes, led flights, {email: Future} of leads a concurrent run
+    is pushing, those leads).
+    """
+    leads = _instantly_ledger_skip(leads, counts, use_ledger, on_chunk)
+    # The same lead pushed by a concurrent run is left to that run
+    led, shared = _instantly_flights.claim(lead.email.lower() for lead in leads)
+    shared_leads = [lead for lead in leads if lead.email.lower() in shared]
+    if shared_leads:
+        _log(f"Instantly: {len(shared_leads)} lead(s) already being pushed by another run — sharing its results")
+    return [lead for lead in leads if lead.email.lower() in led], led, shared, shared_leads
+
+
+def _instantly_push_chunks(leads: list[Lead], source_post_url: str, counts: Counter,
+                           use_ledger: bool, on_chunk=None, led: dict | None = None):
+    """_instantly_push's request loop; results are published to runs sharing `led` flights."""
+    for chunk in _instantly_chunks(leads):
         try:
-            result = _instantly_add_lead(lead, post_url)
-            if result == "added":
-                added_count += 1
-            elif result == "duplicate":
-                duplicates_skipped += 1
+            if len(chunk) == 1:
+                results = {chunk[0].email.lower(): _instantly_add_lead(chunk[0], source_post_url)}
             else:
-                errors_count += 1
+                results = _instantly_add_leads_bulk(chunk, source_post_url)
         except Exception as exc:
-            _log(f"Instantly exception for {lead['email']}: {exc}")
-            errors_count += 1
+            _log(f"Instantly exception for chunk starting {chunk[0].email}: {exc}")
+            results = {}
+        _instantly_chunk_settled(chunk, results, counts, use_ledger, on_chunk, led)
 
-        if i < len(verified_leads) - 1:
-            time.sleep(INSTANTLY_DELAY)
 
-    # ---- Step 6: Slack summary ----
+def _instantly_chunks(leads: list[Lead]):
+    """Leads in request-sized chunks (INSTANTLY_BULK_SIZE, or 1 with INSTANTLY_BULK off)."""
+    chunk_size = INSTANTLY_BULK_SIZE if INSTANTLY_BULK else 1
+    for i in range(0, len(leads), chunk_size):
+        chunk = leads[i:i + chunk_size]
+        _log(f"Pushing to Instantly {i+1}-{i+len(chunk)}/{len(leads)}")
+        yield chunk
+
+
+def _instantly_chunk_settled(chunk: list[Lead], results: dict, counts: Counter, use_ledger: bool,
+                             on_chunk=None, led: dict | None = None):
+    """Settle one pushed chunk and publish its results to runs sharing `led` flights."""
+    settled = _instantly_settle(chunk, results, counts, use_ledger, on_chunk)
+    if led:
+        _instantly_flights.resolve(led, settled)
+
+
+def _instantly_ledger_skip(leads: list[Lead], counts: Counter, use_ledger: bool, on_chunk=None) -> list[Lead]:
+    """
+    Drop leads the campaign ledger already holds, counting them as duplicates
+    in `counts`. Returns the leads still to push.
+    """
+    if use_ledger and leads:
+        known = _campaign_ledger.contains(lead.email for lead in leads)
+        if known:
+            fresh = [lead for lead in leads if lead.email.lower() not in known]
+            counts["duplicate"] += len(leads) - len(fresh)
+            _log(f"Instantly ledger: {len(leads) - len(fresh)} leads already in campaign, skipped")
+            if on_chunk:
+                on_chunk({email: "duplicate" for email in known})
+            leads = fresh
+    return leads
+
+
+def _instantly_settle(chunk: list[Lead], results: dict, counts: Counter, use_ledger: bool,
+                      on_chunk=None) -> dict:
+    """
+    Count one pushed chunk's results (missing = 'error') and record them in
+    the ledger. Returns {lowercased email: result} for the chunk.
+    """
+    settled = {}
+    for lead in chunk:
+        result = settled[lead.email.lower()] = results.get(lead.email.lower(), "error")
+        counts[result if result in ("added", "duplicate") else "error"] += 1
+    if on_chunk:
+        on_chunk(settled)
+
+    if use_ledger:
+        # Duplicates are in the campaign too — no point asking about them again
+        _campaign_ledger.add(
+            email for email, result in results.items() if result in ("added", "duplicate")
+        )
+    return settled
+
+
+def _instantly_settle_shared(leads: list[Lead], results: dict, counts: Counter, use_ledger: bool,
+                             on_chunk=None) -> list[Lead]:
+    """
+    Count leads another run got into the campaign as duplicates — from this
+    post's side they were already there. Returns the ones it didn't (error
+    or still pending), for this run to push itself.
+    """
+    done = [lead for lead in leads if results.get(lead.email.lower()) in ("added", "duplicate")]
+    if done:
+        _instantly_settle(done, {lead.email.lower(): "duplicate" for lead in done}, counts, use_ledger, on_chunk)
+    return [lead for lead in leads if results.get(lead.email.lower()) not in ("added", "duplicate")]
+
+
+# ---------------------------------------------------------------------------
+# Main pipeline orchestrator
+# ---------------------------------------------------------------------------
+
+# Streaming mode: overlap scrape -> enrich -> filter -> validate -> push per batch
+PIPELINE_STREAMING = os.environ.get("PIPELINE_STREAMING", "").lower() in ("1", "true", "yes")
+# "threads" (worker threads, the default) or "asyncio" (every run on one event loop — async_pipeline.py)
+PIPELINE_ENGINE = os.environ.get("PIPELINE_ENGINE", "threads").lower()
+
+
+def _dedupe_leads_by_email(leads: list[Lead], seen_emails: set) -> list[Lead]:
+    """Drop leads whose email is already in `seen_emails` (updated in place)."""
+    unique = []
+    for lead in leads:
+        email = lead.email.strip().lower()
+        if email in seen_emails:
+            _log(f"Duplicate person dropped: {lead.email} ({lead.linkedin_url})")
+            continue
+        seen_emails.add(email)
+        unique.append(lead)
+    return unique
+
+
+def _no_email_urls(profile_urls: list[str], enriched_leads: list[Lead]) -> list[str]:
+    """Scraped URLs that produced no lead, matched by profile identity, not string."""
+    enriched_urls = {_profile_index.key(lead.linkedin_url) for lead in enriched_leads}
+    return [url for url in profile_urls if _profile_index.key(url) not in enriched_urls]
+
+
+def _send_summary(post_url: str, start: float, stats: dict):
+    """Format the run counters in `stats` and post the summary to Slack."""
+    summary = _format_summary(post_url, start, stats)
+    _log(summary)
+    _log(f"HTTP clients: {http_client.stats()}")
+    _log(f"Rate governors: {rate_governor.stats()}")
+    _send_slack_message(summary)
+
+
+def _format_summary(post_url: str, start: float, stats: dict) -> str:
+    """The Slack run summary for the counters in `stats`."""
     elapsed = time.time() - start
     mins = int(elapsed // 60)
     secs = int(elapsed % 60)
+    total_scraped = stats["total_scraped"]
+    total_enriched = stats["total_enriched"]
     enriched_pct = round((total_enriched / total_scraped) * 100) if total_scraped else 0
+    pb_timing = stats["pb_timing"]
+
+    prescreen_line = ""
+    if PB_TITLE_PRESCREEN:
+        prescreen_line = f"\U0001f9f9 Skipped by headline pre-screen (Ark lookups saved): {stats['prescreened']}\n"
+
+    shared_note = ""
+    if stats.get("ark_shared"):
+        shared_note = f", {stats['ark_shared']} shared with a concurrent run"
 
     bouncify_line = ""
     if os.environ.get("BOUNCIFY_API_KEY"):
-        bouncify_line = f"\U0001f50d Bouncify rejected: {bouncify_rejected}\n"
+        bouncify_line = f"\U0001f50d Bouncify rejected: {stats['bouncify_rejected']}\n"
 
-    summary = (
+    return (
         f"\u2705 Pipeline complete for:\n{post_url}\n\n"
         f"\U0001f465 Engagers scraped: {total_scraped}\n"
         f"\U0001f4e7 Emails enriched by Ark AI: {total_enriched} ({enriched_pct}%)\n"
-        f"\U0001f3af Passed title filter: {len(kept_leads)}\n"
-        f"\U0001f6ab Filtered out by title: {dropped_count}\n"
+        f"\U0001f3af Passed title filter: {stats['kept']}\n"
+        f"\U0001f6ab Filtered out by title: {stats['dropped']}\n"
+        f"{prescreen_line}"
         f"{bouncify_line}"
-        f"\u23ed\ufe0f Skipped (no email found): {skipped_no_email}\n"
-        f"\u2795 Added to Instantly campaign: {added_count}\n"
-        f"\U0001f501 Duplicates skipped: {duplicates_skipped}\n"
+        f"\u23ed\ufe0f Skipped (no email found): {stats['no_email']}\n"
+        f"\u2795 Added to Instantly campaign: {stats['added']}\n"
+        f"\U0001f501 Duplicates skipped: {stats['duplicates']}\n"
+        f"\U0001f5c4 Enrichment cache: {stats['cache_hits']} hits, {stats['cache_misses']} sent to Ark AI"
+        f"{shared_note}\n"
+        f"\U0001f577 PhantomBuster: ran {int(pb_timing['runtime'])}s, waited {int(pb_timing['waited'])}s\n"
         f"\u23f1 Total time: {mins} mins {secs} secs"
     )
 
-    _log(summary)
-    _send_slack_message(summary)
+
+def _start_message(post_url: str, step: str) -> str:
+    """Slack message for a run starting, or resuming from checkpoint `step`."""
+    if step != RUN_STEPS[0]:
+        return (
+            f"\u267b\ufe0f Picking the pipeline back up after a restart for:\n{post_url}\n\n"
+            f"Resuming from the last checkpoint ({step}) — nothing already paid for is redone."
+        )
+    return (
+        f"\U0001f4e1 Got it! Starting the pipeline for:\n{post_url}\n\n"
+        f"PhantomBuster is scraping engagers now — this usually takes 5-15 minutes. "
+        f"I'll send you a full summary when it's done."
+    )
+
+
+# Durable checkpoints: each run's progress is saved at every step boundary
+# (in this order) so a restart resumes it instead of paying for it again
+RUN_STEPS = ["queued", "launched", "scraped", "enriching", "verified", "pushing"]
+RUN_MAX_RESUMES = 3   # give up on a run that keeps dying at the same point
+
+_runs = RunStore()
+
+
+def run_pipeline(post_url: str, run_id: str | None = None):
+    """
+    Execute the full pipeline for a given LinkedIn post URL.
+    With the `run_id` of an interrupted run (see checkpoints.py), carries on
+    from its last checkpoint.
+    """
+    if run_id is None:
+        run_id = _runs.create(post_url)
+    ok = False
+    try:
+        ok = _run_pipeline(post_url, run_id)
+    finally:
+        # If the process dies mid-run we never get here, and the run stays resumable
+        _runs.finish(run_id, "done" if ok else "failed")
+
+
+class _RunProgress:
+    """
+    One run's checkpoint state machine, shared by both engines: which steps a
+    resumed run skips, what it carries over from its checkpoint, what each
+    step boundary saves, and the counters for the summary. Transitions write
+    through _runs (local SQLite — the asyncio engine calls them in a thread);
+    vendor calls and error reporting stay in the engines.
+    """
+
+    def __init__(self, run_id: str, post_url: str):
+        run = _runs.get(run_id) or {"step": "queued", "state": {}}
+        self.run_id = run_id
+        self.post_url = post_url
+        self.step, self.state = run["step"], run["state"]
+        self.done = RUN_STEPS.index(self.step)
+        self.resumes = self.state.get("resumes", 0) + (self.done > 0)
+        self.start = self.state.get("started_at", time.time())
+        self.ark_led = {}
+        self.counts = {}
+        self.pushed = self.state.get("pushed", {}) if self.step == "pushing" else {}   # email -> result
+
+    def _save(self, step: str, **fields):
+        _runs.save(self.run_id, step, **fields)
+
+    def before(self, step: str) -> bool:
+        """True if the run hasn't passed `step`'s checkpoint yet."""
+        return self.done < RUN_STEPS.index(step)
+
+    def begin(self) -> str | None:
+        """Record the (re)start. Returns an error if the run keeps dying and should be given up."""
+        if self.resumes > RUN_MAX_RESUMES:
+            return f"Gave up after {RUN_MAX_RESUMES} restarts at step '{self.step}'"
+        self._save(self.step, started_at=self.start, resumes=self.resumes)
+        if self.done:
+            _log(f"Pipeline resumed for {self.post_url} from checkpoint '{self.step}'")
+        else:
+            _log(f"Pipeline started for {self.post_url}")
+        return None
+
+    def start_message(self) -> str:
+        return _start_message(self.post_url, self.step)
+
+    # ---- PhantomBuster ----
+
+    def launched(self, containers: dict):
+        self._save("launched", containers=containers)
+
+    def relaunched(self) -> dict:
+        """Containers launched before the restart."""
+        containers = self.state["containers"]
+        _log(f"Re-attaching to PhantomBuster containers: {containers}")
+        return containers
+
+    def stream_pending(self, pending_urls: dict):
+        """Streaming on_pending: checkpoint the Ark exports still outstanding alongside the containers."""
+        self._save("launched", ark_pending=pending_urls)
+
+    def stream_outstanding(self) -> dict:
+        """{trackId: URLs} a streaming run had out with Ark AI before the restart."""
+        return self.state.get("ark_pending", {}) if self.step == "launched" else {}
+
+    def scraped(self, profile_urls: list[str], screened: list | None, pb_timing: dict) -> str | None:
+        """Checkpoint the scrape. Returns an error if it found nobody."""
+        _log(
+            f"PhantomBuster ran {pb_timing['runtime']:.0f}s, we waited {pb_timing['waited']:.0f}s "
+            f"(noticed finish {pb_timing['lag']:.0f}s after it ended)"
+        )
+        screened = screened or []
+        if not profile_urls and not screened:
+            return "No profiles found in output"
+        self._save("scraped", profile_urls=profile_urls, screened=screened, pb_timing=pb_timing)
+        self._scraped(profile_urls, screened, pb_timing)
+        return None
+
+    def restore_scraped(self):
+        self._scraped(self.state["profile_urls"], self.state["screened"], self.state["pb_timing"])
+
+    def _scraped(self, profile_urls: list[str], screened: list[str], pb_timing: dict):
+        self.profile_urls, self.screened, self.pb_timing = profile_urls, screened, pb_timing
+        self.total_scraped = len(profile_urls) + len(screened)
+        _log(f"PhantomBuster returned {self.total_scraped} profiles")
+
+    # ---- Ark AI ----
+
+    def enrichment_plan(self) -> tuple[list[Lead], list[str], dict, dict]:
+        """
+        Cache lookup and single-flight claim for the scraped profiles.
+        Returns (cached leads, URLs to send, {trackId: URLs} launched before a
+        restart, {url: Future} another run is enriching).
+        """
+        # Finished batches are in the enrichment cache, so after a restart only
+        # the outstanding ones are waited on (and nothing is sent twice)
+        cached_leads, to_enrich = _enrichment_cache_lookup(self.profile_urls)
+        # ("launched" carries exports a streaming run had out when it stopped)
+        outstanding = self.state.get("ark_pending", {}) if self.step in ("launched", "enriching") else {}
+        in_flight = {url for urls in outstanding.values() for url in urls}
+        # Profiles a concurrent run is already enriching are shared, not sent twice
+        to_launch, self.ark_led, shared = _ark_claim([url for url in to_enrich if url not in in_flight])
+        self.cache_counts = {
+            "cache_hits": self.state.get("cache_hits", len(self.profile_urls) - len(to_enrich)),
+            "cache_misses": self.state.get("cache_misses", len(to_enrich) - len(shared)),
+            "ark_shared": self.state.get("ark_shared", len(shared)),
+        }
+        return cached_leads, to_launch, outstanding, shared
+
+    def ark_pending(self, pending_urls: dict):
+        """on_pending: checkpoint the Ark exports still outstanding."""
+        self._save("enriching", ark_pending=pending_urls, **self.cache_counts)
+
+    def ark_landed(self, urls: list[str], batch_leads: list[Lead]):
+        """on_batch: cache a landed batch and hand it to runs sharing its profiles."""
+        _enrichment_cache_store(urls, batch_leads)
+        _ark_resolve(self.ark_led, urls, batch_leads)
+
+    def ark_abandon(self):
+        """Free runs still waiting on profiles we led — anything unanswered by now never will be."""
+        _ark_flights.abandon(self.ark_led)
+
+    def enriched(self, enriched_leads: list[Lead]) -> list[Lead]:
+        """One lead per email, with the no-email count and the enrichment log written."""
+        # Same person can come back under two URLs — one lead per email from here on
+        enriched_leads = _dedupe_leads_by_email(enriched_leads, set())
+        no_email_urls = _no_email_urls(self.profile_urls, enriched_leads)
+        self.counts = {"total_enriched": len(enriched_leads), "no_email": len(no_email_urls)}
+        _log(f"Enriched {len(enriched_leads)} leads, skipped {len(no_email_urls)}")
+        try:
+            _write_enrichment_log(enriched_leads, no_email_urls, self.screened)
+        except Exception as exc:
+            _log(f"Failed to write enrichment log: {exc}")
+        return enriched_leads
+
+    # ---- Title filter / Bouncify ----
+
+    def verified(self, verified_leads: list[Lead], kept: int, dropped: int, rejected: int):
+        _log(f"Bouncify: {len(verified_leads)} verified, {rejected} rejected")
+        self.counts.update(kept=kept, dropped=dropped, bouncify_rejected=rejected, **self.cache_counts)
+        self._save(
+            "verified",
+            verified_leads=[lead.as_dict() for lead in verified_leads], counts=self.counts, ark_pending={},
+        )
+
+    def restore_verified(self) -> list[Lead]:
+        self.counts = self.state["counts"]
+        return [Lead.from_dict(lead) for lead in self.state["verified_leads"]]
+
+    # ---- Instantly ----
+
+    def to_push(self, verified_leads: list[Lead]) -> list[Lead]:
+        """Verified leads not pushed before a restart."""
+        return [lead for lead in verified_leads if lead.email.lower() not in self.pushed]
+
+    def pushed_chunk(self, results: dict):
+        """on_chunk: checkpoint Instantly results as each chunk settles."""
+        self.pushed.update(results)
+        self._save("pushing", pushed=self.pushed)
+
+    def summary(self) -> dict:
+        """Counters for _format_summary."""
+        results = Counter(self.pushed.values())
+        return {
+            "total_scraped": self.total_scraped,
+            "prescreened": len(self.screened),
+            "added": results["added"],
+            "duplicates": results["duplicate"],
+            "errors": results["error"],
+            "pb_timing": self.pb_timing,
+            **self.counts,
+        }
+
+
+def _title_filter(enriched_leads: list[Lead]) -> tuple[list[Lead], int]:
+    """Step 4: filter_leads, logging the most common drop reasons."""
+    kept_leads, dropped_count = filter_leads(enriched_leads)
+    _log(f"Title filter: {len(kept_leads)} kept, {dropped_count} dropped")
+    drop_rules = Counter(
+        lead.title_rule for lead in enriched_leads
+        if lead.title_rule == "no_match" or lead.title_rule.startswith("drop:")
+    )
+    if drop_rules:
+        _log(f"Title filter drop reasons: {dict(drop_rules.most_common(10))}")
+    return kept_leads, dropped_count
+
+
+def _run_pipeline(post_url: str, run_id: str) -> bool:
+    """run_pipeline body. Returns False if the run failed (the error is already reported)."""
+    progress = _RunProgress(run_id, post_url)
+    error = progress.begin()
+    if error:
+        _send_error("RESUME", error, post_url)
+        return False
+    _send_slack_message(progress.start_message())
+
+    # ---- Step 2: PhantomBuster (likers + commenters in parallel) ----
+    if progress.before("scraped"):
+        # Each phantom runs one container at a time — hold the slot until both finish
+        pb_slot = scheduler.stage_slot("phantombuster")
+        try:
+            if progress.before("launched"):
+                try:
+                    containers = _phantombuster_launch(post_url)
+                except Exception as exc:
+                    _send_error("PHANTOMBUSTER LAUNCH", str(exc), post_url)
+                    return False
+                progress.launched(containers)
+            else:
+                containers = progress.relaunched()
+
+            if PIPELINE_STREAMING:
+                return _run_pipeline_streaming(post_url, containers, progress, pb_slot)
+
+            poll_start = time.time()
+            try:
+                pb_data = _phantombuster_poll(containers)
+            except Exception as exc:
+                _send_error("PHANTOMBUSTER POLL", str(exc), post_url)
+                return False
+        finally:
+            pb_slot.release()
+
+        pb_timing = _phantombuster_timing(containers, time.time() - poll_start)
+        screened = [] if PB_TITLE_PRESCREEN else None
+        try:
+            profile_urls = _phantombuster_parse_results(pb_data, containers, screened)
+        except Exception as exc:
+            _send_error("PHANTOMBUSTER PARSE", str(exc), post_url)
+            return False
+        error = progress.scraped(profile_urls, screened, pb_timing)
+        if error:
+            _send_error("PHANTOMBUSTER PARSE", error, post_url)
+            return False
+    else:
+        progress.restore_scraped()
+
+    # ---- Step 3: Ark AI batch enrichment (cache first) ----
+    if progress.before("verified"):
+        cached_leads, to_launch, outstanding, ark_shared = progress.enrichment_plan()
+        enriched_leads = list(cached_leads)
+        try:
+            if to_launch or outstanding:
+                if ark_batcher.ARK_BATCH_LINGER > 0:
+                    enriched_leads.extend(_ark_enrich_batched(
+                        to_launch, outstanding, on_pending=progress.ark_pending, on_batch=progress.ark_landed,
+                    ))
+                else:
+                    with scheduler.stage_slot("ark"):
+                        enriched_leads.extend(_ark_enrich_batch(
+                            to_launch, _webhook_base_url(), outstanding,
+                            on_pending=progress.ark_pending, on_batch=progress.ark_landed,
+                        ))
+                progress.ark_abandon()
+            if ark_shared:
+                enriched_leads.extend(_ark_enrich_shared(ark_shared, _webhook_base_url()))
+        except Exception as exc:
+            _send_error("ARK AI ENRICHMENT", str(exc), post_url)
+            return False
+        finally:
+            progress.ark_abandon()
+        enriched_leads = progress.enriched(enriched_leads)
+
+        # ---- Step 4: Title filter ----
+        try:
+            kept_leads, dropped_count = _title_filter(enriched_leads)
+        except Exception as exc:
+            _send_error("TITLE FILTER", str(exc), post_url)
+            return False
+
+        # ---- Step 4B: Bouncify email validation ----
+        try:
+            verified_leads, bouncify_rejected = _bouncify_verify_batch(kept_leads)
+        except Exception as exc:
+            _send_error("BOUNCIFY VALIDATION", str(exc), post_url)
+            return False
+        progress.verified(verified_leads, len(kept_leads), dropped_count, bouncify_rejected)
+    else:
+        verified_leads = progress.restore_verified()
+
+    # ---- Step 5: Instantly push ----
+    _instantly_push(progress.to_push(verified_leads), post_url, on_chunk=progress.pushed_chunk)
+
+    # ---- Step 6: Slack summary ----
+    _send_summary(post_url, progress.start, progress.summary())
+    return True
+
+
+def _phantombuster_stream(containers: dict, out: queue.Queue, screened: list | None = None, pb_slot=None):
+    """
+    Streaming-mode producer (runs in its own thread): as each phantom finishes,
+    read its CSV and put ("scraped", label, new_urls) on `out`. Puts
+    ("scraped", None, None) when both are done, or ("failed", step, exc) if
+    polling/parsing fails. Releases `pb_slot` as soon as polling is over.
+    """
+    seen = set()
+    unique_urls = []
+    try:
+        for label, data in _phantombuster_poll_iter(containers):
+            before = len(unique_urls)
+            _phantombuster_read_profiles(
+                label, data, containers[label]["phantom_id"], seen, unique_urls, screened
+            )
+            out.put(("scraped", label, unique_urls[before:]))
+        out.put(("scraped", None, None))
+    except Exception as exc:
+        out.put(("failed", "PHANTOMBUSTER POLL", exc))
+    finally:
+        if pb_slot is not None:
+            pb_slot.release()
+
+
+def _run_pipeline_streaming(post_url: str, containers: dict, progress: "_RunProgress", pb_slot=None) -> bool:
+    """
+    Streaming variant of run_pipeline (PIPELINE_STREAMING=1). Each phantom's
+    profiles go to Ark AI as soon as its CSV lands, and each Ark batch runs
+    through the title filter, Bouncify and Instantly the moment its webhook
+    arrives. Sends the same Slack summary as the phased pipeline.
+
+    Profiles go through the same single-flight claim as the phased pipeline,
+    and through the cross-run batcher when ARK_BATCH_LINGER is on. Each
+    phantom's exports are waited on in their own thread, holding an Ark stage
+    slot (without the batcher) only while they are out; the later stages run
+    on this thread, outside any slot.
+
+    Checkpoints the launched containers and the outstanding Ark exports: a
+    resumed run scrapes again but re-attaches to those exports instead of
+    paying for them twice, and batches that already came back are answered by
+    the enrichment cache and the Instantly ledger. Returns False if the run
+    failed.
+    """
+    webhook_base_url = _webhook_base_url()
+    # ("scraped", label, urls) / ("leads", label, leads) / ("done", label, None) / ("failed", step, exc)
+    events = queue.Queue()
+    outstanding = progress.stream_outstanding()
+    in_flight = {url for urls in outstanding.values() for url in urls}
+    ark_pending = {}   # worker label -> its outstanding {trackId: URLs}
+    pending_lock = threading.Lock()
+    stopped = threading.Event()   # run over — late worker callbacks must not touch the checkpoint
+    workers = 0
+
+    profile_urls = []
+    enriched_leads = []
+    seen_emails = set()
+    screened = [] if PB_TITLE_PRESCREEN else None
+    stats = {
+        "total_scraped": 0, "total_enriched": 0, "kept": 0, "dropped": 0,
+        "bouncify_rejected": 0, "added": 0, "duplicates": 0, "errors": 0,
+        "cache_hits": 0, "cache_misses": 0, "ark_shared": 0,
+    }
+    step = "ARK AI ENRICHMENT"
+    poll_start = time.time()
+    first_lead_at = None
+
+    def process(batch_label: str, batch_leads: list[Lead]):
+        """Title filter -> Bouncify -> Instantly for one batch of enriched leads."""
+        nonlocal step, first_lead_at
+        batch_leads = _dedupe_leads_by_email(batch_leads, seen_emails)
+        enriched_leads.extend(batch_leads)
+        stats["total_enriched"] += len(batch_leads)
+
+        step = "TITLE FILTER"
+        kept_leads, dropped_count = _title_filter(batch_leads)
+        stats["kept"] += len(kept_leads)
+        stats["dropped"] += dropped_count
+
+        step = "BOUNCIFY VALIDATION"
+        verified_leads, bouncify_rejected = _bouncify_verify_batch(kept_leads)
+        stats["bouncify_rejected"] += bouncify_rejected
+
+        added, duplicates, errors = _instantly_push(verified_leads, post_url)
+        stats["added"] += added
+        stats["duplicates"] += duplicates
+        stats["errors"] += errors
+        if added and first_lead_at is None:
+            first_lead_at = time.time()
+            _log(f"First lead reached Instantly {first_lead_at - progress.start:.0f}s after start")
+
+        _log(
+            f"{batch_label} done — {len(kept_leads)} kept, {dropped_count} dropped, "
+            f"{bouncify_rejected} rejected by Bouncify, {added} added"
+        )
+        step = "ARK AI ENRICHMENT"
+
+    def start_worker(label: str, work):
+        """Run `work` in its own thread, reporting ("done", label) or the failure on `events`."""
+        nonlocal workers
+        workers += 1
+
+        def run():
+            try:
+                work()
+            except Exception as exc:
+                events.put(("failed", "ARK AI ENRICHMENT", exc))
+            else:
+                events.put(("done", label, None))
+
+        threading.Thread(target=run, name=f"stream-ark-{label}", daemon=True).start()
+
+    def checkpoint(label: str):
+        """on_pending for one worker: checkpoint every worker's outstanding exports together."""
+        def on_pending(pending_urls: dict):
+            with pending_lock:
+                if stopped.is_set():
+                    return
+                ark_pending[label] = pending_urls
+                merged = {}
+                for by_track in ark_pending.values():
+                    for track_id, urls in by_track.items():
+                        merged.setdefault(track_id, []).extend(urls)
+                progress.stream_pending(merged)
+        return on_pending
+
+    def enrich(label: str, urls: list[str], resumed: dict, led: dict):
+        """Worker: send `urls` (or re-attach to `resumed` exports) and hand each batch back as it lands."""
+        def on_batch(batch_urls: list[str], batch_leads: list[Lead]):
+            _enrichment_cache_store(batch_urls, batch_leads)
+            _ark_resolve(led, batch_urls, batch_leads)
+            events.put(("leads", f"{label} batch", batch_leads))
+
+        try:
+            if ark_batcher.ARK_BATCH_LINGER > 0:
+                _ark_enrich_batched(urls, resumed, on_pending=checkpoint(label), on_batch=on_batch)
+            else:
+                with scheduler.stage_slot("ark"):
+                    _ark_enrich_batch(
+                        urls, webhook_base_url, resumed, on_pending=checkpoint(label), on_batch=on_batch
+                    )
+        finally:
+            _ark_flights.abandon(led)
+
+    def share(label: str, shared: dict):
+        """Worker: wait for profiles another run is enriching (sending any it gives up on)."""
+        events.put(("leads", f"{label} shared profiles", _ark_enrich_shared(shared, webhook_base_url)))
+
+    def scraped(label: str, urls: list[str]):
+        """Route one phantom's new profiles: cache, single-flight claim, then Ark AI workers."""
+        profile_urls.extend(urls)
+        cached_leads, to_enrich = _enrichment_cache_lookup(urls)
+        # Profiles in exports re-attached after a restart are already on their way
+        to_launch, led, shared = _ark_claim([url for url in to_enrich if url not in in_flight])
+        stats["cache_hits"] += len(urls) - len(to_enrich)
+        stats["cache_misses"] += len(to_enrich) - len(shared)
+        stats["ark_shared"] += len(shared)
+
+        if to_launch:
+            _log(f"{label}: {len(to_launch)} new profiles — sending to Ark AI")
+            start_worker(label, lambda: enrich(label, to_launch, {}, led))
+        if shared:
+            start_worker(f"{label}-shared", lambda: share(label, shared))
+        if cached_leads:
+            process(f"{label} cached leads", cached_leads)
+
+    threading.Thread(
+        target=_phantombuster_stream, args=(containers, events, screened, pb_slot), daemon=True
+    ).start()
+    if outstanding:
+        start_worker("resumed", lambda: enrich("resumed", [], outstanding, {}))
+
+    scraping = True
+    try:
+        while scraping or workers:
+            kind, label, item = events.get()
+            if kind == "failed":
+                step = label
+                raise item
+            if kind == "done":
+                workers -= 1
+            elif kind == "leads":
+                process(label, item)
+            elif label is None:
+                scraping = False
+                stats["pb_timing"] = _phantombuster_timing(containers, time.time() - poll_start)
+            else:
+                scraped(label, item)
+    except Exception as exc:
+        _send_error(step, str(exc), post_url)
+        return False
+    finally:
+        with pending_lock:
+            stopped.set()
+
+    screened = screened or []
+    stats["prescreened"] = len(screened)
+    stats["total_scraped"] = len(profile_urls) + len(screened)
+    _log(f"PhantomBuster returned {stats['total_scraped']} profiles")
+    if screened:
+        _log(f"Headline pre-screen: {len(screened)} profiles skipped — Ark AI lookups saved")
+    if not stats["total_scraped"]:
+        _send_error("PHANTOMBUSTER PARSE", "No profiles found in output", post_url)
+        return False
+
+    no_email_urls = _no_email_urls(profile_urls, enriched_leads)
+    stats["no_email"] = len(no_email_urls)
+    try:
+        _write_enrichment_log(enriched_leads, no_email_urls, screened)
+    except Exception as exc:
+        _log(f"Failed to write enrichment log: {exc}")
+
+    _send_summary(post_url, progress.start, stats)
+    return True
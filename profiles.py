@@ -0,0 +1,126 @@
+"""
+profiles.py
+LinkedIn profile identity: canonical URLs / keys and an alias index.
+
+The same person shows up as a vanity slug, an ACoAA… member URN URL, a
+percent-encoded URL, with or without www./country subdomain, trailing slash
+or query string. Everything here reduces those to one profile key so dedup
+and result matching don't depend on which form a vendor happened to return.
+"""
+
+import threading
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+# Member IDs (URN-style) are case-sensitive; vanity slugs are not. The
+# prefix is matched case-insensitively so an ID some tool lowercased is
+# still keyed as an ID, not mistaken for a vanity slug.
+_MEMBER_ID_PREFIXES = ("acoaa", "acwaa", "aemaa")
+
+
+def _is_member_id(slug: str) -> bool:
+    return slug.lower().startswith(_MEMBER_ID_PREFIXES)
+
+
+def _parse_profile(url: str) -> tuple[str, str] | None:
+    """
+    Split a LinkedIn URL into (kind, identifier): ("in", slug), ("id", memberId)
+    or ("url", normalized URL) for LinkedIn URLs we don't recognise.
+    None if `url` isn't a LinkedIn URL at all, or is a profile URL with no
+    slug / member ID (e.g. a bare /in/).
+    """
+    url = (url or "").strip().strip("<>")
+    if not url:
+        return None
+    if "://" not in url:
+        url = "https://" + url.lstrip("/")
+
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if host != "linkedin.com" and not host.endswith(".linkedin.com"):
+        return None
+
+    segments = [unquote(seg).strip() for seg in parts.path.split("/") if seg.strip()]
+    slug = None
+    if segments and segments[0].lower() == "in":
+        slug = segments[1] if len(segments) >= 2 else ""
+    elif [seg.lower() for seg in segments[:2]] == ["profile", "view"]:
+        slug = parse_qs(parts.query).get("id", [""])[0].strip()
+
+    if slug is not None:
+        if not slug:
+            return None   # a profile URL that names nobody
+        if _is_member_id(slug):
+            return "id", slug
+        return "in", slug.lower()
+    path = "/".join(quote(seg, safe="-_.~") for seg in segments)
+    return "url", f"https://www.linkedin.com/{path}"
+
+
+def profile_key(url: str) -> str | None:
+    """
+    Canonical identity key for a LinkedIn profile URL: "in/<slug>" for vanity
+    URLs, "id/<memberId>" for URN-style IDs. None if `url` isn't a LinkedIn URL.
+    """
+    parsed = _parse_profile(url)
+    if not parsed:
+        return None
+    kind, ident = parsed
+    return f"{kind}/{ident.lower() if kind == 'url' else ident}"
+
+
+def canonical_profile_url(url: str) -> str | None:
+    """Normalized https://www.linkedin.com/in/<slug> form of a profile URL, or None."""
+    parsed = _parse_profile(url)
+    if not parsed:
+        return None
+    kind, ident = parsed
+    if kind == "url":
+        return ident
+    return f"https://www.linkedin.com/in/{quote(ident, safe='-_.~')}"
+
+
+class ProfileIndex:
+    """
+    Maps every observed form of a profile to one key. Forms are linked when a
+    vendor tells us they're the same person (e.g. Ark AI returning both the
+    vanity URL and the member-ID identifier). Thread-safe; when it grows past
+    `max_aliases` it starts over rather than growing without bound.
+    """
+
+    def __init__(self, max_aliases: int = 200_000):
+        self.max_aliases = max_aliases
+        self._parent = {}   # key -> linked key (union-find)
+        self._lock = threading.Lock()
+
+    def _root(self, key: str) -> str:
+        path = []
+        while key in self._parent and self._parent[key] != key:
+            path.append(key)
+            key = self._parent[key]
+        for seen in path:
+            self._parent[seen] = key
+        return key
+
+    def key(self, url: str) -> str | None:
+        """Resolved profile key for `url` (follows known aliases)."""
+        key = profile_key(url)
+        if key is None:
+            return None
+        with self._lock:
+            return self._root(key)
+
+    def link(self, *urls: str):
+        """Record that all of `urls` are the same person."""
+        keys = [k for k in map(profile_key, urls) if k]
+        if len(keys) < 2:
+            return
+        with self._lock:
+            if len(self._parent) > self.max_aliases:
+                self._parent.clear()
+            roots = {self._root(k) for k in keys}
+            # Prefer the vanity form as the representative key
+            target = min(roots, key=lambda k: (not k.startswith("in/"), k))
+            for root in roots:
+                self._parent[root] = target
+            for k in keys:
+                self._parent.setdefault(k, target)
@@ -0,0 +1,188 @@
+"""
+rate_governor.py
+Process-wide request pacing per vendor, shared by every pipeline thread.
+
+Each vendor gets a token bucket (requests/second) and a concurrency limit,
+both adjusted AIMD-style: every successful response nudges them up towards
+their ceilings, every 429 halves them and pauses the vendor for the
+Retry-After the vendor asked for. Two pipelines running at once therefore
+split one vendor budget instead of each pacing itself.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+THROTTLE_DEFAULT_PAUSE = 5     # seconds to back off on a 429 without Retry-After
+THROTTLE_MAX_PAUSE = 120       # never trust a Retry-After longer than this
+RATE_INCREASE_STEPS = 20       # successes to climb from min_rate back to max_rate
+GOVERNOR_RETRY_DELAY = 0.05    # try_acquire() wait when every concurrency slot is taken
+
+_governors = {}                # vendor name -> VendorGovernor
+_governors_lock = threading.Lock()
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class VendorGovernor:
+    """
+    Token bucket + adaptive concurrency limit for one vendor. Thread-safe;
+    callers wrap each request in `with governor.slot():` (or poll
+    try_acquire() from a coroutine).
+    """
+
+    def __init__(self, name: str, rate: float, max_rate: float | None = None,
+                 min_rate: float | None = None, burst: float = 1,
+                 concurrency: int = 4, max_concurrency: int | None = None):
+        self.name = name
+        self.max_rate = max_rate or rate
+        self.min_rate = min_rate or self.max_rate / 16
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_concurrency = max_concurrency or concurrency
+        self.limit = float(concurrency)
+
+        self._cond = threading.Condition()
+        self._tokens = self.burst
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._in_flight = 0
+        self._waiting = 0
+
+        self._granted = 0
+        self._throttled = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def acquire(self) -> float:
+        """Block until a request may start. Returns the seconds spent waiting."""
+        start = time.monotonic()
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    if now < self._paused_until:
+                        self._cond.wait(self._paused_until - now)
+                        continue
+                    if self._in_flight >= int(self.limit):
+                        self._cond.wait()
+                        continue
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        self._in_flight += 1
+                        break
+                    self._cond.wait((1 - self._tokens) / self.rate)
+            finally:
+                self._waiting -= 1
+
+            waited = time.monotonic() - start
+            self._granted += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return waited
+
+    def try_acquire(self, waiting_since: float | None = None) -> float:
+        """
+        Non-blocking acquire for callers that can't park a thread (the asyncio
+        engine): 0.0 if a request may start now (release() it afterwards),
+        otherwise the seconds to sleep before asking again. `waiting_since`
+        (time.monotonic()) is when the caller first asked, for the wait stats.
+        """
+        with self._cond:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            if self._in_flight >= int(self.limit):
+                return GOVERNOR_RETRY_DELAY
+            self._refill(now)
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rate
+            self._tokens -= 1
+            self._in_flight += 1
+
+            waited = now - (waiting_since or now)
+            self._granted += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return 0.0
+
+    def release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def on_success(self):
+        """Additive increase: climb back towards max_rate / max_concurrency."""
+        with self._cond:
+            self.rate = min(self.max_rate, self.rate + (self.max_rate - self.min_rate) / RATE_INCREASE_STEPS)
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+
+    def on_throttle(self, retry_after: float | None = None):
+        """Multiplicative decrease on a 429, and pause until the vendor's Retry-After."""
+        pause = THROTTLE_DEFAULT_PAUSE if retry_after is None else retry_after
+        with self._cond:
+            self._throttled += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.limit = max(1.0, self.limit / 2)
+            self._tokens = 0
+            self._paused_until = max(self._paused_until, time.monotonic() + min(pause, THROTTLE_MAX_PAUSE))
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "rate": round(self.rate, 3),
+                "max_rate": self.max_rate,
+                "concurrency_limit": int(self.limit),
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "paused_for": round(max(self._paused_until - time.monotonic(), 0), 1),
+                "granted": self._granted,
+                "throttled": self._throttled,
+                "avg_wait": round(self._wait_total / self._granted, 3) if self._granted else 0.0,
+                "max_wait": round(self._wait_max, 3),
+            }
+
+
+def governor(name: str, **kwargs) -> VendorGovernor:
+    """The process-wide governor for `name`, created on first use."""
+    with _governors_lock:
+        gov = _governors.get(name)
+        if gov is None:
+            gov = _governors[name] = VendorGovernor(name, **kwargs)
+        return gov
+
+
+def stats() -> dict:
+    """{vendor name: current rate, limits and queue waits} for every governor."""
+    with _governors_lock:
+        governors = list(_governors.values())
+    return {gov.name: gov.stats() for gov in governors}
@@ -0,0 +1,304 @@
+"""
+scheduler.py
+Bounded job queue for pipeline runs, plus per-vendor stage slots.
+
+A fixed pool of worker threads runs queued jobs; the queue has a maximum
+depth and is served fairly — the next job goes to the requester (Slack user)
+with the fewest runs in progress, FIFO within each — so one person pasting
+ten posts doesn't starve everyone else. The same post URL is never queued twice.
+
+Stage slots cap how many runs use a vendor-heavy stage at once, whichever
+worker they're on: each PhantomBuster phantom can only run one container at a
+time, and Ark AI exports compete for the same account quota. Runs always take
+slots in pipeline order (PhantomBuster before Ark AI), so they can't deadlock.
+"""
+
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from datetime import datetime
+
+PIPELINE_WORKERS = int(os.environ.get("PIPELINE_WORKERS", 2))
+PIPELINE_QUEUE_DEPTH = int(os.environ.get("PIPELINE_QUEUE_DEPTH", 10))
+
+# Max runs inside each vendor stage at once (stages not listed are unlimited)
+STAGE_CAPS = {
+    "phantombuster": 1,
+    "ark": int(os.environ.get("ARK_MAX_CONCURRENT_RUNS", 2)),
+}
+JOB_HISTORY = 20   # finished jobs kept for /jobs
+
+
+class QueueFull(Exception):
+    """Raised by submit() when PIPELINE_QUEUE_DEPTH jobs are already waiting, or during shutdown."""
+
+
+def _log(msg: str):
+    print(f"[{datetime.utcnow().isoformat()}] {msg}", flush=True)
+
+
+# ---------------------------------------------------------------------------
+# Stage slots
+# ---------------------------------------------------------------------------
+
+class _Stage:
+    def __init__(self, cap: int):
+        self.cap = cap
+        self.in_use = 0
+        self.waiters = deque()   # FIFO: slots go to runs in the order they asked
+        self.cond = threading.Condition()
+
+
+class StageSlot:
+    """A held stage slot. release() is idempotent and may be called from any thread."""
+
+    def __init__(self, stage: _Stage | None):
+        self._stage = stage
+        self._held = stage is not None
+        self._lock = threading.Lock()
+
+    def release(self):
+        with self._lock:
+            if not self._held:
+                return
+            self._held = False
+        with self._stage.cond:
+            self._stage.in_use -= 1
+            self._stage.cond.notify_all()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+_stages = {name: _Stage(cap) for name, cap in STAGE_CAPS.items()}
+
+
+def stage_slot(name: str) -> StageSlot:
+    """Block until a slot in stage `name` is free and take it."""
+    stage = _stages.get(name)
+    if stage is None:
+        return StageSlot(None)
+    ticket = object()
+    with stage.cond:
+        if stage.in_use >= stage.cap:
+            _log(f"Waiting for a free {name} slot ({stage.in_use}/{stage.cap} in use)")
+        stage.waiters.append(ticket)
+        try:
+            while stage.waiters[0] is not ticket or stage.in_use >= stage.cap:
+                stage.cond.wait()
+        finally:
+            stage.waiters.remove(ticket)
+            # Let the next waiter check whether there's still a free slot
+            stage.cond.notify_all()
+        stage.in_use += 1
+    return StageSlot(stage)
+
+
+def stage_stats() -> dict:
+    stats = {}
+    for name, stage in _stages.items():
+        with stage.cond:
+            stats[name] = {"cap": stage.cap, "in_use": stage.in_use, "waiting": len(stage.waiters)}
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Job queue
+# ---------------------------------------------------------------------------
+
+class Job:
+    def __init__(self, post_url: str, requester: str, run_id: str | None):
+        self.id = uuid.uuid4().hex[:8]
+        self.post_url = post_url
+        self.requester = requester
+        self.run_id = run_id
+        self.status = "queued"   # queued -> running -> done | failed
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def as_dict(self) -> dict:
+        now = time.time()
+        return {
+            "id": self.id,
+            "post_url": self.post_url,
+            "requester": self.requester,
+            "run_id": self.run_id,
+            "status": self.status,
+            "waited": round((self.started_at or now) - self.submitted_at, 1),
+            "running_for": round((self.finished_at or now) - self.started_at, 1) if self.started_at else None,
+        }
+
+
+class JobScheduler:
+    """
+    Runs `run(post_url, run_id)` on a pool of `workers` threads, at most
+    `max_queue` jobs waiting. Worker threads start on the first submit.
+    `persist(post_url)`, if given, records each newly queued job durably and
+    returns its run_id (see checkpoints.py).
+    """
+
+    def __init__(self, run, workers: int = PIPELINE_WORKERS, max_queue: int = PIPELINE_QUEUE_DEPTH,
+                 persist=None):
+        self.run = run
+        self.persist = persist
+        self.workers = workers
+        self.max_queue = max_queue
+        self._cond = threading.Condition()
+        self._queues = {}        # requester -> deque of queued Jobs
+        self._active = {}        # job id -> running Job
+        self._finished = deque(maxlen=JOB_HISTORY)
+        self._threads = []
+        self._completed = 0
+        self._wait_total = 0.0
+        self._closed = False
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._worker, name=f"pipeline-worker-{len(self._threads) + 1}", daemon=True
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def _running_by_requester(self) -> dict:
+        running = {}
+        for job in self._active.values():
+            running[job.requester] = running.get(job.requester, 0) + 1
+        return running
+
+    @staticmethod
+    def _pick(queues: dict, running: dict) -> str:
+        """Requester to serve next: fewest runs in progress, then longest-waiting head job."""
+        return min(queues, key=lambda r: (running.get(r, 0), queues[r][0].submitted_at))
+
+    def _ordered(self) -> list[Job]:
+        """Queued jobs in the order workers will take them."""
+        queues = {requester: deque(jobs) for requester, jobs in self._queues.items()}
+        running = self._running_by_requester()
+        order = []
+        while queues:
+            requester = self._pick(queues, running)
+            order.append(queues[requester].popleft())
+            running[requester] = running.get(requester, 0) + 1
+            if not queues[requester]:
+                del queues[requester]
+        return order
+
+    def _position(self, job: Job) -> int:
+        """0 if `job` starts right away, else its place in line."""
+        index = self._ordered().index(job)
+        idle = self.workers - len(self._active)
+        return max(index + 1 - idle, 0)
+
+    def submit(self, post_url: str, requester: str = "", run_id: str | None = None,
+               force: bool = False) -> tuple[Job, int]:
+        """
+        Queue a run for `post_url`. Returns (job, position): position 0 means a
+        worker picks it up immediately. If the post is already queued or
+        running, returns that job instead. Pass the `run_id` of an interrupted
+        run to resume it; `force` skips the depth limit (used for resumes).
+        Raises QueueFull.
+        """
+        with self._cond:
+            if self._closed:
+                raise QueueFull("shutting down")
+            self._start_workers()
+            for job in self._active.values():
+                if job.post_url == post_url:
+                    return job, 0
+            for job in self._ordered():
+                if job.post_url == post_url:
+                    return job, self._position(job)
+
+            queued = sum(len(jobs) for jobs in self._queues.values())
+            if queued >= self.max_queue and not force:
+                raise QueueFull(f"{queued} jobs already waiting")
+
+            if run_id is None and self.persist:
+                run_id = self.persist(post_url)
+            job = Job(post_url, requester, run_id)
+            self._queues.setdefault(requester, deque()).append(job)
+            position = self._position(job)
+            self._cond.notify()
+        _log(f"Job {job.id} queued for {post_url} (position {position})")
+        return job, position
+
+    def _next_job(self) -> Job:
+        with self._cond:
+            while not self._queues:
+                self._cond.wait()
+            requester = self._pick(self._queues, self._running_by_requester())
+            job = self._queues[requester].popleft()
+            if not self._queues[requester]:
+                del self._queues[requester]
+            job.status = "running"
+            job.started_at = time.time()
+            self._active[job.id] = job
+            self._wait_total += job.started_at - job.submitted_at
+            return job
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            _log(f"Job {job.id} started after {job.started_at - job.submitted_at:.0f}s in queue")
+            try:
+                self.run(job.post_url, job.run_id)
+                job.status = "done"
+            except Exception:
+                job.status = "failed"
+                _log(f"Job {job.id} crashed:\n{traceback.format_exc()}")
+            self._finish(job)
+
+    def _finish(self, job: Job):
+        """Move a job that has stopped running into the history."""
+        job.finished_at = time.time()
+        with self._cond:
+            self._active.pop(job.id, None)
+            self._finished.appendleft(job)
+            self._completed += 1
+            self._cond.notify_all()
+
+    def shutdown(self, timeout: float):
+        """
+        Stop taking jobs and give running ones up to `timeout` seconds to
+        finish. Anything still queued or running stays checkpointed and is
+        resumed on the next start.
+        """
+        deadline = time.time() + timeout
+        with self._cond:
+            self._closed = True
+            # Leave queued jobs where they are — they're persisted, and idle
+            # workers must not start new runs while we're going down
+            self._queues.clear()
+            while self._active and time.time() < deadline:
+                self._cond.wait(deadline - time.time())
+            left = len(self._active)
+        if left:
+            _log(f"Shutting down with {left} run(s) in progress — they'll resume from their checkpoints")
+        else:
+            _log("Shutting down — no runs in progress")
+
+    def stats(self) -> dict:
+        """Queue depth, running jobs, wait times and stage slot usage."""
+        with self._cond:
+            queued = self._ordered()
+            started = self._completed + len(self._active)
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "queue_depth": len(queued),
+                "active": [job.as_dict() for job in self._active.values()],
+                "queued": [job.as_dict() for job in queued],
+                "recent": [job.as_dict() for job in self._finished],
+                "completed": self._completed,
+                "accepting": not self._closed,
+                "avg_wait": round(self._wait_total / started, 1) if started else 0.0,
+                "stages": stage_stats(),
+            }
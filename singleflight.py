@@ -0,0 +1,138 @@
+"""
+singleflight.py
+Process-wide single-flight registries, so concurrent pipelines never pay
+twice for the same lookup: an Ark AI enrichment for a profile, a Bouncify
+verdict or an Instantly push for an email.
+
+A run claim()s its keys. It leads the ones nobody has in flight — and must
+settle every one with resolve(), or abandon() whatever is left if it fails —
+and follows the rest, getting the leader's Future for each. Followers
+collect() once their own led lookups are settled (and never while holding a
+stage slot), so two runs each leading part of the other's work can't
+deadlock. Keys whose leader gave up or ran past the timeout come back to the
+follower to look up itself. Settled results stay claimable for
+SINGLEFLIGHT_LINGER seconds, which covers a run that checked its cache just
+before the leader stored the result and claims just after.
+
+The Futures are concurrent.futures ones: the threaded engine blocks on them,
+the asyncio engine awaits them through asyncio.wrap_future.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, wait
+
+SINGLEFLIGHT_LINGER = 60   # seconds a settled result is still handed to new claimers
+ABANDONED = object()   # result of a Future whose leader gave up
+
+_registries = {}       # name -> SingleFlight
+_registries_lock = threading.Lock()
+
+
+class SingleFlight:
+    """In-flight lookups for one kind of key. Thread-safe."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._flights = {}   # key -> Future of the run leading it
+        self._recent = OrderedDict()   # key -> (expires_at, settled Future), oldest first
+        self._counts = {"led": 0, "followed": 0, "abandoned": 0, "fell_through": 0}
+
+    def claim(self, keys) -> tuple[dict, dict]:
+        """
+        Register interest in `keys`. Returns (led, followed), both {key:
+        Future}: `led` are ours to look up and settle, `followed` are in
+        flight for another run.
+        """
+        led = {}
+        followed = {}
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and next(iter(self._recent.values()))[0] <= now:
+                self._recent.popitem(last=False)
+            for key in keys:
+                if key in led or key in followed:
+                    continue
+                future = self._flights.get(key)
+                if future is None and key in self._recent:
+                    future = self._recent[key][1]
+                if future is None:
+                    led[key] = self._flights[key] = Future()
+                else:
+                    followed[key] = future
+            self._counts["led"] += len(led)
+            self._counts["followed"] += len(followed)
+        return led, followed
+
+    def resolve(self, led: dict, values: dict):
+        """Publish {key: result} for keys we lead; they're removed from `led`."""
+        for key, value in values.items():
+            future = led.pop(key, None)
+            if future is None:
+                continue
+            with self._lock:
+                if self._flights.get(key) is future:
+                    del self._flights[key]
+                    if value is not ABANDONED:
+                        self._recent.pop(key, None)
+                        self._recent[key] = (time.monotonic() + SINGLEFLIGHT_LINGER, future)
+            future.set_result(value)
+
+    def abandon(self, led: dict):
+        """Give up every key still in `led` — their followers look them up themselves."""
+        if led:
+            with self._lock:
+                self._counts["abandoned"] += len(led)
+        self.resolve(led, dict.fromkeys(led, ABANDONED))
+
+    def _settled(self, followed: dict) -> tuple[dict, list]:
+        results = {}
+        redo = []
+        for key, future in followed.items():
+            value = future.result() if future.done() else ABANDONED
+            if value is ABANDONED:
+                redo.append(key)
+            else:
+                results[key] = value
+        if redo:
+            with self._lock:
+                self._counts["fell_through"] += len(redo)
+        return results, redo
+
+    def collect(self, followed: dict, timeout: float) -> tuple[dict, list]:
+        """
+        Wait up to `timeout` seconds for the lookups we follow. Returns
+        ({key: result}, keys to look up ourselves).
+        """
+        if followed:
+            wait(list(followed.values()), timeout)
+        return self._settled(followed)
+
+    async def collect_async(self, followed: dict, timeout: float) -> tuple[dict, list]:
+        """collect() for a coroutine."""
+        if followed:
+            await asyncio.wait([asyncio.wrap_future(f) for f in followed.values()], timeout=timeout)
+        return self._settled(followed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"in_flight": len(self._flights), "recent": len(self._recent), **self._counts}
+
+
+def registry(name: str) -> SingleFlight:
+    """The process-wide registry for `name`, created on first use."""
+    with _registries_lock:
+        flights = _registries.get(name)
+        if flights is None:
+            flights = _registries[name] = SingleFlight(name)
+        return flights
+
+
+def stats() -> dict:
+    """{registry name: in-flight keys and led / followed / abandoned counters}."""
+    with _registries_lock:
+        registries = list(_registries.values())
+    return {flights.name: flights.stats() for flights in registries}
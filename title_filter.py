@@ -5,6 +5,12 @@ KEEP leads with target titles, DROP leads with exclusion titles.
 If title is missing/blank, KEEP the lead (benefit of the doubt).
 """
 
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+from leads import Lead
+
 
 # Keywords that indicate a decision-maker we want to reach
 KEEP_KEYWORDS = [
@@ -32,12 +38,85 @@ DROP_KEYWORDS = [
 ]
 
 
-def filter_leads(leads: list[dict]) -> tuple[list[dict], int]:
+# KEEP keywords that also match as the start of a longer word
+# ("sales lead" -> "Sales Leader", "Growth Leadership")
+KEEP_STEMS = ["sales lead", "growth lead"]
+
+
+# Titles repeat a lot across posts — remember this many decisions (per raw
+# title, and per normalized title for case/spacing variants)
+TITLE_MEMO_SIZE = 50_000
+
+
+def _keyword_re(keywords: list[str], stems: list[str] = ()) -> re.Pattern:
+    """
+    One alternation over all keywords, whole words only ("ae" must not hit
+    "Michael", "cro" must not hit "Microsoft", "intern" must not hit
+    "international"); a trailing plural "s" is allowed, and keywords in
+    `stems` may run on into a longer word. Longest keywords first so the
+    reported rule is the most specific one.
     """
-    Filter a list of enriched lead dicts by job title.
+    def alternation(words):
+        return "|".join(re.escape(kw) for kw in sorted(words, key=len, reverse=True))
+
+    pattern = r"\b(?:(" + alternation([kw for kw in keywords if kw not in stems]) + r")s?"
+    if stems:
+        pattern += r"|(" + alternation(stems) + r")\w*"
+    return re.compile(pattern + r")\b")
+
+
+def _keyword(match: re.Match) -> str:
+    """The keyword (not the longer word it ran into) that `match` matched."""
+    return match.group(match.lastindex)
+
+
+_DROP_RE = _keyword_re(DROP_KEYWORDS)
+_KEEP_RE = _keyword_re(KEEP_KEYWORDS, KEEP_STEMS)
+
+
+class TitleDecision(NamedTuple):
+    keep: bool
+    rule: str   # "blank", "drop:<keyword>", "keep:<keyword>" or "no_match"
+
+
+def _normalize_title(title: str) -> str:
+    return " ".join((title or "").lower().split())
+
+
+@lru_cache(maxsize=TITLE_MEMO_SIZE)
+def _decide(title: str) -> TitleDecision:
+    # Missing or blank title — keep (benefit of the doubt)
+    if not title:
+        return TitleDecision(True, "blank")
+
+    # DROP keywords win over KEEP keywords
+    match = _DROP_RE.search(title)
+    if match:
+        return TitleDecision(False, f"drop:{_keyword(match)}")
+
+    match = _KEEP_RE.search(title)
+    if match:
+        return TitleDecision(True, f"keep:{_keyword(match)}")
+
+    # Title present but matches neither list — drop
+    return TitleDecision(False, "no_match")
+
+
+@lru_cache(maxsize=TITLE_MEMO_SIZE)
+def match_title(title: str | None) -> TitleDecision:
+    """Keep/drop decision for one job title, plus the rule that decided it."""
+    # A repeated title is answered here without normalizing it again; case and
+    # spacing variants of a seen title still share _decide's entry
+    return _decide(_normalize_title(title))
+
+
+def filter_leads(leads: list[Lead]) -> tuple[list[Lead], int]:
+    """
+    Filter a list of enriched leads by job title.
 
     Args:
-        leads: list of dicts, each must have a 'title' key (can be None/blank).
+        leads: list of Leads (title can be blank). Every lead gets its
+            title_rule set to the rule that decided it.
 
     Returns:
         (kept_leads, dropped_count)
@@ -46,24 +125,27 @@ def filter_leads(leads: list[dict]) -> tuple[list[dict], int]:
     dropped = 0
 
     for lead in leads:
-        title = (lead.get("title") or "").strip().lower()
-
-        # Missing or blank title — keep (benefit of the doubt)
-        if not title:
+        decision = match_title(lead.title)
+        lead.title_rule = decision.rule
+        if decision.keep:
             kept.append(lead)
-            continue
-
-        # Check DROP keywords first — if matched, skip this lead
-        if any(kw in title for kw in DROP_KEYWORDS):
+        else:
             dropped += 1
-            continue
 
-        # Check KEEP keywords — if matched, keep
-        if any(kw in title for kw in KEEP_KEYWORDS):
-            kept.append(lead)
-            continue
+    return kept, dropped
 
-        # Title present but matches neither list — drop
-        dropped += 1
 
-    return kept, dropped
+def prescreen_headline(headline: str) -> bool:
+    """
+    Pre-enrichment check on a scraped LinkedIn headline (before we pay Ark AI).
+
+    Conservative — only a clear drop signal rejects: a DROP keyword and no
+    KEEP keyword anywhere. Blank or ambiguous headlines pass, and the full
+    title filter still runs after enrichment.
+
+    Returns True to keep the profile, False to skip it.
+    """
+    headline = _normalize_title(headline)
+    if not headline or not _DROP_RE.search(headline):
+        return True
+    return bool(_KEEP_RE.search(headline))